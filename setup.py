@@ -112,6 +112,19 @@ setup(name='gscreenshot',
         ],
         'console_scripts': [
             'gscreenshot-cli = gscreenshot.frontend:delegate'
+        ],
+        'gscreenshot.screenshooters': [
+            'python-xlib = gscreenshot.registry:XLIB',
+            'scrot = gscreenshot.registry:SCROT',
+            'imagemagick = gscreenshot.registry:IMAGEMAGICK',
+            'python-pillow = gscreenshot.registry:PILLOW',
+            'imlib_2 = gscreenshot.registry:IMLIB2',
+            'xdg-desktop-portal = gscreenshot.registry:XDG_DESKTOP_PORTAL',
+            'grim = gscreenshot.registry:GRIM'
+        ],
+        'gscreenshot.selectors': [
+            'slop = gscreenshot.registry:SLOP',
+            'slurp = gscreenshot.registry:SLURP'
         ]
     },
     test_suite='nose.collector',
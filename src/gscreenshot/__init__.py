@@ -10,22 +10,35 @@
  - Updated to use modern libraries and formats
  - Further changes will be noted in release notes
 '''
+#pylint: disable=import-outside-toplevel
 import gettext
-import io
 import json
 import locale
 import os
 import sys
 import subprocess
 import tempfile
+import threading
+import time
 import typing
 
 from datetime import datetime
-from pkg_resources import resource_string, require, resource_filename
-from PIL import Image
-from gscreenshot.screenshooter import Screenshooter
-from gscreenshot.screenshooter.factory import ScreenshooterFactory
-from gscreenshot.util import session_is_wayland
+from gscreenshot.util import session_is_wayland, get_resource_path, get_resource_string
+from gscreenshot.util import get_program_version
+
+# PIL and the screenshot backends are imported when they're first
+# needed so that frontends can start (and answer --help) quickly
+if typing.TYPE_CHECKING:
+    from PIL import Image
+    from gscreenshot.screenshooter import Screenshooter
+    from gscreenshot.screenshooter.capture import Capture
+    from gscreenshot.preview import PreviewPyramid
+    from gscreenshot.encoding import EncodedCache
+    from concurrent.futures import Future
+    from gscreenshot.screenshooter.factory import ScreenshooterFactory
+    from gscreenshot.probe_cache import ProbeCache
+    from gscreenshot.backend_stats import BackendStats
+    from gscreenshot.registry import BackendInfo
 
 _ = gettext.gettext
 
@@ -35,12 +48,25 @@ class Gscreenshot(object):
     Gscreenshot application
     """
 
-    __slots__ = ['screenshooter', 'saved_last_image', 'last_save_file', 'cache']
+    __slots__ = ['screenshooter', 'saved_last_image', 'last_save_file', 'cache', 'probe_cache',
+                 'backend', 'backend_stats', 'hedge_percentile', 'destination_format',
+                 '_screenshooter_factory', '_cancelled', '_preview',
+                 '_encodings', '_cache_lock']
 
-    screenshooter: Screenshooter
+    screenshooter: 'Screenshooter'
     saved_last_image: bool
     last_save_file: typing.Optional[str]
-    cache: typing.Dict[str, str]
+    cache: typing.Dict[str, typing.Any]
+    probe_cache: 'ProbeCache'
+    backend: typing.Optional['BackendInfo']
+    backend_stats: 'BackendStats'
+    hedge_percentile: typing.Optional[float]
+    destination_format: typing.Optional[str]
+    _screenshooter_factory: 'ScreenshooterFactory'
+    # The last capture and the preview copies made of it
+    _preview: typing.Optional[typing.Tuple['Capture', 'PreviewPyramid']]
+    # What the last capture has been encoded to
+    _encodings: typing.Optional['EncodedCache']
 
     # generated using piexif
     EXIF_TEMPLATE = b'Exif\x00\x00MM\x00*\x00\x00\x00\x08\x00\x02\x011\x00\x02\x00\x00\x00\x15\x00\x00\x00&\x87i\x00\x04\x00\x00\x00\x01\x00\x00\x00;\x00\x00\x00\x00gscreenshot [[VERSION]]\x00\x00\x01\x90\x03\x00\x02\x00\x00\x00\x14\x00\x00\x00I[[CREATE_DATE]]\x00' #pylint: disable=line-too-long
@@ -49,7 +75,7 @@ class Gscreenshot(object):
         """
         constructor
         """
-        locale_path = resource_filename('gscreenshot.resources', 'locale')
+        locale_path = get_resource_path('gscreenshot.resources', 'locale')
         locale.setlocale(locale.LC_ALL, '')
         # I don't know what's going on with this. This call appears to exist,
         # works fine, and seems required for glade localization to work.
@@ -58,11 +84,10 @@ class Gscreenshot(object):
         gettext.bindtextdomain('gscreenshot', locale_path)
         gettext.textdomain('gscreenshot')
 
-        screenshooter_factory = ScreenshooterFactory(screenshooter)
-        self.screenshooter = screenshooter_factory.create()
-
         self.saved_last_image = False
         self.last_save_file = None
+        # Background saves change and write the cache too
+        self._cache_lock = threading.RLock()
         self.cache = {"last_save_dir": os.path.expanduser("~")}
         if os.path.isfile(self.get_cache_file()):
             with open(self.get_cache_file(), "r", encoding="UTF-8") as cachefile:
@@ -74,35 +99,65 @@ class Gscreenshot(object):
         else:
             self.save_cache()
 
+        from gscreenshot.backend_stats import BackendStats
+        from gscreenshot.probe_cache import ProbeCache
+        from gscreenshot.registry import get_registry
+        from gscreenshot.screenshooter.factory import ScreenshooterFactory
+
+        # The cache is loaded first so that backend probe results,
+        # registered backends and capture statistics from an earlier
+        # run can be reused
+        registry = get_registry()
+        registry.set_cached(self.cache.get("registry"))
+        self.probe_cache = ProbeCache(self.cache.get("probes"))
+        self.backend_stats = BackendStats(self.cache.get("backend_stats"))
+        self._screenshooter_factory = ScreenshooterFactory(
+            screenshooter, self.probe_cache, registry, self.backend_stats
+        )
+        self.screenshooter = self._screenshooter_factory.create()
+        self.backend = self._screenshooter_factory.backend
+        self.hedge_percentile = None
+        self.destination_format = None
+        self._cancelled = threading.Event()
+        self._preview = None
+        self._encodings = None
+
+        if self.probe_cache.changed or registry.changed:
+            self.update_cache(registry=registry.to_dict(), probes=self.probe_cache.to_dict())
+
     def get_capabilities(self) -> typing.Set[str]:
         '''
         Get the features supported in the current setup
         '''
         return set(self.screenshooter.get_capabilities_())
 
-    def get_available_cursors(self) -> typing.Dict[str, typing.Optional[Image.Image]]:
+    def get_available_cursors(self) -> typing.Dict[str, typing.Optional['Image.Image']]:
         '''
-        Get the alternate pointer pixmaps gscreenshot can use
+        Get the alternate pointer pixmaps gscreenshot can use. The
+        images are shared with every other caller, so copy one before
+        changing it.
         Returns {name: PIL.Image}
         '''
-        return {
-                'theme': None,
-                'adwaita': Image.open(
-                    resource_filename(
-                        'gscreenshot.resources.pixmaps', 'cursor-adwaita.png'
-                    )
-                ),
-                'prohibit': Image.open(
-                    resource_filename(
-                        'gscreenshot.resources.pixmaps', 'cursor-prohibit.png'
-                    )
-                ),
-                'allow': Image.open(
-                    resource_filename(
-                        'gscreenshot.resources.pixmaps', 'cursor-allow.png'
-                    )
-                )
-            }
+        from gscreenshot.cursors import get_cursor_store
+
+        return {'theme': None, **get_cursor_store().get_all()}
+
+    @staticmethod
+    def _get_cursor(capture_cursor: bool, cursor_name: str) -> typing.Optional['Image.Image']:
+        '''
+        The cursor image to stamp, or None for the theme's. A cursor that
+        can't be read, such as 'xfixes' without XFixes, falls back to the
+        theme's. Only the live cursor needs a trip to the X server.
+        '''
+        if not capture_cursor or cursor_name == 'theme':
+            return None
+
+        from gscreenshot.cursors import get_cursor_store
+
+        try:
+            return get_cursor_store().get(cursor_name)
+        except KeyError:
+            return None
 
     def show_screenshot_notification(self) -> bool:
         '''
@@ -113,17 +168,20 @@ class Gscreenshot(object):
         try:
             # This has a timeout in case the notification
             # daemon is hanging - don't lock up gscreenshot too
-            subprocess.run([
-                'notify-send',
-                'gscreenshot',
-                _('a screenshot was taken from a script or terminal'),
-                '--icon',
-                'gscreenshot'
-            ], check=True, timeout=2)
+            subprocess.run(self._get_notification_params(), check=True, timeout=2)
             return True
         except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
             return False
 
+    def _get_notification_params(self) -> typing.List[str]:
+        return [
+            'notify-send',
+            'gscreenshot',
+            _('a screenshot was taken from a script or terminal'),
+            '--icon',
+            'gscreenshot'
+        ]
+
     def run_display_mismatch_warning(self):
         '''
         Send a notification if the screenshot was taken from a
@@ -151,11 +209,31 @@ class Gscreenshot(object):
 
     def save_cache(self):
         """Writes the cache to disk"""
-        try:
-            with open(self.get_cache_file(), "w", encoding="UTF-8") as cachefile:
-                json.dump(self.cache, cachefile)
-        except FileNotFoundError:
-            print(_("unable to save cache file"))
+        from gscreenshot.saving import write_atomic
+
+        # Locked until it's written, so an older copy can't replace a newer one
+        with self._cache_lock:
+            try:
+                write_atomic(self.get_cache_file(), json.dumps(self.cache).encode())
+            except FileNotFoundError:
+                print(_("unable to save cache file"))
+
+    def update_cache(self, **entries: typing.Any):
+        """
+        Sets entries in the cache and writes it to disk. Use this rather
+        than changing the cache directly, which a save on the background
+        thread could be writing out at the same time.
+        """
+        with self._cache_lock:
+            self.cache.update(entries)
+            self.save_cache()
+
+    def get_screenshooter_probe_cached(self) -> bool:
+        """
+        Whether the screenshooter was chosen using cached probe
+        results, without having to check any of the backends again
+        """
+        return self.probe_cache.hit
 
     def get_screenshooter_name(self) -> str:
         """Gets the name of the current screenshooter"""
@@ -166,34 +244,72 @@ class Gscreenshot(object):
         return self.screenshooter.__class__.__name__
 
     def screenshot_full_display(self, delay: int=0, capture_cursor: bool=False,
-                                cursor_name: str='theme') -> typing.Optional[Image.Image]:
+                                cursor_name: str='theme', output: typing.Optional[str]=None
+                                ) -> typing.Optional['Image.Image']:
         """
         Takes a screenshot of the full display with a
         given delay.
 
         Parameters:
             int delay: seconds to wait before taking screenshot
+            str|None output: name of a single output (monitor) to capture
 
         Returns:
             PIL.Image
         """
 
-        if not capture_cursor:
-            use_cursor = None
-        else:
-            use_cursor = self.get_available_cursors()[cursor_name]
+        use_cursor = self._get_cursor(capture_cursor, cursor_name)
+
+        def grab(screenshooter: 'Screenshooter', delay: int):
+            if output is not None:
+                screenshooter.grab_output_(
+                    output,
+                    delay,
+                    capture_cursor,
+                    use_cursor=use_cursor
+                )
+            else:
+                screenshooter.grab_fullscreen_(
+                    delay,
+                    capture_cursor,
+                    use_cursor=use_cursor
+                )
 
-        self.screenshooter.grab_fullscreen_(
+        if not self._capture(grab, delay):
+            # Another backend won't find an output that doesn't exist either
+            if output is None or output in [o.name for o in self.screenshooter.get_outputs()]:
+                self._fail_over(grab, capture_cursor, use_cursor)
+
+        self.run_display_mismatch_warning()
+        self.saved_last_image = False
+        return self.screenshooter.image
+
+    def screenshot_each_output(self, delay: int=0, capture_cursor: bool=False,
+                               cursor_name: str='theme'
+                               ) -> typing.Dict[str, typing.Optional['Image.Image']]:
+        """
+        Takes a screenshot of every output (monitor) as a separate
+        image with a given delay. This does not change the last image.
+
+        Parameters:
+            int delay: seconds to wait before taking screenshot
+
+        Returns:
+            {output name: PIL.Image or None}
+        """
+
+        use_cursor = self._get_cursor(capture_cursor, cursor_name)
+
+        images = self.screenshooter.grab_outputs_(
             delay,
             capture_cursor,
             use_cursor=use_cursor
         )
         self.run_display_mismatch_warning()
-        self.saved_last_image = False
-        return self.screenshooter.image
+        return images
 
     def screenshot_selected(self, delay: int=0, capture_cursor: bool=False,
-                            cursor_name: str='theme') -> typing.Optional[Image.Image]:
+                            cursor_name: str='theme') -> typing.Optional['Image.Image']:
         """
         Interactively takes a screenshot of a selected area
         with a given delay.
@@ -205,22 +321,24 @@ class Gscreenshot(object):
             PIL.Image
         """
 
-        if not capture_cursor:
-            use_cursor = None
-        else:
-            use_cursor = self.get_available_cursors()[cursor_name]
+        use_cursor = self._get_cursor(capture_cursor, cursor_name)
+
+        def grab(screenshooter: 'Screenshooter', delay: int):
+            screenshooter.grab_selection_(
+                delay,
+                capture_cursor,
+                use_cursor=use_cursor
+            )
+
+        if not self._capture(grab, delay, interactive=True):
+            self._fail_over(grab, capture_cursor, use_cursor, interactive=True)
 
-        self.screenshooter.grab_selection_(
-            delay,
-            capture_cursor,
-            use_cursor=use_cursor
-        )
         self.run_display_mismatch_warning()
         self.saved_last_image = False
         return self.screenshooter.image
 
     def screenshot_window(self, delay: int=0, capture_cursor: bool=False,
-                          cursor_name: str='theme') -> typing.Optional[Image.Image]:
+                          cursor_name: str='theme') -> typing.Optional['Image.Image']:
         """
         Interactively takes a screenshot of a selected window
         with a given delay.
@@ -232,21 +350,267 @@ class Gscreenshot(object):
             PIL.Image
         """
 
-        if not capture_cursor:
-            use_cursor = None
-        else:
-            use_cursor = self.get_available_cursors()[cursor_name]
+        use_cursor = self._get_cursor(capture_cursor, cursor_name)
+
+        def grab(screenshooter: 'Screenshooter', delay: int):
+            screenshooter.grab_window_(
+                delay,
+                capture_cursor,
+                use_cursor=use_cursor
+            )
+
+        if not self._capture(grab, delay, interactive=True):
+            self._fail_over(grab, capture_cursor, use_cursor, interactive=True)
 
-        self.screenshooter.grab_window_(
-            delay,
-            capture_cursor,
-            use_cursor=use_cursor
-        )
         self.run_display_mismatch_warning()
         self.saved_last_image = False
         return self.screenshooter.image
 
-    def get_last_image(self) -> typing.Optional[Image.Image]:
+    def set_destination_format(self, destination_format: typing.Optional[str]):
+        '''
+        Tells the screenshooter what format the next screenshots will be
+        saved in (see get_save_format), so if the utility can write that
+        format it can be saved without encoding it again.
+
+        Parameters:
+            str|None destination_format: e.g. 'png', None if not known
+        '''
+        self.destination_format = destination_format
+
+    def get_save_format(self, filename: typing.Optional[str]=None) -> str:
+        '''
+        Returns the format save_last_image would save the filename in.
+        It may not be a supported one.
+        '''
+        if filename is None:
+            return 'png'
+
+        file_ext = os.path.splitext(filename)[1][1:].lower()
+        if file_ext == "":
+            # A directory, the time-based filename is used
+            return 'png'
+
+        if file_ext == 'jpg':
+            return 'jpeg'
+
+        return file_ext
+
+    def explain_capture(self, target: str='fullscreen', capture_cursor: bool=False,
+                        cursor_name: str='theme', output: typing.Optional[str]=None) -> str:
+        '''
+        Describes how a screenshot would be taken with the current
+        backend, without taking it.
+
+        Parameters:
+            str target: 'fullscreen', 'region' (a selection), 'output' or 'window'
+            str output: the output's name, for 'output'
+
+        Returns:
+            str
+        '''
+        from gscreenshot.screenshooter.planner import CaptureRequest
+
+        lines = [_("backend: {0}").format(self.get_screenshooter_name())]
+        if target in ('region', 'window'):
+            selector = self.screenshooter.selector
+            lines.append(_("selection: {0}").format(
+                selector.__class__.__name__ if selector is not None
+                else _("none, the fallback is used")
+            ))
+
+        output_to_capture = None
+        if output is not None:
+            for candidate in self.screenshooter.get_outputs():
+                if candidate.name == output:
+                    output_to_capture = candidate
+
+            if output_to_capture is None:
+                lines.append(_("Output {0} was not found").format(output))
+                return "\n".join(lines)
+
+        use_cursor = self._get_cursor(capture_cursor, cursor_name)
+        request = CaptureRequest(
+            target,
+            output_to_capture.get_box() if output_to_capture is not None else None,
+            output_to_capture,
+            capture_cursor,
+            use_cursor,
+            destination_format=self.destination_format
+        )
+
+        lines.append(self.screenshooter.plan(request).explain())
+        return "\n".join(lines)
+
+    def cancel_screenshot(self):
+        '''
+        Cancels a screenshot being taken in another thread: its delay
+        ends early and the backend's or selector's process is killed.
+        It isn't retried with another backend and doesn't count
+        against the backend.
+        '''
+        self._cancelled.set()
+        self.screenshooter.cancel()
+
+    def set_hedging(self, percentile: typing.Optional[float]) -> bool:
+        '''
+        Turns hedged captures on or off. When on, a capture that takes
+        longer than the given percentile (0-100) of the backend's recent
+        captures is started with the next best backend as well, and
+        whichever finishes first is used.
+
+        Parameters:
+            float|None percentile: None turns hedging off
+
+        Returns:
+            bool: whether captures are hedged. There may not be a
+                  second backend to hedge with.
+        '''
+        from gscreenshot.screenshooter.hedged import HedgedScreenshooter
+
+        self.hedge_percentile = percentile
+
+        if isinstance(self.screenshooter, HedgedScreenshooter):
+            if percentile is None:
+                self.screenshooter = self.screenshooter.primary
+            return percentile is not None
+
+        if percentile is None or self.backend is None:
+            return False
+
+        alternatives = self._screenshooter_factory.create_alternatives(
+            [self.backend], self.screenshooter.selector
+        )
+        for backend, secondary in alternatives:
+            self.screenshooter = HedgedScreenshooter(
+                self.screenshooter, secondary, secondary_name=backend.name
+            )
+            return True
+
+        return False
+
+    def _capture(self, grab: typing.Callable[['Screenshooter', int], None],
+                 delay: int=0, interactive: bool=False) -> bool:
+        '''
+        Captures with the current screenshooter and records how it went.
+
+        Parameters:
+            grab: takes the screenshooter and the delay
+            bool interactive: the user picks what to capture, so
+                              how long it took says nothing about the backend
+
+        Returns:
+            bool success
+        '''
+        from gscreenshot.screenshooter.hedged import HedgedScreenshooter, DEFAULT_BUDGET
+
+        hedger = None
+        if isinstance(self.screenshooter, HedgedScreenshooter):
+            hedger = self.screenshooter
+            if self.backend is not None and self.hedge_percentile is not None:
+                budget = self.backend_stats.get_latency_percentile(
+                    self.backend.name, self.hedge_percentile
+                )
+                hedger.budget = budget if budget is not None else DEFAULT_BUDGET
+
+        self._cancelled.clear()
+        self.screenshooter.clear_cancel()
+        self.screenshooter.destination_format = self.destination_format
+        # Only a region selected for this capture is retried by _fail_over
+        self.screenshooter.last_region = None
+        start = time.monotonic()
+        grab(self.screenshooter, delay)
+        if self._cancelled.is_set():
+            return False
+
+        success = self.screenshooter.image is not None
+
+        if hedger is not None:
+            # Each backend is credited with its own result and time
+            for outcome in hedger.outcomes:
+                name = hedger.secondary_name
+                if outcome.screenshooter is hedger.primary and self.backend is not None:
+                    name = self.backend.name
+                if name is not None:
+                    self.backend_stats.record(name, outcome.success, outcome.latency)
+            self.update_cache(backend_stats=self.backend_stats.to_dict())
+        elif self.backend is not None:
+            latency = None
+            if not interactive:
+                try:
+                    latency = max(0.0, time.monotonic() - start - float(delay))
+                except (TypeError, ValueError):
+                    pass
+
+            self.backend_stats.record(self.backend.name, success, latency)
+            self.update_cache(backend_stats=self.backend_stats.to_dict())
+
+        return success
+
+    def _fail_over(self, grab: typing.Callable[['Screenshooter', int], None],
+                   capture_cursor: bool, use_cursor: typing.Optional['Image.Image'],
+                   interactive: bool=False) -> bool:
+        '''
+        Retries a failed capture with the other healthy backends in order
+        of preference. The first one that succeeds replaces the current
+        screenshooter. The delay has already passed so it isn't repeated,
+        and a region that was already selected isn't asked for again.
+
+        Returns:
+            bool success
+        '''
+        if self.backend is None or self._cancelled.is_set():
+            return False
+
+        region = self.screenshooter.last_region
+        if region is not None:
+            interactive = False
+
+            def grab_region(screenshooter: 'Screenshooter', delay: int):
+                screenshooter.grab_region_(region, delay, capture_cursor, use_cursor)
+
+            grab = grab_region
+
+        failed_screenshooter = self.screenshooter
+        failed_backend = self.backend
+
+        for backend, screenshooter in self._screenshooter_factory.create_alternatives(
+                [failed_backend], failed_screenshooter.selector):
+            if self._cancelled.is_set():
+                break
+
+            print(_("Capture with {0} failed, trying {1}").format(
+                self.backend.name, backend.name
+            ))
+            self.screenshooter = screenshooter
+            self.backend = backend
+            if self._capture(grab, 0, interactive):
+                return True
+
+        self.screenshooter = failed_screenshooter
+        self.backend = failed_backend
+        return False
+
+    def benchmark_backends(self, runs: int=3
+                           ) -> typing.List[typing.Tuple[str, typing.Optional[float], float]]:
+        '''
+        Times full screen captures with every backend that can run here,
+        replacing the statistics recorded for them so far. The ranking
+        is kept in the cache and used to choose the backend from then on.
+
+        Parameters:
+            int runs: captures per backend
+
+        Returns:
+            [(backend name, median seconds or None if every capture failed,
+              failure rate)], most preferred first
+        '''
+        from gscreenshot.benchmark import benchmark_backends
+
+        return benchmark_backends(
+            self, self._screenshooter_factory.registry.get_screenshooters(), runs
+        )
+
+    def get_last_image(self) -> typing.Optional['Image.Image']:
         """
         Returns the last screenshot taken
 
@@ -255,6 +619,13 @@ class Gscreenshot(object):
         """
         return self.screenshooter.image
 
+    def get_last_capture(self) -> typing.Optional['Capture']:
+        """
+        Returns the last capture taken, with the screen area it covers,
+        the utility that took it and how long it took
+        """
+        return self.screenshooter.last_capture
+
     def get_supported_formats(self) -> typing.List[str]:
         """
         Returns the image formats supported for saving to
@@ -270,46 +641,54 @@ class Gscreenshot(object):
         return supported_formats
 
     def get_thumbnail(self, width: int, height: int,
-                      image: typing.Optional[Image.Image]=None
-                      ) -> typing.Optional[Image.Image]:
+                      image: typing.Optional['Image.Image']=None,
+                      fast: bool=False) -> typing.Optional['Image.Image']:
         """
-        Gets a thumbnail of either the current image, or a passed one
+        Gets a thumbnail of either the current image, or a passed one.
+        The current image's is scaled from a reduced copy made once
+        per capture, so getting one for every resize stays cheap.
+        An image that already fits isn't copied: don't change the result.
 
         Params:
             width: int
             height: int
             image: Image|None
+            fast: bool, a quick low quality thumbnail
 
         Returns:
             Image
         """
-        thumbnail = None
+        from gscreenshot.preview import PreviewPyramid
 
-        if image is None and self.screenshooter.image is not None:
-            thumbnail = self.screenshooter.image.copy()
-        elif image is not None:
-            thumbnail = image.copy()
+        if image is not None:
+            return PreviewPyramid(image).get_thumbnail(width, height, fast)
 
-        if thumbnail is not None:
-            antialias_algo = None
-            try:
-                antialias_algo = Image.Resampling.LANCZOS
-            except AttributeError: # PIL < 9.0
-                antialias_algo = Image.ANTIALIAS
+        capture = self.screenshooter.last_capture
+        if capture is None or capture.image is None:
+            return self.get_app_icon()
 
-            thumbnail.thumbnail((width, height), antialias_algo)
-            return thumbnail
+        if self._preview is None or self._preview[0] is not capture:
+            # Replacing the last capture's frees its copies
+            self._preview = (capture, PreviewPyramid(capture.image))
 
-        return self.get_app_icon()
+        return self._preview[1].get_thumbnail(width, height, fast)
 
-    def get_time_filename(self) -> str:
+    def get_time_filename(self, milliseconds: bool=False) -> str:
         """
         Generates a returns a filename based on the current time
 
+        Parameters:
+            bool milliseconds: include milliseconds, for names that
+                               stay unique when taking several per second
+
         Returns:
             str
         """
         now = datetime.now()
+        if milliseconds:
+            return datetime.strftime(now, "gscreenshot_%Y-%m-%d-%H%M%S") + \
+                f"{now.microsecond // 1000:03d}.png"
+
         return datetime.strftime(now, "gscreenshot_%Y-%m-%d-%H%M%S.png")
 
     def save_and_return_path(self) -> typing.Optional[str]:
@@ -345,68 +724,137 @@ class Gscreenshot(object):
             bool success
         """
 
-        if filename is None:
-            filename = self.get_time_filename()
+        # The capture, not the screenshooter, so a capture
+        # finishing meanwhile can't mix two screenshots
+        return self._save_capture(self.screenshooter.last_capture, filename)
+
+    def save_last_image_in_background(self, filename: typing.Optional[str]=None,
+                                      on_done: typing.Optional[typing.Callable]=None,
+                                      dispatch: typing.Optional[typing.Callable]=None
+                                      ) -> 'Future':
+        """
+        Saves the last screenshot like save_last_image, on a background
+        thread, and calls on_done with whether it was saved (through
+        dispatch, e.g. GLib.idle_add, if it's given). Screenshots taken
+        in the meantime aren't what's saved.
+        """
+        from gscreenshot.saving import get_background_saver
 
-        if self.screenshooter.image is None:
+        capture = self.screenshooter.last_capture
+        return get_background_saver().submit(
+            lambda: self._save_capture(capture, filename), on_done, dispatch
+        )
+
+    def _save_capture(self, capture: typing.Optional['Capture'],
+                      filename: typing.Optional[str]) -> bool:
+        if capture is None or capture.image is None:
             return False
 
-        image = self.screenshooter.image
-        actual_file_ext = os.path.splitext(filename)[1][1:].lower()
+        try:
+            saved_filename = self._save_image(
+                capture.image, filename, self._get_encodings(capture)
+            )
+        except IOError:
+            self.saved_last_image = False
+            return False
 
-        if actual_file_ext == "":
-            # If we don't have any file extension, assume
-            # we were given a directory; create the tree
-            # if it doesn't exist, then store the screenshot
-            # there with a time-based filename.
-            try:
-                os.makedirs(filename)
-            except (IOError, OSError):
-                # Likely the directory already exists, so
-                # we'll throw the exception away.
-                # If we fail to save, we'll return a status
-                # saying so, so we'll be okay.
-                pass
-
-            filename = os.path.join(
-                    filename,
-                    self.get_time_filename()
-                    )
-            actual_file_ext = 'png'
-
-        if actual_file_ext == 'jpg':
-            actual_file_ext = 'jpeg'
+        if saved_filename is None:
+            return False
 
-        supported_formats = self.get_supported_formats()
+        self.saved_last_image = True
+        self.last_save_file = saved_filename
+        return True
 
-        if actual_file_ext in supported_formats:
-            self.cache["last_save_dir"] = os.path.dirname(filename)
-            self.save_cache()
-            try:
-                # add exif data. This is sketchy but we don't need to
-                # dynamically generate it, just find and replace.
-                # This avoids needing an external library for such a simple
-                # thing.
-                exif_data = self.EXIF_TEMPLATE.replace(
-                    '[[VERSION]]'.encode(),
-                    self.get_program_version(True).encode()
-                )
-                exif_data = exif_data.replace(
-                    '[[CREATE_DATE]]'.encode(),
-                    datetime.now().strftime("%Y:%m:%d %H:%M:%S").encode()
-                )
+    def save_image(self, image: 'Image.Image', filename: typing.Optional[str]= None) -> bool:
+        """
+        Saves an image other than the last screenshot, such as one of
+        the images from screenshot_each_output. Filenames are handled
+        the same way as with save_last_image.
 
-                image.save(filename, actual_file_ext.upper(), exif=exif_data)
+        Parameters:
+            PIL.Image image
+            str filename
 
-                self.saved_last_image = True
-                self.last_save_file = filename
-                return True
-            except IOError:
-                self.saved_last_image = False
-                return False
-        else:
+        Returns:
+            bool success
+        """
+        try:
+            return self._save_image(image, filename) is not None
+        except IOError:
             return False
 
+    def _save_image(self, image: 'Image.Image', filename: typing.Optional[str]= None,
+                    encodings: typing.Optional['EncodedCache']=None
+                    ) -> typing.Optional[str]:
+        """
+        Saves an image with the encoder preset, returning the path it was
+        saved to or None if the file extension isn't supported. Raises
+        IOError if writing fails. The file is replaced all at once.
+
+        The image's capture, if it's given its encodings, is written from
+        those, so it's encoded once however many times it's saved.
+        """
+        from gscreenshot.encoding import EncodedCache
+        from gscreenshot.saving import get_save_path, write_atomic
+        from gscreenshot.screenshooter.capture import Capture
+
+        if filename is None:
+            filename = self.get_time_filename()
+
+        actual_file_ext = self.get_save_format(filename)
+        filename = get_save_path(filename, self.get_time_filename())
+
+        supported_formats = self.get_supported_formats()
+
+        if actual_file_ext not in supported_formats:
+            return None
+
+        self.update_cache(last_save_dir=os.path.dirname(filename))
+
+        if encodings is None:
+            encodings = EncodedCache(Capture(image), self.get_exif_data())
+
+        write_atomic(filename, encodings.get_preset(actual_file_ext, self.get_encoder_preset()))
+        return filename
+
+    def get_encoder_preset(self) -> str:
+        """Returns the encoder preset screenshots are saved with, see saving.PRESETS"""
+        from gscreenshot.saving import DEFAULT_PRESET, PRESETS
+
+        preset = self.cache.get("encoder_preset", DEFAULT_PRESET)
+        return preset if preset in PRESETS else DEFAULT_PRESET
+
+    def set_encoder_preset(self, preset: str):
+        """
+        Sets the encoder preset screenshots are saved with, which is
+        remembered for next time. Raises KeyError for an unknown one.
+        """
+        from gscreenshot.saving import PRESETS
+
+        if preset not in PRESETS:
+            raise KeyError(preset)
+
+        self.update_cache(encoder_preset=preset)
+
+    def get_exif_data(self) -> bytes:
+        """
+        Returns the EXIF blob gscreenshot adds to saved images
+        """
+        # This is sketchy but we don't need to
+        # dynamically generate it, just find and replace.
+        # This avoids needing an external library for such a simple
+        # thing.
+        exif_data = self.EXIF_TEMPLATE.replace(
+            '[[VERSION]]'.encode(),
+            self.get_program_version(True).encode()
+        )
+        exif_data = exif_data.replace(
+            '[[CREATE_DATE]]'.encode(),
+            datetime.now().strftime("%Y:%m:%d %H:%M:%S").encode()
+        )
+
+        return exif_data
+
     def open_last_screenshot(self) -> bool:
         """
         Calls xdg to open the screenshot in its default application
@@ -433,12 +881,33 @@ class Gscreenshot(object):
         Returns:
             bool success
         """
-        image = self.screenshooter.image
+        png_data = self._get_clipboard_data()
 
-        if image is None:
+        if png_data is None:
             return False
 
-        params = [
+        try:
+            with subprocess.Popen(
+                self._get_clipboard_params(),
+                close_fds=True,
+                stdin=subprocess.PIPE,
+                stdout=None,
+                stderr=None) as xclip:
+
+                xclip.communicate(input=png_data)
+                return True
+        except (OSError, subprocess.CalledProcessError):
+            return False
+
+    def _get_clipboard_params(self) -> typing.List[str]:
+        if session_is_wayland():
+            return [
+                    'wl-copy',
+                    '-t',
+                    'image/png'
+                ]
+
+        return [
             'xclip',
             '-selection',
             'clipboard',
@@ -446,28 +915,23 @@ class Gscreenshot(object):
             'image/png'
             ]
 
-        if session_is_wayland():
-            params = [
-                    'wl-copy',
-                    '-t',
-                    'image/png'
-                ]
+    def _get_clipboard_data(self) -> typing.Optional[bytes]:
+        '''Returns the last screenshot as PNG, or None if there isn't one'''
+        capture = self.screenshooter.last_capture
+        if capture is None or capture.image is None:
+            return None
 
-        with io.BytesIO() as png_data:
-            image.save(png_data, "PNG")
+        # The same bytes a PNG of it is saved as
+        return self._get_encodings(capture).get_any('png', self.get_encoder_preset())
 
-            try:
-                with subprocess.Popen(
-                    params,
-                    close_fds=True,
-                    stdin=subprocess.PIPE,
-                    stdout=None,
-                    stderr=None) as xclip:
-
-                    xclip.communicate(input=png_data.getvalue())
-                    return True
-            except (OSError, subprocess.CalledProcessError):
-                return False
+    def _get_encodings(self, capture: 'Capture') -> 'EncodedCache':
+        '''Returns what a capture has been encoded to, kept until the next one'''
+        from gscreenshot.encoding import EncodedCache
+
+        if self._encodings is None or self._encodings.capture is not capture:
+            self._encodings = EncodedCache(capture, self.get_exif_data())
+
+        return self._encodings
 
     def get_last_save_directory(self) -> str:
         """Returns the path of the last save directory"""
@@ -488,10 +952,12 @@ class Gscreenshot(object):
 
         return authors
 
-    def get_app_icon(self) -> Image.Image:
+    def get_app_icon(self) -> 'Image.Image':
         """Returns the application icon"""
+        from PIL import Image
+
         return Image.open(
-                resource_filename('gscreenshot.resources.pixmaps', 'gscreenshot.png')
+                get_resource_path('gscreenshot.resources.pixmaps', 'gscreenshot.png')
                 )
 
     def get_program_description(self) -> str:
@@ -508,7 +974,7 @@ class Gscreenshot(object):
 
     def get_program_license_text(self) -> str:
         """Returns the license text"""
-        return resource_string('gscreenshot.resources', 'LICENSE').decode('UTF-8')
+        return get_resource_string('gscreenshot.resources', 'LICENSE').decode('UTF-8')
 
     def get_program_license(self) -> str:
         """Returns the license name"""
@@ -517,9 +983,9 @@ class Gscreenshot(object):
     def get_program_version(self, padded: bool=False) -> str:
         """Returns the program version"""
         if not padded:
-            return require("gscreenshot")[0].version
+            return get_program_version()
         else:
-            version = require("gscreenshot")[0].version.split(".")
+            version = get_program_version().split(".")
             padded_version = [v.rjust(2, "0") for v in version]
             return ".".join(padded_version)
 
@@ -0,0 +1,256 @@
+'''
+An asyncio wrapper around gscreenshot.
+
+AsyncGscreenshot runs a Gscreenshot's blocking calls (the captures, and
+saving and encoding for the clipboard) on a single worker thread with
+run_in_executor, so awaiting them doesn't block the event loop. The
+capture utilities still run as ordinary subprocesses on that thread.
+Only the delay, the region and window selection, and the notification,
+xdg-open and clipboard helpers are done with asyncio itself.
+
+Gscreenshot itself is unchanged and doesn't use this module. Captures
+share its screenshooter, so they aren't concurrent: they run one at a
+time, and a capture asked for while another is running waits for it.
+
+    async def main():
+        gscreenshot = AsyncGscreenshot()
+        await gscreenshot.screenshot_selected(delay=2)
+        await gscreenshot.copy_last_screenshot_to_clipboard()
+'''
+import asyncio
+import concurrent.futures
+import typing
+
+from gscreenshot import Gscreenshot
+from gscreenshot.selector import RegionSelector, SelectionCancelled, SelectionExecError
+from gscreenshot.selector import SelectionParseError
+
+if typing.TYPE_CHECKING:
+    from PIL import Image
+    from gscreenshot.screenshooter import Screenshooter
+
+# Seconds to wait for post-capture helpers, as the synchronous
+# notification does
+HELPER_TIMEOUT = 2
+
+
+class _SelectedRegion(RegionSelector):
+    '''
+    Hands a selection that was already made (or the error
+    making it raised) to the screenshooter
+    '''
+
+    def __init__(self, selector: RegionSelector,
+                 region: typing.Optional[typing.Tuple[int, int, int, int]],
+                 error: typing.Optional[BaseException]):
+        RegionSelector.__init__(self)
+        self._selector = selector
+        self._region = region
+        self._error = error
+
+    def get_capabilities(self) -> typing.List[str]:
+        return self._selector.get_capabilities()
+
+    def region_select(self) -> typing.Tuple[int, int, int, int]:
+        if self._error is not None:
+            # Not with the traceback from the event loop's thread
+            raise self._error.with_traceback(None)
+
+        assert self._region is not None
+        return self._region
+
+    def window_select(self) -> typing.Tuple[int, int, int, int]:
+        return self.region_select()
+
+
+class AsyncGscreenshot(object):
+    '''
+    Runs a Gscreenshot's blocking calls on a worker thread for an event loop
+    '''
+
+    __slots__ = ('gscreenshot', '_capture_lock', '_executor')
+
+    gscreenshot: Gscreenshot
+
+    def __init__(self, gscreenshot: typing.Optional[Gscreenshot]=None):
+        '''
+        Parameters:
+            Gscreenshot gscreenshot: the instance to drive, a new one if None
+        '''
+        self.gscreenshot = gscreenshot if gscreenshot is not None else Gscreenshot()
+        self._capture_lock: typing.Optional[asyncio.Lock] = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='gscreenshot-capture'
+        )
+
+    async def screenshot_full_display(self, delay: float=0, capture_cursor: bool=False,
+                                      cursor_name: str='theme',
+                                      output: typing.Optional[str]=None
+                                      ) -> typing.Optional['Image.Image']:
+        '''
+        Takes a screenshot of the full display, or of one output.
+        See Gscreenshot.screenshot_full_display.
+        '''
+        await asyncio.sleep(float(delay))
+        return await self._run_capture(
+            self.gscreenshot.screenshot_full_display, 0, capture_cursor, cursor_name, output
+        )
+
+    async def screenshot_selected(self, delay: float=0, capture_cursor: bool=False,
+                                  cursor_name: str='theme') -> typing.Optional['Image.Image']:
+        '''
+        Takes a screenshot of a selected area. The selection runs on
+        the event loop and the delay starts once it's made.
+        See Gscreenshot.screenshot_selected.
+        '''
+        return await self._screenshot_interactive(
+            self.gscreenshot.screenshot_selected, False, delay, capture_cursor, cursor_name
+        )
+
+    async def screenshot_window(self, delay: float=0, capture_cursor: bool=False,
+                                cursor_name: str='theme') -> typing.Optional['Image.Image']:
+        '''
+        Takes a screenshot of a selected window.
+        See Gscreenshot.screenshot_window.
+        '''
+        return await self._screenshot_interactive(
+            self.gscreenshot.screenshot_window, True, delay, capture_cursor, cursor_name
+        )
+
+    async def save_last_image(self, filename: typing.Optional[str]=None) -> bool:
+        '''
+        Saves the last screenshot without blocking the event loop.
+        See Gscreenshot.save_last_image.
+        '''
+        return await self._run_capture(self.gscreenshot.save_last_image, filename)
+
+    async def show_screenshot_notification(self) -> bool:
+        '''Shows a notification that a screenshot was taken'''
+        # pylint: disable=protected-access
+        return await self._run_helper(self.gscreenshot._get_notification_params())
+
+    async def open_last_screenshot(self) -> bool:
+        '''Opens the last screenshot in its default application'''
+        screenshot_fname = await self._run_capture(self.gscreenshot.save_and_return_path)
+        if screenshot_fname is None:
+            return False
+
+        return await self._run_helper(['xdg-open', screenshot_fname], timeout=None)
+
+    async def copy_last_screenshot_to_clipboard(self) -> bool:
+        '''Copies the last screenshot to the clipboard with xclip or wl-copy'''
+        # pylint: disable=protected-access
+        png_data = await self._run_capture(self.gscreenshot._get_clipboard_data)
+        if png_data is None:
+            return False
+
+        return await self._run_helper(
+            self.gscreenshot._get_clipboard_params(), png_data, timeout=None
+        )
+
+    def get_last_image(self) -> typing.Optional['Image.Image']:
+        '''Returns the last screenshot taken'''
+        return self.gscreenshot.get_last_image()
+
+    def close(self):
+        '''Stops the capture thread once the capture it's running is done'''
+        self._executor.shutdown(wait=False)
+
+    async def _screenshot_interactive(self, screenshot: typing.Callable[..., typing.Any],
+                                      window: bool, delay: float, capture_cursor: bool,
+                                      cursor_name: str) -> typing.Optional['Image.Image']:
+        # pylint: disable=too-many-arguments
+        selector = self.gscreenshot.screenshooter.selector
+        if selector is None:
+            # The utility selects by itself, on the capture thread
+            return await self._run_capture(screenshot, delay, capture_cursor, cursor_name)
+
+        region = None
+        error: typing.Optional[BaseException] = None
+        try:
+            if window:
+                region = await selector.window_select_async()
+            else:
+                region = await selector.region_select_async()
+        except (OSError, SelectionCancelled, SelectionExecError, SelectionParseError
+                ) as selection_error:
+            # The screenshooter falls back the same way it would have
+            error = selection_error
+
+        await asyncio.sleep(float(delay))
+
+        selected = _SelectedRegion(selector, region, error)
+
+        def capture():
+            screenshooter = self.gscreenshot.screenshooter
+            self._set_selector(screenshooter, selector, selected)
+            try:
+                return screenshot(0, capture_cursor, cursor_name)
+            finally:
+                # A backend failed over to was given the selector too
+                self._set_selector(screenshooter, selected, selector)
+                self._set_selector(self.gscreenshot.screenshooter, selected, selector)
+
+        return await self._run_capture(capture)
+
+    @staticmethod
+    def _set_selector(screenshooter: 'Screenshooter', old: RegionSelector,
+                      new: RegionSelector):
+        '''Replaces the selector on the screenshooter and any it wraps'''
+        #pylint: disable=import-outside-toplevel
+        from gscreenshot.screenshooter.hedged import HedgedScreenshooter
+
+        screenshooters = [screenshooter]
+        if isinstance(screenshooter, HedgedScreenshooter):
+            screenshooters += [screenshooter.primary, screenshooter.secondary]
+
+        for wrapped in screenshooters:
+            if wrapped.selector is old:
+                wrapped.selector = new
+
+    async def _run_capture(self, function: typing.Callable[..., typing.Any],
+                           *args: typing.Any) -> typing.Any:
+        '''
+        Runs the function on the capture thread, after any capture
+        already running. Cancelling stops the utility if it's running.
+        '''
+        if self._capture_lock is None:
+            self._capture_lock = asyncio.Lock()
+
+        async with self._capture_lock:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, function, *args
+            )
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                self.gscreenshot.screenshooter.cancel()
+                # Don't let the next capture start while this one unwinds
+                await asyncio.wait([future])
+                raise
+
+    @staticmethod
+    async def _run_helper(params: typing.List[str], data: typing.Optional[bytes]=None,
+                          timeout: typing.Optional[float]=HELPER_TIMEOUT) -> bool:
+        '''
+        Runs a helper command as an asyncio subprocess, passing
+        it the data on its standard input if there is any
+        '''
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *params,
+                stdin=asyncio.subprocess.PIPE if data is not None else None
+            )
+        except OSError:
+            return False
+
+        try:
+            await asyncio.wait_for(process.communicate(data), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+            process.kill()
+            await process.wait()
+            if isinstance(error, asyncio.CancelledError):
+                raise
+            return False
+
+        return process.returncode == 0
@@ -0,0 +1,144 @@
+'''
+Keeps track of how quickly and how reliably each screenshot backend
+captures on this machine, so the fastest healthy one can be preferred
+and one that keeps failing can be skipped.
+
+Latency and failure rate are exponentially weighted moving averages, so
+a backend that starts failing (or recovers, or gets faster after an
+upgrade) is noticed within a few captures.
+'''
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    from gscreenshot.registry import BackendInfo
+
+# Weight given to the newest sample
+SMOOTHING = 0.3
+
+# A backend whose failure rate reaches this, over at least
+# MIN_SAMPLES captures, is skipped
+UNHEALTHY_FAILURE_RATE = 0.5
+MIN_SAMPLES = 2
+
+# Recent latencies kept per backend, for percentiles
+MAX_LATENCY_SAMPLES = 20
+
+
+class BackendStats(object):
+    '''
+    Capture latency and failure rate per backend name
+    '''
+
+    __slots__ = ('_entries', '_lock', 'changed')
+
+    _entries: typing.Dict[str, dict]
+
+    def __init__(self, entries: typing.Optional[typing.Dict[str, dict]]=None):
+        '''
+        Parameters:
+            dict entries: as returned by to_dict(), usually
+                          from the gscreenshot cache file
+        '''
+        self._entries = {}
+        if isinstance(entries, dict):
+            self._entries = {
+                name: dict(entry) for name, entry in entries.items()
+                if isinstance(entry, dict)
+            }
+        self.changed = False
+        self._lock = threading.Lock()
+
+    def record(self, name: str, success: bool, latency: typing.Optional[float]=None):
+        '''
+        Records the outcome of a capture.
+
+        Parameters:
+            str name: the backend's name
+            bool success: whether an image was captured
+            float latency: seconds the capture took, if it's meaningful
+                           (it isn't when the user was selecting a region)
+        '''
+        failure = 0.0 if success else 1.0
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = {'captures': 0, 'failure_rate': failure, 'latency': None}
+                self._entries[name] = entry
+
+            entry['captures'] += 1
+            entry['failure_rate'] = self._smooth(entry['failure_rate'], failure)
+            if success and latency is not None:
+                entry['latency'] = self._smooth(entry['latency'], latency)
+                samples = entry.get('samples', [])[-(MAX_LATENCY_SAMPLES - 1):]
+                entry['samples'] = samples + [latency]
+
+            self.changed = True
+
+    def reset(self, name: str):
+        '''Forgets everything recorded for a backend'''
+        with self._lock:
+            if self._entries.pop(name, None) is not None:
+                self.changed = True
+
+    def get_latency(self, name: str) -> typing.Optional[float]:
+        '''Returns the backend's average capture latency in seconds, if known'''
+        with self._lock:
+            return self._entries.get(name, {}).get('latency')
+
+    def get_latency_percentile(self, name: str, percentile: float) -> typing.Optional[float]:
+        '''
+        Returns the given percentile (0-100) of the backend's recent
+        capture latencies in seconds, if any were recorded
+        '''
+        with self._lock:
+            samples = sorted(self._entries.get(name, {}).get('samples', []))
+
+        if not samples:
+            return None
+
+        index = round(min(max(percentile, 0), 100) / 100 * (len(samples) - 1))
+        return samples[index]
+
+    def get_failure_rate(self, name: str) -> float:
+        '''Returns the backend's recent failure rate, from 0 to 1'''
+        with self._lock:
+            return self._entries.get(name, {}).get('failure_rate', 0.0)
+
+    def is_healthy(self, name: str) -> bool:
+        '''Whether the backend hasn't been failing lately'''
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry['captures'] < MIN_SAMPLES:
+                return True
+
+            return entry['failure_rate'] < UNHEALTHY_FAILURE_RATE
+
+    def rank(self, backends: typing.List['BackendInfo']) -> typing.List['BackendInfo']:
+        '''
+        Orders backends by preference: healthy ones first, then by
+        measured latency. Backends without a measurement keep their
+        priority order after the measured ones.
+        '''
+        def key(backend: 'BackendInfo') -> typing.Tuple[bool, bool, float]:
+            latency = self.get_latency(backend.name)
+            return (
+                not self.is_healthy(backend.name),
+                latency is None,
+                latency if latency is not None else 0.0
+            )
+
+        return sorted(backends, key=key)
+
+    def to_dict(self) -> typing.Dict[str, dict]:
+        '''Returns the entries in a form that can be stored as JSON'''
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._entries.items()}
+
+    @staticmethod
+    def _smooth(average: typing.Optional[float], sample: float) -> float:
+        if average is None:
+            return sample
+
+        return SMOOTHING * sample + (1 - SMOOTHING) * average
@@ -0,0 +1,58 @@
+'''
+Timing every screenshot backend that can run here, for
+gscreenshot-cli --benchmark-backends
+'''
+import statistics
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    from gscreenshot import Gscreenshot
+    from gscreenshot.registry import BackendInfo
+
+
+def benchmark_backends(app: 'Gscreenshot', backends: typing.List['BackendInfo'], runs: int
+                       ) -> typing.List[typing.Tuple[str, typing.Optional[float], float]]:
+    '''
+    Times full screen captures with each of the backends that can run,
+    see Gscreenshot.benchmark_backends
+    '''
+    results = []
+    for backend in app.backend_stats.rank(backends):
+        if not app.probe_cache.can_run(backend):
+            continue
+
+        screenshooter = backend.load()(app.screenshooter.selector)
+        app.backend_stats.reset(backend.name)
+        latencies = []
+        failures = 0
+
+        for _run in range(runs):
+            start = time.monotonic()
+            screenshooter.grab_fullscreen_()
+            latency = time.monotonic() - start
+
+            if screenshooter.image is None:
+                failures += 1
+                app.backend_stats.record(backend.name, False)
+            else:
+                latencies.append(latency)
+                app.backend_stats.record(backend.name, True, latency)
+
+        results.append((
+            backend,
+            statistics.median(latencies) if latencies else None,
+            failures / runs
+        ))
+
+    app.update_cache(
+        backend_stats=app.backend_stats.to_dict(), probes=app.probe_cache.to_dict()
+    )
+
+    ranked = app.backend_stats.rank([backend for backend, _latency, _rate in results])
+    return [
+        (backend.name, latency, failure_rate)
+        for backend, latency, failure_rate in sorted(
+            results, key=lambda result: ranked.index(result[0])
+        )
+    ]
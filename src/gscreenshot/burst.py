@@ -0,0 +1,193 @@
+'''
+Burst capture: a numbered sequence of screenshots taken at an interval.
+
+Capturing, encoding and writing run as separate stages connected by
+bounded queues, so that capturing frame N+1 doesn't wait on encoding
+frame N. If the encoder falls far enough behind that its queue is
+full, the new frame is dropped rather than delaying the capture
+schedule.
+'''
+import io
+import os
+import queue
+import threading
+import time
+import typing
+
+from gscreenshot.saving import get_encoder_options, write_atomic
+from gscreenshot.util import load_pil_plugin
+
+if typing.TYPE_CHECKING:
+    from gscreenshot import Gscreenshot
+
+
+class BurstStats(object):
+    '''
+    Outcome of a burst capture
+    '''
+
+    __slots__ = ('captured', 'dropped', 'failed', 'written', 'errors', 'elapsed')
+
+    def __init__(self):
+        # Each counter is only updated from one stage's thread
+        self.captured = 0
+        self.dropped = 0
+        self.failed = 0
+        self.written = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    @property
+    def fps(self) -> float:
+        '''Frames captured per second'''
+        if self.elapsed <= 0:
+            return 0.0
+
+        return self.captured / self.elapsed
+
+    def __repr__(self) -> str:
+        return (f'BurstStats(captured={self.captured}, dropped={self.dropped}, '
+                f'failed={self.failed}, written={self.written}, errors={self.errors}, '
+                f'elapsed={self.elapsed:.3f})')
+
+
+class Burst(object):
+    '''
+    Takes a sequence of full screen screenshots
+    '''
+
+    __slots__ = ('_app', '_count', '_interval', '_filename', '_capture_cursor',
+                 '_queue_size', '_stats')
+
+    _STOP = None
+
+    def __init__(self, app: 'Gscreenshot', count: int, interval_ms: int=0,
+                 filename: typing.Optional[str]=None, capture_cursor: bool=False, *,
+                 queue_size: int=4):
+        # pylint: disable=too-many-arguments
+        '''
+        Parameters:
+            Gscreenshot app
+            int count: number of screenshots to take
+            int interval_ms: time between the start of each capture
+            str|None filename: a file (which gets a sequence number added),
+                               a directory, or None for the current directory
+            bool capture_cursor
+            int queue_size: frames that can wait for each stage
+        '''
+        self._app = app
+        self._count = count
+        self._interval = interval_ms / 1000
+        self._filename = filename
+        self._capture_cursor = capture_cursor
+        self._queue_size = queue_size
+        self._stats = BurstStats()
+
+    def get_filename(self, index: int) -> str:
+        '''
+        Returns the filename for the frame at index
+        '''
+        filename = self._filename
+        if filename is None or os.path.splitext(filename)[1] == "":
+            filename = os.path.join(
+                filename or "",
+                self._app.get_time_filename(milliseconds=True)
+            )
+
+        base, ext = os.path.splitext(filename)
+        return f"{base}_{index + 1:04d}{ext}"
+
+    def run(self) -> BurstStats:
+        '''
+        Takes the screenshots and waits for all of them to be written.
+        Raises ValueError if the filename's format can't be saved to.
+        '''
+        save_format = self._app.get_save_format(self.get_filename(0))
+        if save_format not in self._app.get_supported_formats():
+            raise ValueError(f"Can't save screenshots as {save_format}")
+
+        directory = os.path.dirname(self.get_filename(0))
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+
+        encode_queue: queue.Queue = queue.Queue(maxsize=self._queue_size)
+        write_queue: queue.Queue = queue.Queue(maxsize=self._queue_size)
+
+        encoder = threading.Thread(target=self._encode, args=(encode_queue, write_queue))
+        writer = threading.Thread(target=self._write, args=(write_queue,))
+        encoder.daemon = True
+        writer.daemon = True
+        encoder.start()
+        writer.start()
+
+        screenshooter = self._app.screenshooter
+        start = time.monotonic()
+
+        for index in range(self._count):
+            delay = start + (index * self._interval) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            screenshooter.grab_fullscreen_(0, self._capture_cursor, use_cursor=None)
+            image = screenshooter.image
+            if image is None:
+                self._stats.failed += 1
+                continue
+
+            self._stats.captured += 1
+            try:
+                encode_queue.put_nowait((self.get_filename(index), image))
+            except queue.Full:
+                self._stats.dropped += 1
+
+        self._stats.elapsed = time.monotonic() - start
+
+        encode_queue.put(self._STOP)
+        encoder.join()
+        writer.join()
+
+        return self._stats
+
+    def _encode(self, encode_queue: queue.Queue, write_queue: queue.Queue):
+        '''Encoder stage'''
+        exif_data = self._app.get_exif_data()
+        preset = self._app.get_encoder_preset()
+
+        while True:
+            item = encode_queue.get()
+            if item is self._STOP:
+                write_queue.put(self._STOP)
+                return
+
+            filename, image = item
+            file_format = os.path.splitext(filename)[1][1:].upper()
+            if file_format == 'JPG':
+                file_format = 'JPEG'
+            load_pil_plugin(file_format)
+
+            with io.BytesIO() as encoded:
+                try:
+                    image.save(encoded, file_format, exif=exif_data,
+                               **get_encoder_options(preset, file_format))
+                    write_queue.put((filename, encoded.getvalue()))
+                except (IOError, KeyError, ValueError):
+                    # Counted by the writer so each counter has one owner
+                    write_queue.put((filename, None))
+
+    def _write(self, write_queue: queue.Queue):
+        '''Writer stage'''
+        while True:
+            item = write_queue.get()
+            if item is self._STOP:
+                return
+
+            filename, data = item
+            if data is None:
+                self._stats.errors += 1
+                continue
+
+            try:
+                write_atomic(filename, data)
+                self._stats.written += 1
+            except (IOError, OSError):
+                self._stats.errors += 1
@@ -0,0 +1,237 @@
+'''
+The cursor images gscreenshot can stamp onto screenshots
+'''
+import array
+import collections
+import sys
+import threading
+import typing
+
+from PIL import Image
+
+from gscreenshot.util import get_resampling, get_resource_path
+
+from gscreenshot.xconnection import X_ERRORS, XConnection, get_x_connection
+
+try:
+    from Xlib.ext import xfixes
+except ImportError:
+    xfixes = None
+
+# The alternate cursors gscreenshot ships, in the order they're offered
+CURSOR_NAMES = ('adwaita', 'prohibit', 'allow')
+DEFAULT_CURSOR = 'adwaita'
+# The cursor that's showing when the screenshot is taken, read with XFixes
+LIVE_CURSOR = 'xfixes'
+
+# How many different cursor images XFixesCursor keeps
+XFIXES_CACHE_SIZE = 8
+# Where a cursor image read with XFixes keeps its serial
+_SERIAL_INFO = 'xfixes_serial'
+
+
+class XFixesCursor(object):
+    '''
+    The cursor an X display is showing, read in-process with XFixes.
+
+    Converted cursor images are kept by their XFixes serial, and the
+    display reports when the cursor changes. While it stays the same,
+    only the pointer position is read. Bursts and recordings don't
+    fetch the same image for every frame.
+    '''
+
+    __slots__ = ('_connection', '_serial', '_sprites', '_supported', '_subscribed', '_lock')
+
+    _serial: typing.Optional[int]
+    _sprites: typing.OrderedDict[int, typing.Tuple[Image.Image, typing.Tuple[int, int]]]
+    # Whether the display has XFixes, None until it's connected to
+    _supported: typing.Optional[bool]
+
+    def __init__(self, connection: typing.Optional[XConnection]=None):
+        '''
+        Parameters:
+            XConnection connection: the shared one if None
+        '''
+        self._connection = connection if connection is not None else get_x_connection()
+        self._serial = None
+        self._sprites = collections.OrderedDict()
+        self._supported = None
+        self._subscribed = False
+        self._lock = threading.Lock()
+
+    def get(self) -> typing.Optional[typing.Tuple[Image.Image, typing.Tuple[int, int],
+                                                  typing.Tuple[int, int]]]:
+        '''
+        Returns the cursor image, its hotspot and the pointer position,
+        or None if XFixes can't be used (no X display, a Wayland
+        session or no python-xlib)
+        '''
+        if xfixes is None or self._supported is False or not self._connection.available:
+            return None
+
+        try:
+            with self._lock:
+                if not self._subscribed:
+                    self._subscribed = True
+                    self._connection.subscribe(self._on_connect, self._on_event)
+
+            with self._connection.use() as xdisplay:
+                if not self._supported:
+                    return None
+                return self._get(xdisplay)
+        except X_ERRORS:
+            return None
+
+    @staticmethod
+    def is_live(image: typing.Any) -> bool:
+        '''
+        Whether the image is a cursor image read from the display. It
+        still is after it's been dropped from the cache, and stamping
+        it stamps the cursor showing then, which get() fetches again.
+        '''
+        info = getattr(image, 'info', None)
+        return isinstance(info, dict) and _SERIAL_INFO in info
+
+    def _get(self, xdisplay):
+        root = xdisplay.screen().root
+        if self._serial not in self._sprites:
+            reply = xdisplay.xfixes_get_cursor_image(root)
+            self._serial = reply.cursor_serial
+            sprite = _to_image(reply)
+            sprite.info[_SERIAL_INFO] = reply.cursor_serial
+            self._sprites[reply.cursor_serial] = (sprite, (reply.xhot, reply.yhot))
+            while len(self._sprites) > XFIXES_CACHE_SIZE:
+                self._sprites.popitem(last=False)
+            position = (reply.x, reply.y)
+        else:
+            pointer = root.query_pointer()
+            position = (pointer.root_x, pointer.root_y)
+
+        assert self._serial is not None
+        sprite, hotspot = self._sprites[self._serial]
+        return sprite, hotspot, position
+
+    def _on_connect(self, xdisplay):
+        # Changes from before this connection weren't reported
+        self._serial = None
+        self._supported = xdisplay.has_extension('XFIXES')
+        if self._supported:
+            xdisplay.xfixes_query_version()
+            xdisplay.xfixes_select_cursor_input(
+                xdisplay.screen().root, xfixes.XFixesDisplayCursorNotifyMask
+            )
+
+    def _on_event(self, event):
+        if isinstance(event, xfixes.DisplayCursorNotify):
+            self._serial = event.cursor_serial
+
+
+def _to_image(reply) -> Image.Image:
+    '''
+    Converts an XFixes cursor image: 32 bit ARGB pixels
+    with premultiplied alpha, in the machine's byte order
+    '''
+    pixels = array.array('I', reply.cursor_image)
+    if sys.byteorder == 'big':
+        pixels.byteswap()
+
+    return Image.frombytes('RGBA', (reply.width, reply.height), pixels.tobytes(), 'raw', 'BGRa')
+
+
+class CursorStore(object):
+    '''
+    Decodes each cursor image once and keeps the copies scaled for
+    screenshots of each size. The images it hands out are shared: copy
+    one before changing it.
+    '''
+
+    __slots__ = ('xfixes', '_sprites', '_scaled', '_lock')
+
+    xfixes: XFixesCursor
+
+    _sprites: typing.Dict[str, Image.Image]
+    _scaled: typing.Dict[typing.Tuple[str, float], Image.Image]
+
+    def __init__(self):
+        self.xfixes = XFixesCursor()
+        self._sprites = {}
+        self._scaled = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Image.Image:
+        '''
+        Returns a cursor image, decoded the first time it's asked for.
+        For LIVE_CURSOR, it's the cursor showing now. Raises KeyError for
+        a cursor gscreenshot doesn't have or can't read.
+        '''
+        if name == LIVE_CURSOR:
+            live = self.xfixes.get()
+            if live is None:
+                raise KeyError(name)
+            return live[0]
+
+        if name not in CURSOR_NAMES:
+            raise KeyError(name)
+
+        with self._lock:
+            if name not in self._sprites:
+                with Image.open(get_resource_path(
+                    'gscreenshot.resources.pixmaps', f'cursor-{name}.png'
+                )) as sprite:
+                    self._sprites[name] = sprite.convert('RGBA')
+
+            return self._sprites[name]
+
+    def get_all(self) -> typing.Dict[str, Image.Image]:
+        '''Returns every cursor image, by name, with LIVE_CURSOR if it can be read'''
+        cursors = {name: self.get(name) for name in CURSOR_NAMES}
+        live = self.xfixes.get()
+        if live is not None:
+            cursors[LIVE_CURSOR] = live[0]
+
+        return cursors
+
+    def get_scaled(self, sprite: Image.Image, ratio: float) -> Image.Image:
+        '''
+        Returns a cursor image scaled down by ratio (never up), ready to
+        paste with itself as the mask. Copies of the store's own images
+        are kept for the next screenshot of the same size; other images
+        are scaled each time.
+        '''
+        name = self._name_of(sprite)
+        if name is None:
+            return self._scale(sprite, ratio)
+
+        key = (name, round(ratio, 4))
+        with self._lock:
+            if key not in self._scaled:
+                self._scaled[key] = self._scale(sprite, ratio)
+
+            return self._scaled[key]
+
+    def _name_of(self, sprite: Image.Image) -> typing.Optional[str]:
+        with self._lock:
+            for name, known in self._sprites.items():
+                if known is sprite:
+                    return name
+
+        return None
+
+    @staticmethod
+    def _scale(sprite: Image.Image, ratio: float) -> Image.Image:
+        # The width is scaled from the height and the other way
+        # around, as gscreenshot always has
+        scaled = sprite.copy()
+        scaled.thumbnail(
+            (int(sprite.size[1] * ratio), int(sprite.size[0] * ratio)),
+            get_resampling('LANCZOS')
+        )
+        return scaled
+
+
+_cursor_store = CursorStore()
+
+
+def get_cursor_store() -> CursorStore:
+    '''Returns the process-wide cursor store'''
+    return _cursor_store
@@ -0,0 +1,106 @@
+'''
+Encoded copies of a capture, so it isn't encoded more than once
+'''
+import io
+import threading
+import typing
+
+from gscreenshot.saving import REENCODING_PRESETS, get_encoder_options
+from gscreenshot.util import add_png_exif, load_pil_plugin
+
+if typing.TYPE_CHECKING:
+    from gscreenshot.screenshooter.capture import Capture
+
+
+class EncodedCache(object):
+    '''
+    The bytes a capture has been encoded to, by format and encoder
+    options. Saving, the clipboard and opening the screenshot all get
+    their bytes from here, so writing the same output again (the same
+    file to another place, or PNG for the clipboard after saving a PNG)
+    reuses them instead of running the encoder.
+
+    The EXIF data is fixed when the cache is made, so every encoding
+    of a capture carries the same date and is byte for byte the same.
+    '''
+
+    __slots__ = ('capture', 'exif', '_encoded', '_lock')
+
+    capture: 'Capture'
+    exif: bytes
+    _encoded: typing.Dict[typing.Tuple[str, typing.Tuple[typing.Tuple[str, typing.Any], ...]],
+                          bytes]
+
+    def __init__(self, capture: 'Capture', exif: bytes):
+        '''
+        Parameters:
+            Capture capture: the capture to encode, with an image
+            bytes exif: the EXIF data to add to each encoding
+        '''
+        self.capture = capture
+        self.exif = exif
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def get(self, image_format: str, **options: typing.Any) -> bytes:
+        '''
+        Returns the capture encoded in a format, encoding it the first
+        time. The options are passed to PIL's Image.save. Raises IOError
+        if it can't be encoded.
+
+        Parameters:
+            str image_format: a PIL format name, such as 'png' or 'jpeg'
+        '''
+        image_format = image_format.lower()
+        key = (image_format, tuple(sorted(options.items())))
+
+        with self._lock:
+            if key not in self._encoded:
+                self._encoded[key] = self._encode(image_format, options)
+
+            return self._encoded[key]
+
+    def get_preset(self, image_format: str, preset: str) -> bytes:
+        '''
+        Returns the capture encoded with an encoder preset's options for
+        the format (see gscreenshot.saving.PRESETS). What the utility
+        wrote is used as it is unless the preset encodes it again.
+        Raises KeyError for a preset that doesn't exist.
+        '''
+        options = get_encoder_options(preset, image_format)
+        encoded = self.capture.encoded
+        if encoded is not None and encoded[0] == image_format.lower() and \
+                preset not in REENCODING_PRESETS:
+            options = {}
+
+        return self.get(image_format, **options)
+
+    def get_any(self, image_format: str, preset: str) -> bytes:
+        '''
+        Returns whichever encoding of the capture in a format was made
+        first, or encodes it with a preset's options if there isn't one.
+        For the clipboard, which takes any PNG: copying a screenshot that
+        was saved as PNG reuses the saved bytes, whatever the preset.
+        '''
+        with self._lock:
+            for (encoded_format, _options), encoded in self._encoded.items():
+                if encoded_format == image_format.lower():
+                    return encoded
+
+        return self.get_preset(image_format, preset)
+
+    def _encode(self, image_format: str, options: typing.Dict[str, typing.Any]) -> bytes:
+        encoded = self.capture.encoded
+        if encoded is not None and encoded[0] == image_format and not options:
+            # What the utility wrote can be used as is
+            if image_format == 'png':
+                return add_png_exif(encoded[1], self.exif)
+            return encoded[1]
+
+        image = self.capture.image
+        assert image is not None
+
+        load_pil_plugin(image_format)
+        with io.BytesIO() as data:
+            image.save(data, image_format.upper(), exif=self.exif, **options)
+            return data.getvalue()
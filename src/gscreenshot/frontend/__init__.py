@@ -1,15 +1,9 @@
 '''
 Shared utilities for gscreenshot's various frontends
 '''
+#pylint: disable=import-outside-toplevel
 import signal
 import sys
-import gscreenshot.frontend.cli
-
-try:
-    import gscreenshot.frontend.gtk
-    GTK_CAPABLE = True
-except ValueError:
-    GTK_CAPABLE = False
 
 
 class SignalHandler(object):
@@ -36,8 +30,19 @@ def delegate():
         print(" ==> WARNING: gscreenshot no longer supports Python versions older than Python 3.5")
         print(" ==> WARNING: Please upgrade to Python 3.5 or newer")
 
+    # Only the frontend being used is imported. GTK in
+    # particular is slow to load and not needed by the CLI.
     with SignalHandler():
-        if (len(sys.argv) > 1) or 'gscreenshot-cli' in sys.argv[0] or not GTK_CAPABLE:
-            gscreenshot.frontend.cli.run()
-        else:
-            gscreenshot.frontend.gtk.main()
+        if (len(sys.argv) > 1) or 'gscreenshot-cli' in sys.argv[0]:
+            from gscreenshot.frontend import cli
+            cli.run()
+            return
+
+        try:
+            from gscreenshot.frontend import gtk
+        except ValueError:
+            from gscreenshot.frontend import cli
+            cli.run()
+            return
+
+        gtk.main()
@@ -0,0 +1,140 @@
+'''
+Runs screenshots for a GUI frontend off its main thread
+'''
+import threading
+import traceback
+import typing
+
+if typing.TYPE_CHECKING:
+    from gscreenshot import Gscreenshot
+
+
+class CaptureJob(object):
+    '''A screenshot waiting for or running on the worker'''
+
+    __slots__ = ('capture', 'on_done', 'cancelled')
+
+    def __init__(self, capture: typing.Callable[[], typing.Any],
+                 on_done: typing.Callable[[bool], typing.Any]):
+        '''
+        Parameters:
+            capture: takes the screenshot, on the worker thread
+            on_done: called on the main thread afterwards with whether
+                     the screenshot was cancelled
+        '''
+        self.capture = capture
+        self.on_done = on_done
+        self.cancelled = False
+
+
+class CaptureWorker(object):
+    '''
+    Takes screenshots one at a time on a single background thread.
+
+    At most one screenshot waits behind the one being taken: asking for
+    another while one is already waiting replaces it, so pressing a
+    button repeatedly takes one more screenshot (with the latest
+    settings) rather than one per press.
+
+    Results are handed back through dispatch, which should run the
+    callback on the main thread (GLib.idle_add for GTK).
+    '''
+
+    __slots__ = ('_app', '_dispatch', '_condition', '_running', '_pending', '_thread')
+
+    _app: 'Gscreenshot'
+    _running: typing.Optional[CaptureJob]
+    _pending: typing.Optional[CaptureJob]
+    _thread: typing.Optional[threading.Thread]
+
+    def __init__(self, app: 'Gscreenshot',
+                 dispatch: typing.Callable[..., typing.Any]):
+        self._app = app
+        self._dispatch = dispatch
+        self._condition = threading.Condition()
+        self._running = None
+        self._pending = None
+        self._thread = None
+
+    @property
+    def busy(self) -> bool:
+        '''Whether a screenshot is being taken or waiting to be'''
+        with self._condition:
+            return self._running is not None or self._pending is not None
+
+    def submit(self, capture: typing.Callable[[], typing.Any],
+               on_done: typing.Callable[[bool], typing.Any]):
+        '''
+        Queues a screenshot, replacing one that's waiting.
+        See CaptureJob.
+        '''
+        with self._condition:
+            if self._pending is not None:
+                self._pending.cancelled = True
+                self._dispatch(self._pending.on_done, True)
+
+            self._pending = CaptureJob(capture, on_done)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='gscreenshot-capture')
+                self._thread.daemon = True
+                self._thread.start()
+
+            self._condition.notify()
+
+    def cancel(self) -> bool:
+        '''
+        Cancels the waiting screenshot and the one being taken, if any:
+        a delay ends early and the backend's or selector's process is
+        killed.
+
+        Returns:
+            bool whether there was anything to cancel
+        '''
+        with self._condition:
+            pending = self._pending
+            running = self._running
+            self._pending = None
+
+            if pending is not None:
+                pending.cancelled = True
+                self._dispatch(pending.on_done, True)
+
+            if running is not None:
+                running.cancelled = True
+                self._app.cancel_screenshot()
+
+            self._condition.notify_all()
+            return pending is not None or running is not None
+
+    def join(self, timeout: typing.Optional[float]=None) -> bool:
+        '''
+        Waits until no screenshot is being taken or waiting.
+
+        Returns:
+            bool whether it's idle
+        '''
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._running is None and self._pending is None, timeout
+            )
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None)
+                job = self._pending
+                self._pending = None
+                self._running = job
+
+            assert job is not None
+            try:
+                job.capture()
+            except Exception: #pylint: disable=broad-except
+                # Keep the worker going for the next screenshot
+                traceback.print_exc()
+
+            with self._condition:
+                self._running = None
+                self._dispatch(job.on_done, job.cancelled)
+                self._condition.notify_all()
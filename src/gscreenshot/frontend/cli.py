@@ -1,31 +1,142 @@
 #pylint: disable=too-many-statements
 #pylint: disable=too-many-branches
+#pylint: disable=too-many-return-statements
+#pylint: disable=import-outside-toplevel
 '''
 Gscreenshot's CLI
 '''
 import argparse
+import os
 import sys
 import gettext
+import typing
 
-from gscreenshot import Gscreenshot
-from gscreenshot.screenshooter.exceptions import NoSupportedScreenshooterError
+from gscreenshot.frontend import daemon
+from gscreenshot.saving import PRESETS
+
+# Gscreenshot and the backends are only imported once there's a
+# screenshot to take, so --help and handing off to a daemon are quick
+if typing.TYPE_CHECKING:
+    from gscreenshot import Gscreenshot
 
 _ = gettext.gettext
 
 
-def run():
-    '''Run the CLI frontend'''
+def _get_output_filename(gscreenshot: 'Gscreenshot', filename, output_name: str) -> str:
+    '''
+    Adds an output name to the filename requested on the command line
+    '''
+    if filename is False:
+        filename = gscreenshot.get_time_filename()
+    elif os.path.splitext(filename)[1] == "":
+        filename = os.path.join(filename, gscreenshot.get_time_filename())
+
+    base, ext = os.path.splitext(filename)
+    return f"{base}-{output_name}{ext}"
+
+
+def _run_burst(gscreenshot: 'Gscreenshot', args) -> int:
+    '''
+    Takes a sequence of screenshots. Returns the exit code.
+    '''
+    from gscreenshot.burst import Burst
+
+    # A burst is always of the full screen, and only saved
+    incompatible = [flag for flag, used in (
+        ('-s', args.selection), ('--output', args.output is not None),
+        ('-c', args.clip), ('-o', args.open)
+    ) if used]
+    if incompatible:
+        print(_("--count can't be used with {0}").format(", ".join(incompatible)))
+        return 1
+
+    burst = Burst(
+        gscreenshot,
+        args.count,
+        args.interval,
+        args.filename if args.filename is not False else None,
+        args.pointer
+    )
     try:
-        gscreenshot = Gscreenshot()
-    except NoSupportedScreenshooterError as gscreenshot_error:
-        print(_("No supported screenshot backend is available."))
-        if gscreenshot_error.required is None:
-            print(_("Please install one to use gscreenshot."))
+        stats = burst.run()
+    except ValueError:
+        print(_("Failed to save screenshot!"))
+        return 1
+
+    print(_("Captured {0} of {1} screenshots in {2:.2f}s ({3:.1f} per second)").format(
+        stats.captured, args.count, stats.elapsed, stats.fps
+    ))
+    if stats.dropped > 0:
+        print(_("{0} screenshots were dropped because saving fell behind").format(stats.dropped))
+
+    if stats.failed > 0 or stats.errors > 0:
+        print(_("Failed to take or save {0} screenshots!").format(stats.failed + stats.errors))
+        return 1
+
+    return 0
+
+
+def _save_each_output(gscreenshot: 'Gscreenshot', args) -> int:
+    '''
+    Captures each output into its own file. Returns the exit code.
+    '''
+    images = gscreenshot.screenshot_each_output(args.delay, args.pointer)
+    exit_code = 0
+
+    for output_name, image in images.items():
+        if image is None:
+            print(_("No screenshot taken of {0}.").format(output_name))
+            exit_code = 1
+            continue
+
+        output_filename = _get_output_filename(gscreenshot, args.filename, output_name)
+        directory = os.path.dirname(output_filename)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+
+        if not gscreenshot.save_image(image, output_filename):
+            print(_("Failed to save screenshot!"))
+            exit_code = 1
+
+    if args.notify and exit_code == 0:
+        if not gscreenshot.show_screenshot_notification():
+            print(_("failed to show screenshot notification - is notify-send working?"))
+
+    return exit_code
+
+
+def _benchmark_backends(gscreenshot: 'Gscreenshot') -> int:
+    '''Benchmarks the backends and prints their ranking'''
+    results = gscreenshot.benchmark_backends()
+    if not results:
+        print(_("No screenshot backends are available."))
+        return 1
+
+    for name, latency, failure_rate in results:
+        if latency is None:
+            print(_("{0}: failed").format(name))
         else:
-            print(_("Please install one of the following to use gscreenshot:"))
-            print(", ".join(gscreenshot_error.required))
-        sys.exit(1)
+            print(_("{0}: {1:.1f} ms, {2:.0%} failed").format(
+                name, latency * 1000, failure_rate
+            ))
+
+    return 0
+
+
+def _explain(gscreenshot: 'Gscreenshot', args) -> int:
+    '''Prints how the screenshot would be taken. Returns the exit code.'''
+    if args.selection is not False:
+        print(gscreenshot.explain_capture('region', args.pointer))
+    elif args.output is not None:
+        print(gscreenshot.explain_capture('output', args.pointer, output=args.output))
+    else:
+        print(gscreenshot.explain_capture('fullscreen', args.pointer))
+
+    return 0
+
 
+def get_parser() -> argparse.ArgumentParser:
+    '''Returns the CLI's argument parser'''
     parser = argparse.ArgumentParser()
 
     #pylint: disable=line-too-long
@@ -85,12 +196,79 @@ def run():
             action='store_true',
             help=_("Capture the cursor.")
     )
-
-    args = parser.parse_args()
-
+    parser.add_argument(
+            '--output',
+            required=False,
+            default=None,
+            metavar='NAME',
+            help=_("Capture only the named output (monitor), e.g. HDMI-1.")
+    )
+    parser.add_argument(
+            '--all-outputs',
+            required=False,
+            action='store_true',
+            help=_("Capture every output (monitor) into its own file. The output name is added to each filename.")
+    )
+    parser.add_argument(
+            '--count',
+            required=False,
+            default=1,
+            type=int,
+            metavar='N',
+            help=_("Take N screenshots in a row. Files are numbered in sequence. This can be paired with -f to choose where they are saved, but not with -s, --output, -c or -o.")
+    )
+    parser.add_argument(
+            '--interval',
+            required=False,
+            default=0,
+            type=int,
+            metavar='MS',
+            help=_("Milliseconds between screenshots when used with --count. Defaults to 0 (as fast as possible).")
+    )
+    parser.add_argument(
+            '--hedge',
+            required=False,
+            default=None,
+            nargs='?',
+            const=95.0,
+            type=float,
+            metavar='PERCENTILE',
+            help=_("If the screenshot backend takes longer than this percentile of its recent screenshots (95 if not given), also start the next best backend and use whichever finishes first.")
+    )
+    parser.add_argument(
+            '--preset',
+            required=False,
+            default=None,
+            choices=PRESETS,
+            help=_("How to encode saved screenshots: fast, balanced (the encoder's defaults) or smallest. Remembered for next time.")
+    )
+    parser.add_argument(
+            '--explain',
+            required=False,
+            action='store_true',
+            help=_("Show how the screenshot would be taken with these options: which backend is used, whether the region and cursor are captured natively or cropped and composited, and whether the image is saved as the backend wrote it. No screenshot is taken.")
+    )
+    parser.add_argument(
+            '--benchmark-backends',
+            required=False,
+            action='store_true',
+            help=_("Time screenshots with every screenshot backend available on this system and remember which works best. Backends are ranked by speed and reliability from then on.")
+    )
+    parser.add_argument(
+            '--daemon',
+            required=False,
+            action='store_true',
+            help=_("Keep running and take screenshots for other gscreenshot-cli commands, which will pass their options to this process instead of starting up on their own. Requires XDG_RUNTIME_DIR to be set.")
+    )
     #pylint: enable=line-too-long
 
+    return parser
 
+
+def run_args(gscreenshot: 'Gscreenshot', args: argparse.Namespace) -> int:
+    '''
+    Does what the parsed arguments ask for. Returns the exit code.
+    '''
     if args.version is not False:
         authors = gscreenshot.get_program_authors()
         website = gscreenshot.get_program_website()
@@ -100,6 +278,10 @@ def run():
         version = gscreenshot.get_program_version()
 
         print(_("Using {0} screenshot backend").format(gscreenshot.get_screenshooter_name()))
+        if gscreenshot.get_screenshooter_probe_cached():
+            print(_("Backend detection: cached"))
+        else:
+            print(_("Backend detection: probed"))
         print(_("Available features: {0}").format(", ".join(gscreenshot.get_capabilities())))
         print(f"{name} {version}; {description}")
         print(website)
@@ -108,16 +290,36 @@ def run():
         print("\n".join(authors))
         print("")
         print(_("Licensed as {0}").format(license_name))
-        sys.exit(0)
+        return 0
+
+    if args.benchmark_backends:
+        return _benchmark_backends(gscreenshot)
+
+    gscreenshot.set_hedging(args.hedge)
+    if args.preset is not None:
+        gscreenshot.set_encoder_preset(args.preset)
+    # The clipboard gets a PNG too
+    gscreenshot.set_destination_format(
+        gscreenshot.get_save_format(args.filename if args.filename is not False else None)
+    )
+
+    if args.explain:
+        return _explain(gscreenshot, args)
+
+    if args.all_outputs:
+        return _save_each_output(gscreenshot, args)
+
+    if args.count > 1:
+        return _run_burst(gscreenshot, args)
 
     if args.selection is not False:
         gscreenshot.screenshot_selected(args.delay, args.pointer)
     else:
-        gscreenshot.screenshot_full_display(args.delay, args.pointer)
+        gscreenshot.screenshot_full_display(args.delay, args.pointer, output=args.output)
 
     if gscreenshot.get_last_image() is None:
         print(_("No screenshot taken."))
-        sys.exit(1)
+        return 1
     else:
         if args.notify:
             if not gscreenshot.show_screenshot_notification():
@@ -149,4 +351,36 @@ def run():
                 if tmp_file is not None:
                     print(_("Your screenshot was saved to {0}").format(tmp_file))
                 exit_code = 1
-        sys.exit(exit_code)
+        return exit_code
+
+
+def _create_gscreenshot() -> 'Gscreenshot':
+    '''Creates a Gscreenshot, exiting if there's no backend'''
+    from gscreenshot import Gscreenshot
+    from gscreenshot.screenshooter.exceptions import NoSupportedScreenshooterError
+
+    try:
+        return Gscreenshot()
+    except NoSupportedScreenshooterError as gscreenshot_error:
+        print(_("No supported screenshot backend is available."))
+        if gscreenshot_error.required is None:
+            print(_("Please install one to use gscreenshot."))
+        else:
+            print(_("Please install one of the following to use gscreenshot:"))
+            print(", ".join(gscreenshot_error.required))
+        sys.exit(1)
+
+
+def run():
+    '''Run the CLI frontend'''
+    args = get_parser().parse_args()
+
+    if args.daemon:
+        sys.exit(daemon.serve(_create_gscreenshot(), run_args))
+
+    response = daemon.send_request(args)
+    if response is not None:
+        print(response['output'], end='')
+        sys.exit(response['exit_code'])
+
+    sys.exit(run_args(_create_gscreenshot(), args))
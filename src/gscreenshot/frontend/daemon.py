@@ -0,0 +1,185 @@
+'''
+A resident gscreenshot that the CLI can hand its work to.
+
+The daemon keeps one Gscreenshot instance (with its backend already
+probed) listening on a UNIX socket in $XDG_RUNTIME_DIR. A client sends
+its parsed command line arguments as a single JSON object and gets back
+the exit code, the text the request printed, and the path the
+screenshot was saved to.
+'''
+import argparse
+import contextlib
+import gettext
+import io
+import json
+import os
+import socket
+import socketserver
+import typing
+
+if typing.TYPE_CHECKING:
+    from gscreenshot import Gscreenshot
+
+_ = gettext.gettext
+
+SOCKET_NAME = "gscreenshot.sock"
+
+RunArgs = typing.Callable[['Gscreenshot', argparse.Namespace], int]
+
+
+def get_socket_path() -> typing.Optional[str]:
+    '''
+    Returns the path of the daemon's socket, or None if there
+    is no per-user runtime directory to put it in
+    '''
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if not runtime_dir or not os.path.isdir(runtime_dir):
+        # A shared directory like /tmp would let other users
+        # take screenshots through our daemon
+        return None
+
+    return os.path.join(runtime_dir, SOCKET_NAME)
+
+
+def send_request(args: argparse.Namespace) -> typing.Optional[dict]:
+    '''
+    Asks a running daemon to handle the arguments.
+
+    Returns:
+        dict with exit_code, output and path, or None if no daemon
+        is listening
+    '''
+    socket_path = get_socket_path()
+    if socket_path is None or not os.path.exists(socket_path):
+        return None
+
+    request = dict(vars(args))
+
+    # The daemon's working directory isn't ours, so send absolute paths
+    if request.get('filename') is not False:
+        request['filename'] = os.path.abspath(request['filename'])
+    elif not request.get('clip'):
+        request['filename'] = os.getcwd()
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            client.shutdown(socket.SHUT_WR)
+
+            response = b''
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                response += chunk
+    except OSError:
+        return None
+
+    try:
+        return json.loads(response.decode('utf-8'))
+    except ValueError:
+        return None
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    '''Handles one client connection'''
+
+    server: 'GscreenshotDaemon'
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.read().decode('utf-8'))
+        except ValueError:
+            return
+
+        if not isinstance(request, dict):
+            return
+
+        gscreenshot = self.server.gscreenshot
+        # Don't report a file saved by an earlier request
+        gscreenshot.saved_last_image = False
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            try:
+                exit_code = self.server.run_args(gscreenshot, argparse.Namespace(**request))
+            # The client would otherwise get no response and take the
+            # screenshot again itself
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                print(_("gscreenshot failed: {0}").format(error))
+                exit_code = 1
+
+        response = {
+            'exit_code': exit_code,
+            'output': output.getvalue(),
+            'path': gscreenshot.last_save_file if gscreenshot.saved_last_image else None,
+        }
+        self.wfile.write(json.dumps(response).encode('utf-8'))
+
+
+class GscreenshotDaemon(socketserver.UnixStreamServer):
+    '''
+    Serves requests one at a time using a single Gscreenshot instance
+    '''
+
+    def __init__(self, socket_path: str, gscreenshot: 'Gscreenshot', run_args: RunArgs):
+        '''
+        Parameters:
+            str socket_path
+            Gscreenshot gscreenshot
+            callable run_args: handles a request's arguments and
+                               returns the exit code
+        '''
+        self.gscreenshot = gscreenshot
+        self.run_args = run_args
+
+        # Only our user should be able to connect
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+
+def _is_listening(socket_path: str) -> bool:
+    '''Whether something is accepting connections on the socket'''
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            return True
+    except OSError:
+        return False
+
+
+def serve(gscreenshot: 'Gscreenshot', run_args: RunArgs) -> int:
+    '''
+    Runs the daemon until it's killed. Returns the exit code.
+    '''
+    socket_path = get_socket_path()
+    if socket_path is None:
+        print(_("XDG_RUNTIME_DIR must be set to run gscreenshot as a daemon."))
+        return 1
+
+    if os.path.exists(socket_path):
+        if _is_listening(socket_path):
+            print(_("gscreenshot is already running as a daemon."))
+            return 1
+        # Left behind by a daemon that didn't exit cleanly
+        os.unlink(socket_path)
+
+    server = GscreenshotDaemon(socket_path, gscreenshot, run_args)
+    print(_("Listening on {0}").format(socket_path))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
+    return 0
@@ -6,26 +6,54 @@
 Classes for the GTK gscreenshot frontend
 '''
 import gettext
-import io
 import sys
 import threading
 import typing
 from time import sleep
-from pkg_resources import resource_string, resource_filename
 import pygtkcompat
 from gscreenshot import Gscreenshot
-from gscreenshot.util import GSCapabilities
+from gscreenshot.util import GSCapabilities, get_resource_path, get_resource_string
 from gscreenshot.screenshooter.exceptions import NoSupportedScreenshooterError
+from gscreenshot.frontend.capture_worker import CaptureWorker
 
 pygtkcompat.enable()
 pygtkcompat.enable_gtk(version='3.0')
 from gi.repository import Gdk
+from gi.repository import GdkPixbuf
 from gi.repository import Gtk
 from gi.repository import GObject
 from gi.repository import GLib
 
 i18n = gettext.gettext
 
+# Milliseconds the window has to stay the same size before
+# the full quality preview is rendered
+PREVIEW_SETTLE_MS = 150
+
+
+def image_to_pixbuf(image):
+    '''
+    Makes a pixbuf from a PIL image from its raw pixels, without
+    encoding and decoding them. Transparency is kept.
+
+    The pixels are copied twice: tobytes() packs them out of PIL's
+    storage, and PyGObject copies those into the GLib.Bytes (new_take
+    copies too). The pixbuf then uses the GLib.Bytes as it is.
+    '''
+    if image.mode not in ('RGB', 'RGBA'):
+        transparent = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if transparent else 'RGB')
+
+    has_alpha = image.mode == 'RGBA'
+    width, height = image.size
+    # tobytes() packs the rows with no padding between them
+    rowstride = width * (4 if has_alpha else 3)
+
+    return GdkPixbuf.Pixbuf.new_from_bytes(
+        GLib.Bytes.new(image.tobytes()), GdkPixbuf.Colorspace.RGB,
+        has_alpha, 8, width, height, rowstride
+    )
+
 
 class View(object):
     '''View class for the GTK frontend'''
@@ -44,6 +72,8 @@ class View(object):
         self._cursor_selection_label = builder.get_object('pointer_selection_label')
         self._actions_menu = builder.get_object('menu_saveas_additional_actions')
         self._status_icon = builder.get_object('status_icon')
+        # The off screen popup holding the keyboard while the window is hidden
+        self._key_grab = None
 
         if GSCapabilities.ALTERNATE_CURSOR in self._capabilities:
             self._init_cursor_combobox()
@@ -140,22 +170,15 @@ class View(object):
         self._cursor_selection_items.clear()
         for cursor_name in cursors:
             if cursors[cursor_name] is not None:
-                descriptor = io.BytesIO()
-                image = cursors[cursor_name]
+                # The cursor images are shared
+                image = cursors[cursor_name].copy()
                 image.thumbnail((
                     self._cursor_selection_dropdown.get_allocation().height*.42,
                     self._cursor_selection_dropdown.get_allocation().width*.42
                 ))
-                image.save(descriptor, "png")
-                contents = descriptor.getvalue()
-                descriptor.close()
-                loader = Gtk.gdk.PixbufLoader("png")
-                loader.write(contents)
-                pixbuf = loader.get_pixbuf()
-                loader.close()
 
                 self._cursor_selection_items.append(
-                    [pixbuf, i18n('cursor-' + cursor_name), cursor_name]
+                    [image_to_pixbuf(image), i18n('cursor-' + cursor_name), cursor_name]
                 )
             else:
                 self._cursor_selection_items.append(
@@ -244,6 +267,41 @@ class View(object):
 
         sleep(0.2)
 
+    def grab_keyboard(self, on_key_press: typing.Callable):
+        '''
+        Sends key presses to on_key_press while the window is hidden,
+        so Esc can still cancel a screenshot that's waiting out its
+        delay. The keyboard is grabbed for a 1x1 popup that's placed
+        off screen, where it can't show up in the screenshot.
+        '''
+        if self._key_grab is not None:
+            return
+
+        popup = Gtk.Window(type=Gtk.WindowType.POPUP)
+        popup.set_default_size(1, 1)
+        popup.move(-100, -100)
+        popup.connect('key-press-event', on_key_press)
+        popup.show()
+
+        seat = Gdk.Display.get_default().get_default_seat()
+        status = seat.grab(popup.get_window(), Gdk.SeatCapabilities.KEYBOARD,
+                           False, None, None, None, None)
+        if status != Gdk.GrabStatus.SUCCESS:
+            # e.g. on Wayland, which doesn't allow it
+            popup.destroy()
+            return
+
+        self._key_grab = popup
+
+    def ungrab_keyboard(self):
+        '''Gives back the keyboard taken with grab_keyboard'''
+        if self._key_grab is None:
+            return
+
+        Gdk.Display.get_default().get_default_seat().ungrab()
+        self._key_grab.destroy()
+        self._key_grab = None
+
     def unhide(self):
         '''Unhide the view'''
         self._window.set_sensitive(True)
@@ -337,7 +395,7 @@ class Presenter(object):
 
     __slots__ = ('_delay', '_app', '_hide', '_can_resize',
             '_pixbuf', '_view', '_keymappings', '_capture_cursor',
-            '_cursor_selection')
+            '_cursor_selection', '_worker', '_preview_source')
 
     _delay: int
     _app: Gscreenshot
@@ -348,6 +406,9 @@ class Presenter(object):
     _keymappings: dict
     _capture_cursor: bool
     _cursor_selection: str
+    _worker: CaptureWorker
+    # The pending full quality preview render, if there is one
+    _preview_source: typing.Optional[int]
 
     def __init__(self, application: Gscreenshot, view: View):
         self._app = application
@@ -356,9 +417,11 @@ class Presenter(object):
         self._delay = 0
         self._hide = True
         self._capture_cursor = False
+        self._preview_source = None
         self._show_preview()
         self._view.show_cursor_options(self._capture_cursor)
         self._keymappings = {}
+        self._worker = CaptureWorker(self._app, GLib.idle_add)
 
         cursors = self._app.get_available_cursors()
         self._cursor_selection = 'theme'
@@ -367,17 +430,18 @@ class Presenter(object):
                 cursors
                 )
 
-    def _begin_take_screenshot(self, app_method):
-        app_method(self._delay, self._capture_cursor, self._cursor_selection)
-
-        # Re-enable UI on the UI thread.
-        GLib.idle_add(self._end_take_screenshot)
+    def _end_take_screenshot(self, cancelled: bool=False):
+        # Runs on the UI thread. Another screenshot may be waiting
+        # behind this one, so the UI stays as it is until it's taken.
+        if self._worker.busy:
+            return False
 
-    def _end_take_screenshot(self):
+        self._view.ungrab_keyboard()
         self._show_preview()
 
         self._view.unhide()
         self._view.set_ready()
+        return False
 
     def set_keymappings(self, keymappings: dict):
         '''Set the keymappings'''
@@ -387,18 +451,45 @@ class Presenter(object):
         '''Handle window state events'''
         self._view.handle_state_event(widget, event)
 
-    def take_screenshot(self, app_method: typing.Callable):
-        '''Take a screenshot using the passed app method'''
+    def take_screenshot(self, app_method: typing.Callable, interactive: bool=False):
+        '''
+        Take a screenshot using the passed app method
+
+        Parameters:
+            bool interactive: the user selects what to capture, with a
+                              selector that needs the keyboard itself
+        '''
         self._view.set_busy()
 
         if self._hide:
             self._view.hide()
+            if not interactive:
+                # Nothing has focus while the window is hidden
+                self._view.grab_keyboard(self.handle_keypress)
+
+        # The settings at the time of the click are used
+        delay = self._delay
+        capture_cursor = self._capture_cursor
+        cursor_selection = self._cursor_selection
+
+        # Runs on the worker's thread, the result comes back through
+        # GLib.idle_add: https://wiki.gnome.org/Projects/PyGObject/Threading
+        self._worker.submit(
+            lambda: app_method(delay, capture_cursor, cursor_selection),
+            self._end_take_screenshot
+        )
 
-        # Do work in background thread.
-        # Taken from here: https://wiki.gnome.org/Projects/PyGObject/Threading
-        _thread = threading.Thread(target=self._begin_take_screenshot(app_method))
-        _thread.daemon = True
-        _thread.start()
+    def cancel_screenshot(self) -> bool:
+        '''
+        Cancels the screenshot being taken or waiting, if there is one.
+        Returns whether there was one.
+        '''
+        return self._worker.cancel()
+
+    def on_escape_pressed(self, *_):
+        '''Cancels a screenshot in progress, or exits if there isn't one'''
+        if not self.cancel_screenshot():
+            self.quit()
 
     def handle_keypress(self, widget, event, *args):
         """
@@ -451,28 +542,39 @@ class Presenter(object):
     def _button_select_area_or_window_clicked(self, *_):
 
         self.take_screenshot(
-            self._app.screenshot_selected
+            self._app.screenshot_selected,
+            interactive=True
             )
 
     def on_button_saveas_clicked(self, *_):
         '''Handle the saveas button'''
-        saved = False
-        cancelled = False
         save_dialog = FileSaveDialog(
                 self._app.get_time_filename(),
                 self._app.get_last_save_directory(),
                 self._view.get_window()
                 )
 
-        while not (saved or cancelled):
-            fname = self._view.run_dialog(save_dialog)
-            if fname is not None:
-                saved = self._app.save_last_image(fname)
-            else:
-                cancelled = True
+        fname = self._view.run_dialog(save_dialog)
+        if fname is None:
+            return
+
+        # Encoding a large screenshot takes a while, so it's saved on
+        # a background thread and the window keeps responding
+        self._view.set_busy()
+        self._app.save_last_image_in_background(fname, self._end_save, GLib.idle_add)
+
+    def _end_save(self, saved: bool):
+        # Runs on the UI thread, through GLib.idle_add
+        if not self._worker.busy:
+            self._view.set_ready()
 
         if saved:
             self._view.flash_status_icon("document-save")
+        else:
+            # Ask for another filename, as saving used to
+            self.on_button_saveas_clicked()
+
+        return False
 
     def on_button_openwith_clicked(self, *_):
         '''Handle the "open with" button'''
@@ -567,7 +669,7 @@ class Presenter(object):
 
         about.set_logo(
                 Gtk.gdk.pixbuf_new_from_file(
-                    resource_filename(
+                    get_resource_path(
                         'gscreenshot.resources.pixmaps', 'gscreenshot.png'
                         )
                     )
@@ -591,31 +693,31 @@ class Presenter(object):
         '''Handle window resizes'''
         if self._can_resize:
             self._view.resize()
-            self._show_preview()
+            # A quick preview now, and a proper one once the window
+            # has stopped changing size
+            self._show_preview(fast=True)
+            if self._preview_source is not None:
+                GLib.source_remove(self._preview_source)
+            self._preview_source = GLib.timeout_add(
+                PREVIEW_SETTLE_MS, self._show_settled_preview
+            )
+
+    def _show_settled_preview(self):
+        self._preview_source = None
+        self._show_preview()
+        return False
 
     def quit(self, *_):
         '''Exit the app'''
         self._app.quit()
 
     def _image_to_pixbuf(self, image):
-        descriptor = io.BytesIO()
-        image = image.convert("RGB")
-        image.save(descriptor, "ppm")
-        contents = descriptor.getvalue()
-        descriptor.close()
-        loader = Gtk.gdk.PixbufLoader("pnm")
-        loader.write(contents)
-        pixbuf = loader.get_pixbuf()
-        try:
-            loader.close()
-        except GLib.GError:
-            pass
-        return pixbuf
+        return image_to_pixbuf(image)
 
-    def _show_preview(self):
+    def _show_preview(self, fast: bool=False):
         height, width = self._view.get_preview_dimensions()
 
-        preview_img = self._app.get_thumbnail(width, height)
+        preview_img = self._app.get_thumbnail(width, height, fast=fast)
 
         self._view.update_preview(self._image_to_pixbuf(preview_img))
 
@@ -739,7 +841,7 @@ def main():
 
     builder = Gtk.Builder()
     builder.set_translation_domain('gscreenshot')
-    builder.add_from_string(resource_string(
+    builder.add_from_string(get_resource_string(
         'gscreenshot.resources.gui.glade', 'main.glade').decode('UTF-8'))
 
     window = builder.get_object('window_main')
@@ -780,7 +882,7 @@ def main():
 
     keymappings = {
         Gtk.gdk.keyval_to_lower(Gtk.gdk.keyval_from_name('Escape')):
-            presenter.on_button_quit_clicked,
+            presenter.on_escape_pressed,
         Gtk.gdk.keyval_to_lower(Gtk.gdk.keyval_from_name('F11')):
             presenter.on_fullscreen_toggle
     }
@@ -791,7 +893,7 @@ def main():
     window.connect("check-resize", presenter.on_window_resize)
     window.connect("window-state-event", presenter.window_state_event_handler)
     window.set_icon_from_file(
-        resource_filename('gscreenshot.resources.pixmaps', 'gscreenshot.png')
+        get_resource_path('gscreenshot.resources.pixmaps', 'gscreenshot.png')
     )
 
     view.run()
@@ -0,0 +1,77 @@
+'''
+Scaled down copies of a screenshot for previews
+'''
+import threading
+import typing
+
+from PIL import Image
+
+from gscreenshot.util import get_resampling
+
+
+def fit(size: typing.Tuple[int, int], width: float,
+        height: float) -> typing.Tuple[int, int]:
+    '''
+    Returns the size an image of the given size is shown at within
+    width x height, keeping its aspect ratio. Images are never enlarged.
+    '''
+    ratio = min(width / size[0], height / size[1], 1.0)
+    return (max(1, round(size[0] * ratio)), max(1, round(size[1] * ratio)))
+
+
+class PreviewPyramid(object):
+    '''
+    Halved copies (1/2, 1/4, ...) of an image, each made from the one
+    before it with Image.reduce the first time it's needed.
+
+    A preview is scaled from the smallest copy that's still at least as
+    large as the preview, so resizing the preview of a large screenshot
+    repeatedly costs about the same as for a small one. The copies go
+    with the pyramid, which lives as long as the capture it's for.
+    '''
+
+    __slots__ = ('_levels', '_lock')
+
+    _levels: typing.List[Image.Image]
+
+    def __init__(self, image: Image.Image):
+        self._levels = [image]
+        self._lock = threading.Lock()
+
+    @property
+    def image(self) -> Image.Image:
+        '''The full size image'''
+        return self._levels[0]
+
+    def level_for(self, size: typing.Tuple[int, int]) -> Image.Image:
+        '''
+        Returns the smallest copy that's at least size, making
+        the copies it needs to get there
+        '''
+        with self._lock:
+            index = 0
+            while True:
+                level = self._levels[index]
+                if level.width // 2 < size[0] or level.height // 2 < size[1]:
+                    return level
+
+                if index + 1 == len(self._levels):
+                    self._levels.append(level.reduce(2))
+                index += 1
+
+    def get_thumbnail(self, width: float, height: float, fast: bool=False) -> Image.Image:
+        '''
+        Returns the image fit within width x height. If one of the
+        copies is already that size, it's returned as is, and it's
+        shared: copy it before changing it.
+
+        Parameters:
+            fast: scale without antialiasing, for a preview that's
+                  about to be replaced with a better one
+        '''
+        size = fit(self.image.size, width, height)
+        level = self.level_for(size)
+        if level.size == size:
+            return level
+
+        return level.resize(size, get_resampling('NEAREST' if fast else 'LANCZOS'))
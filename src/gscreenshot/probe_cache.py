@@ -0,0 +1,146 @@
+'''
+Remembers which screenshot utilities can run, so that
+gscreenshot doesn't have to probe them (some probes start a subprocess,
+grim's takes a whole screenshot) every time it starts.
+
+A result is reused only while its fingerprint matches: the environment
+variables that decide which utilities are usable, plus the inode and
+mtime of each executable listed in the backend's BackendInfo.
+Installing, upgrading or removing a utility, or logging into a different
+kind of session, invalidates it.
+'''
+import hashlib
+import os
+import subprocess
+import threading
+import typing
+
+from gscreenshot.util import find_executable
+
+if typing.TYPE_CHECKING:
+    from gscreenshot.registry import BackendInfo
+
+# Environment that affects whether a backend can run
+FINGERPRINT_ENVIRONMENT = (
+    'PATH',
+    'XDG_SESSION_TYPE',
+    'DISPLAY',
+    'WAYLAND_DISPLAY',
+    'DBUS_SESSION_BUS_ADDRESS',
+)
+
+
+def get_fingerprint(executables: typing.Iterable[str]) -> str:
+    '''
+    Fingerprints the environment and the given executables.
+    This needs a few stat calls and no subprocesses.
+    '''
+    parts = [os.environ.get(name, '') for name in FINGERPRINT_ENVIRONMENT]
+
+    for executable in executables:
+        path = find_executable(executable)
+        try:
+            if path is None:
+                raise FileNotFoundError(executable)
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_ino}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{executable}:missing")
+
+    return hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()
+
+
+class ProbeCache(object):
+    '''
+    Probe results for screenshooter classes
+    '''
+
+    __slots__ = ('_entries', '_lock', 'hits', 'misses', 'changed')
+
+    _entries: typing.Dict[str, dict]
+
+    def __init__(self, entries: typing.Optional[typing.Dict[str, dict]]=None):
+        '''
+        Parameters:
+            dict entries: as returned by to_dict(), usually
+                          from the gscreenshot cache file
+        '''
+        self._entries = dict(entries) if isinstance(entries, dict) else {}
+        # Lookups answered from the cache and probes that had to run
+        self.hits = 0
+        self.misses = 0
+        self.changed = False
+        self._lock = threading.Lock()
+
+    @property
+    def hit(self) -> bool:
+        '''Whether every lookup so far was answered from the cache'''
+        with self._lock:
+            return self.hits > 0 and self.misses == 0
+
+    def can_run(self, backend: 'BackendInfo') -> bool:
+        '''
+        Returns whether the backend can run, from the cache if possible
+        '''
+        cached = self.lookup(backend)
+        if cached is not None:
+            return cached
+
+        return self.probe(backend)
+
+    def lookup(self, backend: 'BackendInfo') -> typing.Optional[bool]:
+        '''
+        Returns the cached result of the backend's can_run(), or None if
+        there isn't a current one. The backend is only imported if it
+        can run, to restore the features it detected when it was probed.
+        '''
+        fingerprint = get_fingerprint(backend.executables)
+
+        with self._lock:
+            entry = self._entries.get(backend.name)
+            if entry is None or entry.get('fingerprint') != fingerprint:
+                return None
+
+            self.hits += 1
+
+        if not entry.get('can_run'):
+            return False
+
+        backend.load().set_probe_features(entry.get('features', {}))
+        return True
+
+    def probe(self, backend: 'BackendInfo') -> bool:
+        '''
+        Imports the backend, runs its can_run() and caches the result.
+        This can be called from several threads at once.
+        '''
+        fingerprint = get_fingerprint(backend.executables)
+        backend_class = backend.load()
+
+        with self._lock:
+            self.misses += 1
+
+        try:
+            result = backend_class.can_run()
+        except subprocess.TimeoutExpired:
+            # Not cached: a hung utility might respond next time
+            return False
+
+        with self._lock:
+            if result or backend.cache_probe_failure:
+                self._entries[backend.name] = {
+                    'fingerprint': fingerprint,
+                    'can_run': result,
+                    'features': backend_class.get_probe_features(),
+                }
+                self.changed = True
+            elif backend.name in self._entries:
+                del self._entries[backend.name]
+                self.changed = True
+
+        return result
+
+    def to_dict(self) -> typing.Dict[str, dict]:
+        '''Returns the entries in a form that can be stored as JSON'''
+        with self._lock:
+            return dict(self._entries)
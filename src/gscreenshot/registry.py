@@ -0,0 +1,293 @@
+'''
+Registry of screenshot and selection backends.
+
+Each backend is described by a BackendInfo: its name, the session types
+it works in, its priority and what it can do, plus where its class lives.
+The class (and whatever the backend depends on, like dbus or Xlib) is only
+imported once the backend is needed.
+
+gscreenshot's own backends are listed here. Other packages can add their
+own by exposing a BackendInfo through an entry point in the
+"gscreenshot.screenshooters" or "gscreenshot.selectors" group, e.g.
+
+    entry_points={
+        'gscreenshot.screenshooters': [
+            'myshot = mypackage.gscreenshot_meta:MYSHOT',
+        ],
+    }
+
+A registered backend with the same name as a built in one replaces it.
+'''
+from importlib import import_module
+import os
+import sys
+import threading
+import typing
+
+from gscreenshot.util import GSCapabilities, session_is_wayland
+
+SCREENSHOOTER_GROUP = 'gscreenshot.screenshooters'
+SELECTOR_GROUP = 'gscreenshot.selectors'
+
+
+class BackendInfo(object):
+    '''
+    Describes a screenshooter or selector without importing it
+    '''
+
+    __slots__ = ('name', 'target', 'session_types', 'priority', 'capabilities',
+                 'executables', 'cache_probe_failure', '_loaded')
+
+    _loaded: typing.Optional[type]
+
+    def __init__(self, name: str, target: typing.Union[str, type],
+                 session_types: typing.Iterable[str]=('x11',), priority: int=0,
+                 capabilities: typing.Iterable[str]=(), *,
+                 executables: typing.Iterable[str]=(),
+                 cache_probe_failure: bool=True):
+        # pylint: disable=too-many-arguments
+        '''
+        Parameters:
+            str name: shown to users, and used as the cache key
+            str|type target: "module:Class", or the class itself
+            session_types: "x11" and/or "wayland"
+            int priority: higher is tried first
+            capabilities: the GSCapabilities the backend can offer.
+                          The instance's get_capabilities() has the final word.
+            executables: programs the backend's can_run() depends on. A
+                         cached probe result is thrown away when any of them
+                         is installed, changed or removed.
+            bool cache_probe_failure: set to False if can_run() depends on
+                         something the probe cache can't see change, such as
+                         a service that may not have started yet
+        '''
+        self.name = name
+        self.target = target
+        self.session_types = tuple(session_types)
+        self.priority = priority
+        self.capabilities = tuple(capabilities)
+        self.executables = tuple(executables)
+        self.cache_probe_failure = cache_probe_failure
+        self._loaded = None if isinstance(target, str) else target
+
+    def load(self) -> typing.Any:
+        '''Imports and returns the backend's class'''
+        if self._loaded is None:
+            module_name, class_name = str(self.target).split(':', 1)
+            self._loaded = getattr(import_module(module_name), class_name)
+
+        return self._loaded
+
+    def __repr__(self) -> str:
+        return (f'BackendInfo(name={self.name!r}, target={self.target!r}, '
+                f'session_types={self.session_types!r}, priority={self.priority})')
+
+
+XLIB = BackendInfo(
+    'python-xlib', 'gscreenshot.screenshooter.xlib:XlibWrapper',
+    ('x11',), 60,
+    [GSCapabilities.REGION_CAPTURE]
+)
+
+SCROT = BackendInfo(
+    'scrot', 'gscreenshot.screenshooter.scrot:Scrot',
+    ('x11',), 50,
+    [GSCapabilities.CURSOR_CAPTURE, GSCapabilities.REGION_CAPTURE],
+    executables=['scrot']
+)
+
+IMAGEMAGICK = BackendInfo(
+    'imagemagick', 'gscreenshot.screenshooter.imagemagick:ImageMagick',
+    ('x11',), 40,
+    [GSCapabilities.REGION_SELECTION, GSCapabilities.WINDOW_SELECTION,
+     GSCapabilities.REGION_CAPTURE],
+    executables=['import']
+)
+
+PILLOW = BackendInfo(
+    'python-pillow', 'gscreenshot.screenshooter.pil:PILWrapper',
+    ('x11',), 30,
+    [GSCapabilities.REGION_CAPTURE]
+)
+
+IMLIB2 = BackendInfo(
+    'imlib_2', 'gscreenshot.screenshooter.imlib_2:Imlib2',
+    ('x11',), 20,
+    executables=['imlib2_grab']
+)
+
+XDG_DESKTOP_PORTAL = BackendInfo(
+    'xdg-desktop-portal', 'gscreenshot.screenshooter.xdg_desktop_portal:XdgDesktopPortal',
+    ('x11', 'wayland'), 10,
+    # The portal may just not have been started yet
+    cache_probe_failure=False
+)
+
+GRIM = BackendInfo(
+    'grim', 'gscreenshot.screenshooter.grim:Grim',
+    ('wayland',), 50,
+    [GSCapabilities.CURSOR_CAPTURE, GSCapabilities.REGION_CAPTURE,
+     GSCapabilities.OUTPUT_CAPTURE],
+    executables=['grim']
+)
+
+SLOP = BackendInfo(
+    'slop', 'gscreenshot.selector.slop:Slop',
+    ('x11',), 50,
+    [GSCapabilities.WINDOW_SELECTION, GSCapabilities.REGION_SELECTION],
+    executables=['slop']
+)
+
+SLURP = BackendInfo(
+    'slurp', 'gscreenshot.selector.slurp:Slurp',
+    ('wayland',), 50,
+    [GSCapabilities.REGION_SELECTION],
+    executables=['slurp']
+)
+
+BUILTIN_BACKENDS = {
+    SCREENSHOOTER_GROUP: (XLIB, SCROT, IMAGEMAGICK, PILLOW, IMLIB2, XDG_DESKTOP_PORTAL, GRIM),
+    SELECTOR_GROUP: (SLOP, SLURP),
+}
+
+
+def get_session_type() -> str:
+    '''Returns the session type backends are matched against'''
+    return 'wayland' if session_is_wayland() else 'x11'
+
+
+def _get_path_fingerprint() -> str:
+    '''
+    Installing, upgrading or removing a distribution changes the
+    mtime of the directory on sys.path it's installed into
+    '''
+    parts = []
+    for path in sys.path:
+        try:
+            parts.append(f"{path}:{os.stat(path or '.').st_mtime_ns}")
+        except OSError:
+            continue
+
+    return "\n".join(parts)
+
+
+class Registry(object):
+    '''
+    The built in backends plus any registered through entry points.
+
+    Reading entry points means importing importlib.metadata and
+    scanning every installed distribution, which is slow next to the
+    rest of startup, so what was found is cached (see to_dict) until
+    the directories on sys.path change.
+    '''
+
+    __slots__ = ('_cached', '_backends', '_lock', 'changed')
+
+    _backends: typing.Optional[typing.Dict[str, typing.List[BackendInfo]]]
+
+    def __init__(self, cached: typing.Optional[dict]=None):
+        '''
+        Parameters:
+            dict cached: as returned by to_dict()
+        '''
+        self._cached = cached if isinstance(cached, dict) else {}
+        self._backends = None
+        self._lock = threading.Lock()
+        self.changed = False
+
+    def set_cached(self, cached: typing.Optional[dict]):
+        '''Supplies cached entry points if nothing was loaded yet'''
+        with self._lock:
+            if self._backends is None and isinstance(cached, dict):
+                self._cached = cached
+
+    def get_screenshooters(self, session_type: typing.Optional[str]=None
+                           ) -> typing.List[BackendInfo]:
+        '''
+        Returns the screenshooters for the session type (by default the
+        current one), most preferred first
+        '''
+        return self._get(SCREENSHOOTER_GROUP, session_type)
+
+    def get_selectors(self, session_type: typing.Optional[str]=None
+                      ) -> typing.List[BackendInfo]:
+        '''
+        Returns the selectors for the session type (by default the
+        current one), most preferred first
+        '''
+        return self._get(SELECTOR_GROUP, session_type)
+
+    def to_dict(self) -> dict:
+        '''Returns the discovered entry points in a form that can be stored as JSON'''
+        with self._lock:
+            return dict(self._cached)
+
+    def _get(self, group: str, session_type: typing.Optional[str]) -> typing.List[BackendInfo]:
+        if session_type is None:
+            session_type = get_session_type()
+
+        with self._lock:
+            if self._backends is None:
+                self._backends = self._load_backends()
+
+            backends = self._backends[group]
+
+        return sorted(
+            [b for b in backends if session_type in b.session_types],
+            key=lambda b: b.priority,
+            reverse=True
+        )
+
+    def _load_backends(self) -> typing.Dict[str, typing.List[BackendInfo]]:
+        loaded = {}
+        for group, entry_points in self._get_entry_points().items():
+            backends = {b.name: b for b in BUILTIN_BACKENDS[group]}
+
+            for target in entry_points.values():
+                module_name, _, attribute = target.partition(':')
+                try:
+                    info = getattr(import_module(module_name), attribute)
+                except (ImportError, AttributeError, ValueError):
+                    # A broken plugin shouldn't stop gscreenshot from starting
+                    continue
+
+                if isinstance(info, BackendInfo):
+                    backends[info.name] = info
+
+            loaded[group] = list(backends.values())
+
+        return loaded
+
+    def _get_entry_points(self) -> typing.Dict[str, typing.Dict[str, str]]:
+        '''Returns {group: {name: "module:attribute"}}'''
+        fingerprint = _get_path_fingerprint()
+        if self._cached.get('fingerprint') == fingerprint:
+            entry_points = self._cached.get('entry_points')
+            if isinstance(entry_points, dict) and set(entry_points) == set(BUILTIN_BACKENDS):
+                return entry_points
+
+        # pylint: disable=import-outside-toplevel
+        import importlib.metadata
+
+        entry_points = {}
+        for group in BUILTIN_BACKENDS:
+            try:
+                group_entry_points = importlib.metadata.entry_points(group=group)
+            except TypeError:
+                # Python < 3.10
+                all_entry_points: typing.Any = importlib.metadata.entry_points()
+                group_entry_points = all_entry_points.get(group, [])
+
+            entry_points[group] = {ep.name: ep.value for ep in group_entry_points}
+
+        self._cached = {'fingerprint': fingerprint, 'entry_points': entry_points}
+        self.changed = True
+        return entry_points
+
+
+_registry = Registry()
+
+
+def get_registry() -> Registry:
+    '''Returns the process-wide registry'''
+    return _registry
@@ -0,0 +1,162 @@
+'''
+Writing screenshots to files: encoder presets, atomic writes and
+saving on a background thread
+'''
+import contextlib
+import itertools
+import os
+import stat
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+# PIL encoder options for each preset, by format. Formats a preset
+# doesn't list are saved with PIL's defaults, which is all 'balanced'
+# does, so the bytes a utility wrote can still be saved as they are.
+PRESETS: typing.Dict[str, typing.Dict[str, typing.Dict[str, typing.Any]]] = {
+    'fast': {
+        'png': {'compress_level': 1},
+        'webp': {'method': 0, 'lossless': False},
+        'jpeg': {'quality': 85, 'subsampling': 2},
+    },
+    'balanced': {},
+    'smallest': {
+        'png': {'compress_level': 9, 'optimize': True},
+        'webp': {'method': 6, 'lossless': False, 'quality': 75},
+        'jpeg': {'quality': 70, 'subsampling': 2, 'optimize': True},
+    },
+}
+DEFAULT_PRESET = 'balanced'
+# Presets that encode the screenshot again rather than saving
+# what the utility wrote as it is
+REENCODING_PRESETS = ('smallest',)
+
+# Numbers temporary files so no two writes share one
+_part_counter = itertools.count()
+
+
+def get_encoder_options(preset: str, image_format: str) -> typing.Dict[str, typing.Any]:
+    '''
+    Returns the PIL encoder options a preset uses for a format.
+    Raises KeyError for a preset that doesn't exist.
+
+    Parameters:
+        str preset: one of PRESETS
+        str image_format: a PIL format name, such as 'png' or 'jpeg'
+    '''
+    return dict(PRESETS[preset].get(image_format.lower(), {}))
+
+
+def get_save_path(filename: str, time_filename: str) -> str:
+    '''
+    Returns where to save a screenshot. A filename without an extension
+    is a directory, which is made if it doesn't exist yet, to save the
+    screenshot in as time_filename.
+    '''
+    if os.path.splitext(filename)[1] != "":
+        return filename
+
+    # If it can't be made, saving the screenshot fails and says so
+    with contextlib.suppress(OSError):
+        os.makedirs(filename)
+
+    return os.path.join(filename, time_filename)
+
+
+def write_atomic(filename: str, data: bytes):
+    '''
+    Writes a file by writing a temporary file next to it and renaming
+    that over it. Nothing ever sees the file half written, and if
+    writing fails a file that was already there is left as it was.
+    A symlink is written through, and a file that's replaced keeps
+    its permissions. Raises OSError if it can't be written.
+    '''
+    # The file a symlink points to is the one replaced, not the symlink
+    filename = os.path.realpath(filename)
+    directory, name = os.path.split(filename)
+    part = os.path.join(directory, f'.{name}.{os.getpid()}-{next(_part_counter)}.part')
+
+    try:
+        mode: typing.Optional[int] = stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        mode = None
+
+    # Created the way open() would, so a new file gets the usual permissions
+    descriptor = os.open(part, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(descriptor, 'wb') as part_file:
+            if mode is not None:
+                os.fchmod(part_file.fileno(), mode)
+            part_file.write(data)
+        os.replace(part, filename)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.unlink(part)
+        raise
+
+
+class BackgroundSaver(object):
+    '''
+    Saves screenshots one at a time on a background thread, in the
+    order they're asked for, so encoding a large one doesn't hold up
+    the caller (such as the GTK main loop). Saves that haven't finished
+    when gscreenshot exits are finished first.
+    '''
+
+    __slots__ = ('_executor', '_lock')
+
+    _executor: typing.Optional['ThreadPoolExecutor']
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, save: typing.Callable[[], bool],
+               on_done: typing.Optional[typing.Callable[[bool], typing.Any]]=None,
+               dispatch: typing.Optional[typing.Callable[..., typing.Any]]=None
+               ) -> 'Future':
+        '''
+        Runs save on the background thread.
+
+        Parameters:
+            save: saves, returning whether it did
+            on_done: called with whether it was saved (False if save raised)
+            dispatch: calls on_done, e.g. GLib.idle_add to call it on the
+                      GTK main thread. It's called on the background
+                      thread if this is None.
+
+        Returns:
+            Future of what save returns
+        '''
+        with self._lock:
+            if self._executor is None:
+                # Only loaded by the frontends that save in the background
+                # pylint: disable=import-outside-toplevel
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix='gscreenshot-save'
+                )
+
+            future = self._executor.submit(save)
+
+        if on_done is not None:
+            def done(finished: 'Future'):
+                saved = finished.exception() is None and bool(finished.result())
+                if dispatch is not None:
+                    dispatch(on_done, saved)
+                else:
+                    on_done(saved)
+
+            future.add_done_callback(done)
+
+        return future
+
+
+_background_saver = BackgroundSaver()
+
+
+def get_background_saver() -> BackgroundSaver:
+    '''Returns the process-wide background saver'''
+    return _background_saver
@@ -1,23 +1,42 @@
 '''
 Interface class for integrating a screenshot utility
 '''
+import io
+import itertools
 import os
+import re
 import subprocess
-import tempfile
+import threading
+import time
 import typing
+from concurrent.futures import ThreadPoolExecutor
 import PIL.Image
 
-from pkg_resources import resource_filename
-from gscreenshot.selector import RegionSelector
+from gscreenshot.cursors import DEFAULT_CURSOR, XFixesCursor, get_cursor_store
+from gscreenshot.selector import NO_SELECTOR, RegionSelector
 from gscreenshot.selector import SelectionExecError, SelectionParseError
 from gscreenshot.selector import SelectionCancelled, NoSupportedSelectorError
 from gscreenshot.selector.factory import SelectorFactory
-from gscreenshot.util import session_is_wayland, GSCapabilities
+from gscreenshot.screenshooter.capture import Capture
+from gscreenshot.screenshooter.image_handle import ImageHandle
+from gscreenshot.screenshooter.outputs import Output, get_output_layout
+from gscreenshot.screenshooter import planner
+from gscreenshot.screenshooter.planner import BackendCapabilities, CapturePlan, CaptureRequest
+from gscreenshot.util import get_runtime_dir
+from gscreenshot.util import GSCapabilities
+from gscreenshot.xconnection import get_x_connection
 
-try:
-    from Xlib import display
-except ImportError:
-    display = None
+# Seconds a backend probe (can_run) may take
+PROBE_TIMEOUT = 1.0
+
+# Numbers temporary capture files so no two captures share one
+_tempfile_counter = itertools.count()
+
+# Binary PPM header: magic, width, height and maxval separated by
+# whitespace (with optional comments), then a single whitespace byte.
+_PPM_HEADER = re.compile(
+    rb'P6(?:\s|#[^\n]*\n)+(\d+)(?:\s|#[^\n]*\n)+(\d+)(?:\s|#[^\n]*\n)+(\d+)\s'
+)
 
 
 class Screenshooter(object):
@@ -25,18 +44,48 @@ class Screenshooter(object):
     Python interface for a screenshooter
     """
 
-    __slots__ = ('_image', 'tempfile', 'selector')
+    __slots__ = ('_image', 'tempfile', 'selector', 'last_region', 'destination_format',
+                 '_processes', '_process_lock', '_cancelled', '_capabilities', '_plan',
+                 '_encoded', '_last_capture', '_session', '_handle')
     __utilityname__: typing.Optional[str] = None
 
+    # Intermediate formats the utility can write its capture in. The
+    # cheapest one (see OUTPUT_FORMAT_PREFERENCE) is requested, unless
+    # the capture can be saved as is in another. Empty for utilities
+    # that capture in-process.
+    _output_formats: typing.Tuple[str, ...] = ('png',)
+
+    OUTPUT_FORMAT_PREFERENCE: typing.Tuple[str, ...] = planner.OUTPUT_FORMAT_PREFERENCE
+
     _image: typing.Optional[PIL.Image.Image]
     tempfile: str
     selector: typing.Optional[RegionSelector]
+    # The region chosen for the last selection capture, if one was
+    last_region: typing.Optional[typing.Tuple[int, int, int, int]]
+    # The format the next capture will be saved in, if known
+    destination_format: typing.Optional[str]
+    # Every utility running now, as outputs can be captured at the same time
+    _processes: typing.Set[subprocess.Popen]
+    _capabilities: typing.Optional[typing.FrozenSet[str]]
+    _plan: typing.Optional[CapturePlan]
+    # (format, bytes) the utility wrote for the last capture, if it
+    # can be saved as is
+    _encoded: typing.Optional[typing.Tuple[str, bytes]]
+    _last_capture: typing.Optional[Capture]
+    # Who else uses _image, see _get_handle
+    _handle: typing.Optional[ImageHandle]
 
     def __init__(self, selector: typing.Optional[RegionSelector]=None):
         """
         constructor
+
+        Parameters:
+            RegionSelector selector: None to use the best one installed,
+                                     or NO_SELECTOR for none
         """
-        if selector is None:
+        if selector is NO_SELECTOR:
+            self.selector = None
+        elif selector is None:
             try:
                 self.selector = SelectorFactory().create()
             except NoSupportedSelectorError:
@@ -45,11 +94,63 @@ class Screenshooter(object):
             self.selector = selector
 
         self._image = None
+        self.last_region = None
+        self.destination_format = None
+        self._capabilities = None
+        self._plan = None
+        self._encoded = None
+        self._processes = set()
+        self._process_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._last_capture = None
+        self._handle = None
+        # Held for the whole of a capture, so captures
+        # from different threads take turns
+        self._session = threading.RLock()
+        self._new_tempfile()
+
+    def _new_tempfile(self):
+        """
+        Picks a new file for the utility to write its capture to. Every
+        capture gets its own, so captures running at the same time
+        (from this process or another) can't overwrite each other's.
+        """
         self.tempfile = os.path.join(
-                tempfile.gettempdir(),
-                str(os.getpid()) + ".png"
+                get_runtime_dir(),
+                f"gscreenshot-{os.getpid()}-{next(_tempfile_counter)}.{self.get_output_format()}"
                 )
 
+    def cancel(self):
+        """
+        Stops a capture running in another thread. A delay that's still
+        running ends, and the utility's processes (or the selector's), if
+        there are any, are killed and the capture comes back empty.
+        Captures that don't run a utility finish, and their result is
+        for the caller to ignore.
+
+        Captures stay cancelled until clear_cancel() is called.
+        """
+        with self._process_lock:
+            self._cancelled.set()
+            for process in self._processes:
+                process.kill()
+
+        if self.selector is not None:
+            self.selector.cancel()
+
+    def clear_cancel(self):
+        """
+        Lets captures run again after cancel()
+        """
+        self._cancelled.clear()
+
+    def _wait(self, delay: typing.Union[int, float, str]):
+        """
+        Waits for the capture delay, or until the capture is cancelled
+        """
+        if float(delay) > 0:
+            self._cancelled.wait(float(delay))
+
     @property
     def image(self) -> typing.Optional[PIL.Image.Image]:
         """
@@ -60,6 +161,69 @@ class Screenshooter(object):
         """
         return self._image
 
+    @property
+    def last_capture(self) -> typing.Optional[Capture]:
+        """
+        Returns the last capture, which unlike image and encoded_image
+        can be used safely while the next one is being taken
+        """
+        return self._last_capture
+
+    @property
+    def encoded_image(self) -> typing.Optional[typing.Tuple[str, bytes]]:
+        """
+        Returns the last screenshot as the utility wrote it, if the
+        capture plan allowed saving it without encoding it again
+
+        Returns:
+            (str format, bytes) or None
+        """
+        return self._encoded
+
+    def get_output_format(self) -> str:
+        """
+        Get the intermediate format to ask the utility for: the one the
+        current capture plan chose, otherwise the cheapest it can produce
+
+        Returns:
+            str, e.g. 'ppm' or 'png'
+        """
+        if self._plan is not None and self._plan.intermediate_format is not None:
+            return self._plan.intermediate_format
+
+        for output_format in self.OUTPUT_FORMAT_PREFERENCE:
+            if output_format in self._output_formats:
+                return output_format
+
+        return self._output_formats[0] if self._output_formats else 'png'
+
+    def _is_passthrough(self) -> bool:
+        """
+        Whether the current capture will be saved as the utility writes
+        it, so it should be written the way it's meant to be kept
+        (e.g. compressed) rather than the way that's fastest to decode
+        """
+        return self._plan is not None and self._plan.encode == planner.ENCODE_PASSTHROUGH
+
+    def get_backend_capabilities(self) -> BackendCapabilities:
+        """
+        Describes what the utility can do, for planning captures.
+        get_capabilities() is only called the first time.
+        """
+        if self._capabilities is None:
+            self._capabilities = frozenset(self.get_capabilities())
+
+        return BackendCapabilities(self._capabilities, self._output_formats)
+
+    def plan(self, request: CaptureRequest) -> CapturePlan:
+        """
+        Returns the cheapest way to carry out the request with this utility
+        """
+        if request.destination_format is None:
+            request.destination_format = self.destination_format
+
+        return planner.make_plan(request, self.get_backend_capabilities())
+
     def get_capabilities(self) -> typing.List[str]:
         """
         Get supported features. Note that under-the-hood the capabilities
@@ -79,7 +243,7 @@ class Screenshooter(object):
         # If we're running, this is the bare minimum
         capabilities.append(GSCapabilities.CAPTURE_FULLSCREEN)
 
-        if display is not None and not session_is_wayland():
+        if get_x_connection().available:
             capabilities.append(GSCapabilities.ALTERNATE_CURSOR)
             capabilities.append(GSCapabilities.CURSOR_CAPTURE)
 
@@ -89,17 +253,14 @@ class Screenshooter(object):
         return capabilities
 
     def grab_fullscreen_(self, delay: int=0, capture_cursor: bool=False,
-                         use_cursor: typing.Optional[PIL.Image.Image]=None):
+                         use_cursor: typing.Optional[PIL.Image.Image]=None) -> Capture:
         '''
         Internal API method for grabbing the full screen. This should not
         be overridden by extending classes. Implement grab_fullscreen instead.
         '''
-        if use_cursor is None and GSCapabilities.CURSOR_CAPTURE in self.get_capabilities():
-            self.grab_fullscreen(delay, capture_cursor)
-        else:
-            self.grab_fullscreen(delay, capture_cursor=False)
-            if capture_cursor:
-                self.add_fake_cursor(use_cursor)
+        return self._run_plan(CaptureRequest(
+            planner.FULLSCREEN, capture_cursor=capture_cursor, use_cursor=use_cursor
+        ), delay)
 
     def grab_fullscreen(self, delay: int=0, capture_cursor: bool=False):
         """
@@ -111,7 +272,7 @@ class Screenshooter(object):
         raise Exception("Not implemented. Fullscreen grab called with delay " + str(delay))
 
     def grab_selection_(self, delay: int=0, capture_cursor: bool=False,
-                        use_cursor: typing.Optional[PIL.Image.Image]=None):
+                        use_cursor: typing.Optional[PIL.Image.Image]=None) -> Capture:
         """
         Internal API method for grabbing a selection. This should not
         be overridden by extending classes. Implement grab_selection instead.
@@ -125,6 +286,26 @@ class Screenshooter(object):
         Parameters:
             int delay: seconds
         """
+        with self._session:
+            started = time.monotonic()
+            previous = self._last_capture
+            self._grab_selection(delay, capture_cursor, use_cursor)
+
+            box = self.last_region
+            if box is None and self._last_capture is not previous and \
+                    self._last_capture is not None:
+                # It fell back to a full screen capture
+                box = self._last_capture.box
+            return self._finish_capture(started, box)
+
+    def _grab_selection(self, delay: int, capture_cursor: bool,
+                        use_cursor: typing.Optional[PIL.Image.Image]):
+        self._new_tempfile()
+        self.last_region = None
+        if self._cancelled.is_set():
+            self._image = None
+            return
+
         if self.selector is None:
             self._grab_selection_fallback(delay, capture_cursor)
             return
@@ -136,6 +317,10 @@ class Screenshooter(object):
             self.grab_fullscreen_(delay, capture_cursor, use_cursor)
             return
         except (OSError, SelectionExecError):
+            if self._cancelled.is_set():
+                # cancel() stopped the selector
+                self._image = None
+                return
             print("Failed to call region selector -- Using fallback region selection")
             self._grab_selection_fallback(delay, capture_cursor)
             return
@@ -144,24 +329,223 @@ class Screenshooter(object):
             self.grab_fullscreen_(delay, capture_cursor, use_cursor)
             return
 
-        self.grab_fullscreen_(delay, capture_cursor, use_cursor)
+        self.last_region = crop_box
+        self.grab_region_(crop_box, delay, capture_cursor, use_cursor)
+
+    def grab_region_(self, box: typing.Tuple[int, int, int, int], delay: int=0,
+                     capture_cursor: bool=False,
+                     use_cursor: typing.Optional[PIL.Image.Image]=None) -> Capture:
+        '''
+        Internal API method for grabbing a region of the screen. This should
+        not be overridden by extending classes. Implement grab_region instead.
+
+        If the utility supports GSCapabilities.REGION_CAPTURE, only the region
+        is captured. Otherwise (or if a cursor has to be stamped on afterwards,
+        which needs the full screen for placement) the full screen is captured
+        and cropped.
+
+        Parameters:
+            (x top left, y top left, x bottom right, y bottom right) box
+            int delay: seconds
+        '''
+        return self._run_plan(CaptureRequest(
+            planner.REGION, box, capture_cursor=capture_cursor, use_cursor=use_cursor
+        ), delay)
+
+    def grab_region(self, box: typing.Tuple[int, int, int, int], delay: int=0,
+                    capture_cursor: bool=False):
+        """
+        Takes a screenshot of a region of the screen with a given delay.
+        Utilities that implement this should also report
+        GSCapabilities.REGION_CAPTURE.
+
+        Parameters:
+            (x top left, y top left, x bottom right, y bottom right) box
+            int delay, in seconds
+        """
+        raise NotImplementedError("Region grab called with box " + str(box))
+
+    def get_outputs(self) -> typing.List[Output]:
+        """
+        Get the outputs (monitors) that can be captured individually
+        """
+        return get_output_layout().get_outputs()
+
+    def grab_output_(self, output_name: str, delay: int=0, capture_cursor: bool=False,
+                     use_cursor: typing.Optional[PIL.Image.Image]=None) -> Capture:
+        '''
+        Internal API method for grabbing a single output by name. This should
+        not be overridden by extending classes. Implement capture_output instead.
+
+        Utilities without GSCapabilities.OUTPUT_CAPTURE capture the output's
+        region of the screen.
+        '''
+        for output in self.get_outputs():
+            if output.name == output_name:
+                return self._run_plan(CaptureRequest(
+                    planner.OUTPUT, output.get_box(), output, capture_cursor, use_cursor
+                ), delay)
+
+        print(f"Output {output_name} was not found")
+        with self._session:
+            self._image = None
+            self._encoded = None
+            return self._finish_capture(time.monotonic())
+
+    def grab_outputs_(self, delay: int=0, capture_cursor: bool=False,
+                      use_cursor: typing.Optional[PIL.Image.Image]=None
+                      ) -> typing.Dict[str, typing.Optional[PIL.Image.Image]]:
+        '''
+        Internal API method for grabbing every output into its own image.
+        This should not be overridden by extending classes.
+
+        Utilities with GSCapabilities.OUTPUT_CAPTURE capture all the outputs
+        at the same time. Otherwise the full screen is captured once and
+        cropped to each output, since every region would come out of the
+        same framebuffer anyway. Either way the last capture stays as it was.
+
+        Returns:
+            {output name: PIL.Image or None}
+        '''
+        outputs = self.get_outputs()
+        if not outputs:
+            return {"screen0": self._grab_fullscreen_aside(delay, capture_cursor, use_cursor)}
+
+        plan = self.plan(CaptureRequest(planner.OUTPUT, capture_cursor=capture_cursor,
+                                        use_cursor=use_cursor))
+        if plan.capture == planner.OUTPUT:
+            self._wait(delay)
+            with ThreadPoolExecutor(max_workers=len(outputs)) as executor:
+                images = executor.map(
+                    lambda output: self.capture_output(output, capture_cursor),
+                    outputs
+                )
+                return dict(zip([output.name for output in outputs], images))
+
+        full_image = self._grab_fullscreen_aside(delay, capture_cursor, use_cursor)
 
-        if self._image is not None:
-            self._image = self._image.crop(crop_box)
+        return {
+            output.name: full_image.crop(output.get_box()) if full_image is not None else None
+            for output in outputs
+        }
+
+    def _grab_fullscreen_aside(self, delay: int, capture_cursor: bool,
+                               use_cursor: typing.Optional[PIL.Image.Image]
+                               ) -> typing.Optional[PIL.Image.Image]:
+        '''
+        Captures the full screen and returns the image, leaving
+        the screenshot and the last capture as they were
+        '''
+        with self._session:
+            saved = (self._image, self._encoded, self._last_capture, self._handle)
+            # Kept away from the capture, which would otherwise let them go
+            self._last_capture = None
+            self._handle = None
+            try:
+                return self.grab_fullscreen_(delay, capture_cursor, use_cursor).image
+            finally:
+                if self._last_capture is not None:
+                    self._last_capture.release()
+                if self._handle is not None:
+                    self._handle.release()
+                self._image, self._encoded, self._last_capture, self._handle = saved
+
+    def capture_output(self, output: Output, capture_cursor: bool=False
+                       ) -> typing.Optional[PIL.Image.Image]:
+        """
+        Captures a single output and returns the image. Utilities that
+        implement this should also report GSCapabilities.OUTPUT_CAPTURE.
+
+        Unlike the grab methods this must not touch self._image, as
+        several outputs can be captured at once from different threads.
+
+        Parameters:
+            Output output
+        """
+        raise NotImplementedError("Output capture called for " + str(output))
 
     def grab_window_(self, delay: int=0, capture_cursor: bool=False,
-                     use_cursor: typing.Optional[PIL.Image.Image]=None):
+                     use_cursor: typing.Optional[PIL.Image.Image]=None) -> Capture:
         '''
         Internal API method for grabbing a window. This should not
         be overridden by extending classes. Implement grab_window instead.
 
         '''
-        if use_cursor is None and GSCapabilities.CURSOR_CAPTURE in self.get_capabilities():
-            self.grab_window(delay, capture_cursor)
-        else:
-            self.grab_window(delay, capture_cursor=False)
-            if capture_cursor:
-                self.add_fake_cursor(use_cursor)
+        return self._run_plan(CaptureRequest(
+            planner.WINDOW, capture_cursor=capture_cursor, use_cursor=use_cursor
+        ), delay)
+
+    def _run_plan(self, request: CaptureRequest, delay: int=0) -> Capture:
+        '''
+        Plans the request and carries the plan out
+        '''
+        with self._session:
+            started = time.monotonic()
+            self._carry_out(self.plan(request), request, delay)
+
+            box = None
+            if request.target in (planner.REGION, planner.OUTPUT):
+                box = request.box
+            elif request.target == planner.FULLSCREEN and self._image is not None:
+                box = (0, 0, self._image.size[0], self._image.size[1])
+            return self._finish_capture(started, box)
+
+    def _carry_out(self, plan: CapturePlan, request: CaptureRequest, delay: int):
+        self._plan = plan
+        self._encoded = None
+        self._new_tempfile()
+        if self._cancelled.is_set():
+            self._plan = None
+            self._image = None
+            return
+
+        try:
+            if plan.capture == planner.OUTPUT and request.output is not None:
+                self._wait(delay)
+                self._image = self.capture_output(request.output, plan.native_cursor)
+            elif plan.capture == planner.REGION and request.box is not None:
+                self.grab_region(request.box, delay, plan.native_cursor)
+            elif plan.capture == planner.WINDOW:
+                self.grab_window(delay, plan.native_cursor)
+            else:
+                self.grab_fullscreen(delay, plan.native_cursor)
+        finally:
+            self._plan = None
+
+        if plan.cursor == planner.CURSOR_COMPOSITED:
+            self.add_fake_cursor(request.use_cursor)
+
+        if plan.crop and request.box is not None and self._image is not None and \
+                request.box != (0, 0, self._image.size[0], self._image.size[1]):
+            self._image = self._image.crop(request.box)
+            self._encoded = None
+
+    def _finish_capture(self, started: float,
+                        box: typing.Optional[typing.Tuple[int, int, int, int]]=None
+                        ) -> Capture:
+        '''
+        Records what the capture that started at the
+        given time produced as the last capture
+        '''
+        return self._keep_capture(Capture(
+            self._image,
+            box,
+            self.__utilityname__ or self.__class__.__name__,
+            started,
+            time.monotonic(),
+            encoded=self._encoded,
+            share=self._share_image()
+        ))
+
+    def _keep_capture(self, capture: Capture) -> Capture:
+        '''
+        Makes the capture the last capture, and has the one it
+        replaces give back its share of the screenshot
+        '''
+        if self._last_capture is not None:
+            self._last_capture.release()
+        self._last_capture = capture
+        return capture
 
     def grab_window(self, delay: int=0, capture_cursor: bool=False):
         """
@@ -179,22 +563,43 @@ class Screenshooter(object):
     @staticmethod
     def can_run() -> bool:
         """
-        Whether this utility can run
+        Whether this utility can run. Subprocesses run here should use
+        PROBE_TIMEOUT and let subprocess.TimeoutExpired propagate, so a
+        utility that hangs isn't remembered as unusable.
         """
         return False
 
+    @classmethod
+    def get_probe_features(cls) -> typing.Dict[str, typing.Any]:
+        """
+        Returns anything can_run() detected about the utility (such as
+        which options its version supports), so it can be cached with
+        the probe result. Must be JSON serializable.
+        """
+        return {}
+
+    @classmethod
+    def set_probe_features(cls, features: typing.Dict[str, typing.Any]):
+        """
+        Restores features returned by get_probe_features() when
+        can_run() is answered from the cache instead of being called
+        """
+
     def get_cursor_position(self) -> typing.Optional[typing.Tuple[int, int]]:
         """
         Gets the current position of the mouse cursor, if able.
         Returns (x, y) or None.
         """
-        if display is None:
+        connection = get_x_connection()
+        if not connection.available:
             return None
 
         try:
-            # This is a ctype
-            # pylint: disable=protected-access
-            mouse_data = display.Display().screen().root.query_pointer()._data
+            # The connection stays open for the next query
+            with connection.use() as xdisplay:
+                # This is a ctype
+                # pylint: disable=protected-access
+                mouse_data = xdisplay.screen().root.query_pointer()._data
             if 'root_x' not in mouse_data or 'root_y' not in mouse_data:
                 return None
         # pylint: disable=bare-except
@@ -210,38 +615,39 @@ class Screenshooter(object):
         Stamps a fake cursor onto the screenshot.
         This is intended for use with screenshot backends that don't
         capture the cursor (or don't capture the cursor in some scenarios)
+
+        Without a cursor image, the cursor that's showing is stamped if
+        it can be read with XFixes, and the default cursor otherwise.
+
+        The screenshot is changed in place, unless it's already been
+        shared (with last_capture), in which case it's copied first.
         """
-        if self._image is None:
+        handle = self._get_handle()
+        if handle is None:
             return
 
+        cursors = get_cursor_store()
+        if cursor_img is None or cursors.xfixes.is_live(cursor_img):
+            if self._add_live_cursor(handle, cursors.xfixes):
+                return
+            cursor_img = None
+
         cursor_pos = self.get_cursor_position()
         if cursor_pos is None:
             print("Unable to get cursor position - is xlib available?")
             return
 
-        fname = resource_filename(
-                  'gscreenshot.resources.pixmaps', 'cursor-adwaita.png'
-                )
-
         if cursor_img is None:
-            cursor_img = PIL.Image.open(fname)
+            cursor_img = cursors.get(DEFAULT_CURSOR)
 
-        screenshot_img = self._image.copy()
+        screenshot_img = handle.writable()
 
         screenshot_width, screenshot_height = screenshot_img.size
 
-        # scale the cursor stamp to a reasonable size
+        # scale the cursor stamp to a reasonable size, the same
+        # scaled copy is reused for screenshots of the same size
         cursor_size_ratio = min(max(screenshot_width / 2000, .3), max(screenshot_height / 2000, .3))
-        cursor_height = cursor_img.size[0] * cursor_size_ratio
-        cursor_width = cursor_img.size[1] * cursor_size_ratio
-
-        antialias_algo = None
-        try:
-            antialias_algo = PIL.Image.Resampling.LANCZOS
-        except AttributeError: # PIL < 9.0
-            antialias_algo = PIL.Image.ANTIALIAS
-
-        cursor_img.thumbnail((int(cursor_width), int(cursor_height)), antialias_algo)
+        cursor_img = cursors.get_scaled(cursor_img, cursor_size_ratio)
 
         # If the cursor glyph is square, adjust its position slightly so it
         # shows up where expected.
@@ -256,6 +662,49 @@ class Screenshooter(object):
         # a black box.
         screenshot_img.paste(cursor_img, cursor_pos, cursor_img)
         self._image = screenshot_img
+        self._encoded = None
+
+    def _add_live_cursor(self, handle: ImageHandle, xfixes: XFixesCursor) -> bool:
+        '''
+        Stamps the cursor that's showing now onto the screenshot, at its
+        own size with its hotspot on the pointer. Returns False if it
+        can't be read.
+        '''
+        live = xfixes.get()
+        if live is None:
+            return False
+
+        sprite, hotspot, position = live
+        screenshot_img = handle.writable()
+        screenshot_img.paste(sprite, (position[0] - hotspot[0], position[1] - hotspot[1]), sprite)
+        self._image = screenshot_img
+        self._encoded = None
+        return True
+
+    def _get_handle(self) -> typing.Optional[ImageHandle]:
+        '''
+        Returns the handle to the screenshot, or None if there isn't one.
+        A screenshot the handle hasn't seen is one the utility just made,
+        which nothing else uses yet.
+        '''
+        if self._image is None:
+            return None
+
+        if self._handle is None or self._handle.image is not self._image:
+            if self._handle is not None:
+                self._handle.release()
+            self._handle = ImageHandle(self._image)
+
+        return self._handle
+
+    def _share_image(self) -> typing.Optional[ImageHandle]:
+        '''
+        Returns a share of the screenshot for a Capture, or None if there
+        isn't a screenshot. Changing the screenshot while the Capture
+        holds it copies it.
+        '''
+        handle = self._get_handle()
+        return handle.share() if handle is not None else None
 
     def _grab_selection_fallback(self, delay: int=0, capture_cursor: bool=False):
         """
@@ -268,22 +717,121 @@ class Screenshooter(object):
         self.grab_fullscreen(delay, capture_cursor)
 
     def _call_screenshooter(self, screenshooter: str,
-                            params: typing.Optional[typing.List[str]]= None) -> bool:
+                            params: typing.Optional[typing.List[str]]= None,
+                            read_stdout: bool=False) -> bool:
+        """
+        Runs a screenshot utility and loads the image it produced.
+
+        If read_stdout is set, the utility is expected to write the image
+        to its standard output and it is decoded straight from that buffer.
+        Otherwise the utility should write to self.tempfile, which lives in
+        the runtime directory (usually a tmpfs), is different for every
+        capture and is removed after loading.
+
+        The utility can be stopped from another thread with cancel().
+        """
+
+        self._image, encoded = self._run_utility(
+            screenshooter, params, read_stdout, self._is_passthrough()
+        )
+        self._encoded = None
+        if self._image is not None and encoded is not None:
+            self._encoded = (self.get_output_format(), encoded)
+
+        return self._image is not None
+
+    def _run_screenshooter(self, screenshooter: str,
+                           params: typing.Optional[typing.List[str]]= None,
+                           read_stdout: bool=False) -> typing.Optional[PIL.Image.Image]:
+        """
+        Runs a screenshot utility and returns the image it produced, or
+        None if it failed. See _call_screenshooter.
+        """
+        return self._run_utility(screenshooter, params, read_stdout)[0]
+
+    def _run_utility(self, screenshooter: str,
+                     params: typing.Optional[typing.List[str]]= None,
+                     read_stdout: bool=False, keep_encoded: bool=False
+                     ) -> typing.Tuple[typing.Optional[PIL.Image.Image], typing.Optional[bytes]]:
+        """
+        Runs a screenshot utility. Returns the image it produced (None if
+        it failed) and, if keep_encoded is set, the file it wrote.
+        """
 
         # This is safer than defaulting to []
         if params is None:
             params = []
 
         params = [screenshooter] + params
+        tempfile = self.tempfile
         try:
-            subprocess.check_output(params)
-            self._image = PIL.Image.open(self.tempfile)
-            os.unlink(self.tempfile)
-        except (subprocess.CalledProcessError, IOError, OSError):
-            self._image = None
-            return False
+            output = self._run_process(params)
+            if output is None:
+                return None, None
+
+            if read_stdout:
+                return self._decode_image(output), output if keep_encoded else None
+
+            if keep_encoded:
+                with open(tempfile, 'rb') as capture:
+                    encoded = capture.read()
+                return self._decode_image(encoded), encoded
+
+            image = PIL.Image.open(tempfile)
+            image.load()
+            return image, None
+        except (IOError, OSError, ValueError):
+            return None, None
+        finally:
+            if not read_stdout:
+                try:
+                    os.unlink(tempfile)
+                except OSError:
+                    pass
+
+    def _run_process(self, params: typing.List[str]) -> typing.Optional[bytes]:
+        """
+        Runs the utility and returns its standard output, or None if it
+        failed or was cancelled
+        """
+        with self._process_lock:
+            if self._cancelled.is_set():
+                return None
+            # It's killed by cancel() or waited on below
+            # pylint: disable=consider-using-with
+            process = subprocess.Popen(params, stdout=subprocess.PIPE)
+            self._processes.add(process)
 
-        return True
+        try:
+            output, _ = process.communicate()
+        finally:
+            with self._process_lock:
+                self._processes.discard(process)
+                cancelled = self._cancelled.is_set()
+
+        if cancelled or process.returncode != 0:
+            return None
+
+        return output
+
+    @staticmethod
+    def _decode_image(data: bytes) -> PIL.Image.Image:
+        """
+        Decodes an image held in memory. 8-bit binary PPM is unpacked
+        with frombuffer rather than going through the PPM codec. PIL
+        can't map RGB pixels, so they're still copied once.
+        """
+        ppm_header = _PPM_HEADER.match(data)
+        if ppm_header is not None and int(ppm_header.group(3)) == 255:
+            size = (int(ppm_header.group(1)), int(ppm_header.group(2)))
+            return PIL.Image.frombuffer(
+                "RGB", size, memoryview(data)[ppm_header.end():], # type: ignore
+                "raw", "RGB", 0, 1
+            )
+
+        image = PIL.Image.open(io.BytesIO(data))
+        image.load()
+        return image
 
     def __repr__(self) -> str:
         return f'{self.__class__.__name__}(selector={self.selector})'
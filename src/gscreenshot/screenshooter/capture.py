@@ -0,0 +1,88 @@
+'''
+The result of a single capture
+'''
+import typing
+
+if typing.TYPE_CHECKING:
+    from PIL import Image
+    from gscreenshot.screenshooter.image_handle import ImageHandle
+
+
+class Capture(object):
+    '''
+    What one capture produced. Captures don't change once they're made,
+    so one can be saved or handed to another thread while the next
+    capture is being taken.
+
+    A changed image (such as a cropped one) is a new Capture, see
+    with_image.
+
+    A screenshooter's last capture holds a share of the screenshooter's
+    image, so the screenshooter copies it rather than change it in place.
+    The share is released once the capture is replaced.
+    '''
+
+    __slots__ = ('image', 'box', 'backend', 'started', 'finished', 'encoded', '_share')
+
+    image: typing.Optional['Image.Image']
+    # (x top left, y top left, x bottom right, y bottom right) of the
+    # screen area captured, if it's known
+    box: typing.Optional[typing.Tuple[int, int, int, int]]
+    # The name of the utility that captured it
+    backend: typing.Optional[str]
+    # time.monotonic() when the capture started (including any delay
+    # and selection) and finished
+    started: float
+    finished: float
+    # (format, bytes) the utility wrote, if the image can be saved as is
+    encoded: typing.Optional[typing.Tuple[str, bytes]]
+    _share: typing.Optional['ImageHandle']
+
+    def __init__(self, image: typing.Optional['Image.Image'],
+                 box: typing.Optional[typing.Tuple[int, int, int, int]]=None,
+                 backend: typing.Optional[str]=None, started: float=0.0,
+                 finished: float=0.0, *,
+                 encoded: typing.Optional[typing.Tuple[str, bytes]]=None,
+                 share: typing.Optional['ImageHandle']=None):
+        # pylint: disable=too-many-arguments
+        object.__setattr__(self, 'image', image)
+        object.__setattr__(self, 'box', box)
+        object.__setattr__(self, 'backend', backend)
+        object.__setattr__(self, 'started', started)
+        object.__setattr__(self, 'finished', finished)
+        object.__setattr__(self, 'encoded', encoded if image is not None else None)
+        object.__setattr__(self, '_share', share)
+
+    def __setattr__(self, name: str, value: typing.Any):
+        raise AttributeError(f"Capture.{name} can't be changed")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"Capture.{name} can't be changed")
+
+    @property
+    def latency(self) -> float:
+        '''Seconds the capture took'''
+        return max(0.0, self.finished - self.started)
+
+    def release(self):
+        '''
+        Gives back the capture's share of the screenshooter's image, if
+        it holds one. The image stays readable, but the screenshooter may
+        change it in place from then on.
+        '''
+        if self._share is not None:
+            self._share.release()
+
+    def with_image(self, image: typing.Optional['Image.Image'],
+                   box: typing.Optional[typing.Tuple[int, int, int, int]]=None) -> 'Capture':
+        '''
+        Returns a copy of this capture with another image. What the
+        utility wrote no longer matches it, so it isn't kept.
+        '''
+        return Capture(image, box if box is not None else self.box, self.backend,
+                       self.started, self.finished)
+
+    def __repr__(self) -> str:
+        return (f'Capture(box={self.box!r}, backend={self.backend!r}, '
+                f'latency={self.latency:.3f}, '
+                f'encoded={self.encoded[0] if self.encoded is not None else None!r})')
@@ -2,52 +2,134 @@
 Utilities for selecting a screenshot utility
 '''
 
+import concurrent.futures
+import time
 import typing
-from gscreenshot.screenshooter import Screenshooter
-from gscreenshot.screenshooter.grim import Grim
-from gscreenshot.screenshooter.imagemagick import ImageMagick
-from gscreenshot.screenshooter.imlib_2 import Imlib2
-from gscreenshot.screenshooter.pil import PILWrapper
-from gscreenshot.screenshooter.scrot import Scrot
-from gscreenshot.screenshooter.xdg_desktop_portal import XdgDesktopPortal
+from gscreenshot.screenshooter import Screenshooter, PROBE_TIMEOUT
 from gscreenshot.screenshooter.exceptions import NoSupportedScreenshooterError
-from gscreenshot.util import session_is_wayland
+from gscreenshot.selector import NO_SELECTOR, RegionSelector, NoSupportedSelectorError
+from gscreenshot.selector.factory import SelectorFactory
+from gscreenshot.probe_cache import ProbeCache
+from gscreenshot.backend_stats import BackendStats
+from gscreenshot.registry import BackendInfo, Registry, get_registry
+
+# Upper bound on probes running at once
+MAX_PROBE_WORKERS = 8
+
 
 class ScreenshooterFactory(object):
     '''Selects and instantiates a usable screenshot class'''
 
-    def __init__(self, screenshooter:typing.Optional[Screenshooter]=None):
+    def __init__(self, screenshooter:typing.Optional[Screenshooter]=None,
+                 probe_cache:typing.Optional[ProbeCache]=None,
+                 registry:typing.Optional[Registry]=None,
+                 stats:typing.Optional[BackendStats]=None):
         self.screenshooter:typing.Optional[Screenshooter] = screenshooter
-        self.xorg_screenshooters = [
-                Scrot,
-                ImageMagick,
-                PILWrapper,
-                Imlib2,
-                XdgDesktopPortal
-                ]
-
-        self.wayland_screenshooters = [
-                Grim,
-                XdgDesktopPortal,
-                ]
-
-        self.screenshooters:list = []
-
-        if session_is_wayland():
-            self.screenshooters = self.wayland_screenshooters
-        else:
-            self.screenshooters = self.xorg_screenshooters
+        self.probe_cache:ProbeCache = probe_cache if probe_cache is not None else ProbeCache()
+        self.registry:Registry = registry if registry is not None else get_registry()
+        self.stats:typing.Optional[BackendStats] = stats
+        # The backend create() chose, if it chose one
+        self.backend:typing.Optional[BackendInfo] = None
+
+        # Most preferred first. Each is only imported if it gets checked.
+        self.screenshooters:typing.List[BackendInfo] = []
+        if screenshooter is None:
+            self.screenshooters = self.registry.get_screenshooters()
+            if stats is not None:
+                self.screenshooters = stats.rank(self.screenshooters)
 
     def create(self) -> Screenshooter:
         '''Returns a screenshooter instance'''
         if self.screenshooter is not None:
             return self.screenshooter
 
-        for shooter in self.screenshooters:
-            if shooter.can_run():
-                return shooter()
+        # Answer from the cache for as long as it knows the result
+        for index, backend in enumerate(self.screenshooters):
+            cached = self.probe_cache.lookup(backend)
+            if cached is None:
+                return self._probe_concurrently(self.screenshooters[index:])
+
+            if cached:
+                self.backend = backend
+                return backend.load()(self._create_selector())
+
+        raise self._get_unsupported_error()
+
+    def _probe_concurrently(self, screenshooters: typing.List[BackendInfo]) -> Screenshooter:
+        '''
+        Probes the screenshooters and the selector at the same time.
+        The first screenshooter in preference order that can run is
+        used. Probes still running after PROBE_TIMEOUT count as failed.
+        '''
+        pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(len(screenshooters) + 1, MAX_PROBE_WORKERS)
+        )
+        selector_future = pool.submit(self._create_selector)
+        futures = [pool.submit(self._probe, shooter) for shooter in screenshooters]
+        deadline = time.monotonic() + PROBE_TIMEOUT
+
+        try:
+            for future in futures:
+                probed = self._get_result(future, deadline)
+                if probed is not None and probed[1]:
+                    self.backend = probed[0]
+                    # A selector that's still being looked for isn't waited on
+                    selector = self._get_result(selector_future, deadline)
+                    return probed[0].load()(selector if selector is not None else NO_SELECTOR)
+        finally:
+            for future in futures:
+                future.cancel()
+            # Don't wait on a hung probe. Its subprocess has its own timeout.
+            pool.shutdown(wait=False)
+
+        raise self._get_unsupported_error()
+
+    def _probe(self, backend: BackendInfo) -> typing.Tuple[BackendInfo, bool]:
+        '''Loads and probes a screenshooter. Runs on the probe pool.'''
+        return backend, self.probe_cache.probe(backend)
+
+    def create_alternatives(self, exclude: typing.Iterable[BackendInfo],
+                            selector: typing.Optional[RegionSelector]=None
+                            ) -> typing.Iterator[typing.Tuple[BackendInfo, Screenshooter]]:
+        '''
+        Yields the other usable, healthy screenshooters in order of
+        preference, for retrying a capture that failed. Each is only
+        loaded and probed (if the probe cache doesn't know it) when the
+        one before it has failed too.
+
+        Parameters:
+            exclude: backends that were already tried
+            RegionSelector selector: given to each screenshooter,
+                                     None if there isn't one
+        '''
+        excluded = list(exclude)
+        for backend in self.screenshooters:
+            if backend in excluded:
+                continue
+
+            if self.stats is not None and not self.stats.is_healthy(backend.name):
+                continue
+
+            if self.probe_cache.can_run(backend):
+                yield backend, backend.load()(selector if selector is not None else NO_SELECTOR)
+
+    @staticmethod
+    def _get_result(future: concurrent.futures.Future, deadline: float) -> typing.Any:
+        '''Returns the future's result, or None if it missed the deadline'''
+        try:
+            return future.result(timeout=max(0, deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            return None
+
+    def _create_selector(self) -> RegionSelector:
+        '''Returns the selector to use, or NO_SELECTOR if none is installed'''
+        try:
+            return SelectorFactory(registry=self.registry).create()
+        except NoSupportedSelectorError:
+            return NO_SELECTOR
 
-        raise NoSupportedScreenshooterError(
+    def _get_unsupported_error(self) -> NoSupportedScreenshooterError:
+        return NoSupportedScreenshooterError(
                 "No supported screenshot backend available",
-                [x.__utilityname__ for x in self.screenshooters if x.__utilityname__ is not None]
+                [x.name for x in self.screenshooters]
                 )
@@ -1,12 +1,11 @@
 '''
 Integration for the grim screenshot utility
 '''
-from time import sleep
 import subprocess
 import typing
 
 from gscreenshot.util import find_executable, GSCapabilities
-from gscreenshot.screenshooter import Screenshooter
+from gscreenshot.screenshooter import Screenshooter, PROBE_TIMEOUT
 
 
 class Grim(Screenshooter):
@@ -15,12 +14,13 @@ class Grim(Screenshooter):
     """
 
     __utilityname__ = "grim"
+    _output_formats = ('ppm', 'png')
 
-    def __init__(self):
+    def __init__(self, selector=None):
         """
         constructor
         """
-        Screenshooter.__init__(self)
+        Screenshooter.__init__(self, selector)
 
     def grab_fullscreen(self, delay=0, capture_cursor=False):
         """
@@ -29,13 +29,53 @@ class Grim(Screenshooter):
         Parameters:
             int delay, in seconds
         """
-        sleep(delay)
-        params = [self.tempfile]
+        self._wait(delay)
+        params = self._get_format_params()
 
         if capture_cursor:
-            params = ['-c', self.tempfile]
+            params = ['-c'] + params
 
-        self._call_screenshooter('grim', params)
+        self._call_screenshooter('grim', params + ['-'], read_stdout=True)
+
+    def grab_region(self, box, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of a region of the screen with a given delay
+
+        Parameters:
+            (x top left, y top left, x bottom right, y bottom right) box
+            int delay, in seconds
+        """
+        self._wait(delay)
+        geometry = f"{box[0]},{box[1]} {box[2] - box[0]}x{box[3] - box[1]}"
+        params = ['-g', geometry] + self._get_format_params()
+
+        if capture_cursor:
+            params = ['-c'] + params
+
+        self._call_screenshooter('grim', params + ['-'], read_stdout=True)
+
+    def capture_output(self, output, capture_cursor=False):
+        """
+        Captures a single output by name
+
+        Parameters:
+            Output output
+        """
+        params = ['-o', output.name] + self._get_format_params()
+
+        if capture_cursor:
+            params = ['-c'] + params
+
+        return self._run_screenshooter('grim', params + ['-'], read_stdout=True)
+
+    def _get_format_params(self) -> typing.List[str]:
+        '''Params requesting the negotiated output format'''
+        output_format = self.get_output_format()
+        if output_format == 'png' and not self._is_passthrough():
+            # The PNG is only decoded again by PIL, so skip compression
+            return ['-t', 'png', '-l', '0']
+
+        return ['-t', output_format]
 
     @staticmethod
     def can_run() -> bool:
@@ -44,9 +84,10 @@ class Grim(Screenshooter):
             return False
 
         # Grim doesn't work in all situations. In some we would rather
-        # use the xdg-desktop-portal method so we'll do another check
+        # use the xdg-desktop-portal method so we'll do another check.
+        # PPM skips compressing an image that's thrown away.
         try:
-            subprocess.check_output(["grim", "-"])
+            subprocess.check_output(["grim", "-t", "ppm", "-"], timeout=PROBE_TIMEOUT)
         except subprocess.CalledProcessError:
             return False
 
@@ -57,5 +98,7 @@ class Grim(Screenshooter):
         Get supported features
         """
         return [
-            GSCapabilities.CURSOR_CAPTURE
+            GSCapabilities.CURSOR_CAPTURE,
+            GSCapabilities.REGION_CAPTURE,
+            GSCapabilities.OUTPUT_CAPTURE
         ]
@@ -0,0 +1,247 @@
+'''
+Hedged captures: runs a second backend when the first is slow
+'''
+import queue
+import threading
+import time
+import typing
+
+import PIL.Image
+
+from gscreenshot.screenshooter import Screenshooter
+from gscreenshot.screenshooter.capture import Capture
+from gscreenshot.screenshooter.outputs import Output
+from gscreenshot.screenshooter.planner import BackendCapabilities
+from gscreenshot.selector import NO_SELECTOR
+from gscreenshot.util import GSCapabilities
+
+# Seconds to wait for the primary backend when there's no
+# latency history to pick a budget from
+DEFAULT_BUDGET = 0.5
+
+
+class HedgeOutcome(object):
+    '''
+    How one of the screenshooters did in a hedged capture
+    '''
+
+    __slots__ = ('screenshooter', 'success', 'latency')
+
+    def __init__(self, screenshooter: Screenshooter, success: bool,
+                 latency: typing.Optional[float]):
+        '''
+        Parameters:
+            Screenshooter screenshooter: the primary or the secondary
+            bool success: whether it didn't fail. A primary that was
+                          still running when the secondary won hadn't.
+            float latency: seconds it took, or had taken when it was
+                           cancelled
+        '''
+        self.screenshooter = screenshooter
+        self.success = success
+        self.latency = latency
+
+    def __repr__(self) -> str:
+        return (f'HedgeOutcome(screenshooter={self.screenshooter!r}, '
+                f'success={self.success}, latency={self.latency!r})')
+
+
+class HedgedScreenshooter(Screenshooter):  # pylint: disable=abstract-method
+    """
+    Captures with a primary screenshooter and, if it hasn't produced an
+    image within the budget (or failed), with a secondary one as well.
+    Whichever finishes first with an image wins and the other is
+    cancelled.
+
+    Only the capture itself is hedged. Region selection happens once,
+    beforehand, and the selected region is captured by both.
+    """
+
+    primary: Screenshooter
+    secondary: Screenshooter
+    budget: float
+    # The backend name the secondary's outcomes are recorded under
+    secondary_name: typing.Optional[str]
+    # How each screenshooter that ran did in the last capture
+    outcomes: typing.List[HedgeOutcome]
+
+    def __init__(self, primary: Screenshooter, secondary: Screenshooter,
+                 budget: float=DEFAULT_BUDGET, secondary_name: typing.Optional[str]=None):
+        """
+        constructor
+        """
+        Screenshooter.__init__(
+            self, primary.selector if primary.selector is not None else NO_SELECTOR
+        )
+        self.primary = primary
+        self.secondary = secondary
+        self.budget = budget
+        self.secondary_name = secondary_name
+        self.outcomes = []
+        self.__utilityname__ = f"{self._get_name(primary)}+{self._get_name(secondary)}"
+        self._threads: typing.List[threading.Thread] = []
+
+    def get_capabilities(self) -> typing.List[str]:
+        '''List of capabilities'''
+        return self.primary.get_capabilities()
+
+    def get_backend_capabilities(self) -> BackendCapabilities:
+        # Both run the primary's plan, so only the primary's
+        # capabilities count. The secondary re-encodes if it has to.
+        return self.primary.get_backend_capabilities()
+
+    def grab_fullscreen_(self, delay: int=0, capture_cursor: bool=False,
+                         use_cursor: typing.Optional[PIL.Image.Image]=None) -> Capture:
+        return self._hedge(lambda screenshooter: screenshooter.grab_fullscreen_(
+            0, capture_cursor, use_cursor
+        ), delay)
+
+    def grab_region_(self, box: typing.Tuple[int, int, int, int], delay: int=0,
+                     capture_cursor: bool=False,
+                     use_cursor: typing.Optional[PIL.Image.Image]=None) -> Capture:
+        return self._hedge(lambda screenshooter: screenshooter.grab_region_(
+            box, 0, capture_cursor, use_cursor
+        ), delay)
+
+    def grab_window_(self, delay: int=0, capture_cursor: bool=False,
+                     use_cursor: typing.Optional[PIL.Image.Image]=None) -> Capture:
+        if GSCapabilities.WINDOW_SELECTION in self.primary.get_capabilities():
+            # The utility picks the window itself, so it can't be hedged
+            with self._session:
+                self._settle()
+                return self._adopt(self.primary.grab_window_(delay, capture_cursor, use_cursor))
+
+        return Screenshooter.grab_window_(self, delay, capture_cursor, use_cursor)
+
+    def capture_output(self, output: Output, capture_cursor: bool=False
+                       ) -> typing.Optional[PIL.Image.Image]:
+        return self.primary.capture_output(output, capture_cursor)
+
+    def _grab_selection_fallback(self, delay: int=0, capture_cursor: bool=False):
+        self._settle()
+        self._adopt(self.primary.grab_selection_(delay, capture_cursor))
+
+    def cancel(self):
+        Screenshooter.cancel(self)
+        self.primary.cancel()
+        self.secondary.cancel()
+
+    def clear_cancel(self):
+        Screenshooter.clear_cancel(self)
+        self.primary.clear_cancel()
+        self.secondary.clear_cancel()
+
+    def _settle(self):
+        '''
+        Waits for the captures the last hedge cancelled, then lets
+        both screenshooters capture again unless this was cancelled
+        '''
+        # Cancelled captures finish quickly. Waiting for them means a
+        # screenshooter never runs two captures at once.
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        if not self._cancelled.is_set():
+            self.primary.clear_cancel()
+            self.secondary.clear_cancel()
+
+    def _adopt(self, capture: Capture,
+               started: typing.Optional[float]=None) -> Capture:
+        '''
+        Takes on a capture one of the screenshooters made, as
+        having started at the given time if there is one
+        '''
+        self._image = capture.image
+        self._encoded = capture.encoded
+        return self._keep_capture(Capture(
+            capture.image, capture.box, capture.backend,
+            started if started is not None else capture.started, capture.finished,
+            encoded=capture.encoded, share=self._share_image()
+        ))
+
+    def _hedge(self, grab: typing.Callable[[Screenshooter], Capture], delay: int) -> Capture:
+        '''
+        Runs the grab on the primary, then on the secondary as well once
+        the budget runs out or the primary fails. Keeps the first image.
+        '''
+        with self._session:
+            started = time.monotonic()
+            self._wait(delay)
+            winner, self.outcomes = self._run_hedge(grab)
+            if winner is None:
+                return self._finish_capture(started)
+
+            return self._adopt(winner, started)
+
+    def _run_hedge(self, grab: typing.Callable[[Screenshooter], Capture]
+                   ) -> typing.Tuple[typing.Optional[Capture], typing.List[HedgeOutcome]]:
+        '''
+        Returns the first capture with an image, if there was one, and
+        how each screenshooter that ran did
+        '''
+        self._settle()
+        results: queue.Queue = queue.Queue()
+        start = time.monotonic()
+
+        def run(screenshooter: Screenshooter):
+            capture = None
+            try:
+                capture = grab(screenshooter)
+            finally:
+                results.put((screenshooter, capture, time.monotonic() - start))
+
+        def start_thread(screenshooter: Screenshooter):
+            thread = threading.Thread(target=run, args=(screenshooter,))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+            started.append(screenshooter)
+            pending.append(screenshooter)
+
+        self._image = None
+        self._encoded = None
+        self.primary.destination_format = self.destination_format
+        self.secondary.destination_format = self.destination_format
+        started: typing.List[Screenshooter] = []
+        pending: typing.List[Screenshooter] = []
+        outcomes: typing.List[HedgeOutcome] = []
+        winner = None
+        if self._cancelled.is_set():
+            return None, outcomes
+
+        start_thread(self.primary)
+
+        while pending:
+            hedging = self.secondary in started
+            try:
+                screenshooter, capture, latency = results.get(
+                    timeout=None if hedging else max(0, start + self.budget - time.monotonic())
+                )
+            except queue.Empty:
+                start_thread(self.secondary)
+                continue
+
+            pending.remove(screenshooter)
+            succeeded = capture is not None and capture.image is not None
+            outcomes.append(HedgeOutcome(screenshooter, succeeded, latency))
+            if succeeded:
+                winner = capture
+                break
+
+            if not hedging:
+                start_thread(self.secondary)
+
+        for screenshooter in pending:
+            screenshooter.cancel()
+            if screenshooter is self.primary and winner is not None:
+                # It was slower than the budget rather than failing. How
+                # long it ran for counts, or the budget would only ever
+                # be worked out from the captures that beat it.
+                outcomes.append(HedgeOutcome(screenshooter, True, time.monotonic() - start))
+
+        return winner, outcomes
+
+    @staticmethod
+    def _get_name(screenshooter: Screenshooter) -> str:
+        return screenshooter.__utilityname__ or screenshooter.__class__.__name__
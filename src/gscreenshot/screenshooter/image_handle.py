@@ -0,0 +1,117 @@
+'''
+Keeping track of who uses a captured image, so it's only copied when
+a change would otherwise be seen by something else using it
+'''
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    from PIL import Image
+
+
+class _Owners(object):
+    '''How many handles use one image'''
+
+    __slots__ = ('count', 'lock')
+
+    count: int
+
+    def __init__(self):
+        self.count = 1
+        self.lock = threading.Lock()
+
+
+def _frame_bytes(image: 'Image.Image') -> int:
+    '''Returns about how much memory an image's pixels take'''
+    return image.size[0] * image.size[1] * len(image.getbands())
+
+
+class ImageHandle(object):
+    '''
+    A reference to an image that knows whether anything else uses it.
+
+    Reading the image through a handle costs nothing. Changing it goes
+    through writable(), which hands back the image itself while this is
+    the only handle to it, and otherwise a copy that this handle then
+    has to itself. A capture is stamped and cropped in place while it's
+    being taken, and copied only if it's changed after it was shared
+    (with a Capture, which gives its share back once it's replaced).
+    A read-only image (one Image.frombuffer maps, such as RGBA) is
+    always copied, as PIL would copy it anyway.
+
+    copies and copied_bytes count the copies writable() made, so
+    callers and tests can see what an operation cost.
+    '''
+
+    __slots__ = ('_image', '_owners', 'copies', 'copied_bytes')
+
+    _image: typing.Optional['Image.Image']
+    _owners: _Owners
+    copies: int
+    copied_bytes: int
+
+    def __init__(self, image: 'Image.Image', owners: typing.Optional[_Owners]=None):
+        '''
+        Parameters:
+            Image image: an image nothing else will change
+        '''
+        self._image = image
+        self._owners = owners if owners is not None else _Owners()
+        self.copies = 0
+        self.copied_bytes = 0
+
+    @property
+    def image(self) -> 'Image.Image':
+        '''
+        The image, for reading. Change it through writable() instead.
+        Raises ValueError if the handle was released.
+        '''
+        if self._image is None:
+            raise ValueError("The image handle was released")
+
+        return self._image
+
+    @property
+    def shared(self) -> bool:
+        '''Whether other handles use the same image'''
+        with self._owners.lock:
+            return self._owners.count > 1
+
+    def share(self) -> 'ImageHandle':
+        '''
+        Returns another handle to the same image. Neither
+        changes the image in place for as long as both hold it.
+        '''
+        image = self.image
+        with self._owners.lock:
+            self._owners.count += 1
+
+        return ImageHandle(image, self._owners)
+
+    def release(self):
+        '''Stops using the image, so the other handles can change it in place'''
+        if self._image is None:
+            return
+
+        with self._owners.lock:
+            self._owners.count -= 1
+        self._image = None
+
+    def writable(self) -> 'Image.Image':
+        '''
+        Returns the image to change in place: the image itself if this
+        is the only handle to it and it isn't read-only, otherwise a
+        copy this handle keeps instead
+        '''
+        image = self.image
+        with self._owners.lock:
+            if self._owners.count == 1 and not image.readonly:
+                return image
+
+            self._owners.count -= 1
+
+        self._image = image.copy()
+        self._owners = _Owners()
+        self.copies += 1
+        self.copied_bytes += _frame_bytes(image)
+        return self._image
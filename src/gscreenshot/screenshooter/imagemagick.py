@@ -1,25 +1,25 @@
 '''
 ImageMagick screenshot class
 '''
-from time import sleep
 
 from gscreenshot.screenshooter import Screenshooter
 from gscreenshot.util import find_executable
 from gscreenshot.util import GSCapabilities
 
 
-class ImageMagick(Screenshooter):
+class ImageMagick(Screenshooter):  # pylint: disable=abstract-method
     """
     Python class wrapper for the scrot screenshooter utility
     """
 
     __utilityname__ = "imagemagick"
+    _output_formats = ('ppm', 'pam', 'bmp', 'png')
 
-    def __init__(self):
+    def __init__(self, selector=None):
         """
         constructor
         """
-        Screenshooter.__init__(self)
+        Screenshooter.__init__(self, selector)
 
     def grab_fullscreen(self, delay=0, capture_cursor=False):
         """
@@ -28,8 +28,28 @@ class ImageMagick(Screenshooter):
         Parameters:
             int delay, in seconds
         """
-        sleep(delay)
-        self._call_screenshooter('import', ['-window', 'root', self.tempfile])
+        self._wait(delay)
+        self._call_screenshooter(
+            'import',
+            ['-window', 'root', self.get_output_format() + ':-'],
+            read_stdout=True
+        )
+
+    def grab_region(self, box, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of a region of the screen with a given delay
+
+        Parameters:
+            (x top left, y top left, x bottom right, y bottom right) box
+            int delay, in seconds
+        """
+        self._wait(delay)
+        geometry = f"{box[2] - box[0]}x{box[3] - box[1]}+{box[0]}+{box[1]}"
+        self._call_screenshooter(
+            'import',
+            ['-window', 'root', '-crop', geometry, self.get_output_format() + ':-'],
+            read_stdout=True
+        )
 
     def _grab_selection_fallback(self, delay=0, capture_cursor=False):
         """
@@ -38,14 +58,15 @@ class ImageMagick(Screenshooter):
         Parameters:
             int delay, in seconds
         """
-        sleep(delay)
-        self._call_screenshooter('import', [self.tempfile])
+        self._wait(delay)
+        self._call_screenshooter('import', [self.get_output_format() + ':-'], read_stdout=True)
 
     def get_capabilities(self) -> list:
         '''List of capabilities'''
         return [
             GSCapabilities.REGION_SELECTION,
-            GSCapabilities.WINDOW_SELECTION
+            GSCapabilities.WINDOW_SELECTION,
+            GSCapabilities.REGION_CAPTURE
         ]
 
     @staticmethod
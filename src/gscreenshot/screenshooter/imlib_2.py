@@ -1,24 +1,25 @@
 '''
 Integration for the imlib2 screenshot utility
 '''
-from time import sleep
 
 from gscreenshot.screenshooter import Screenshooter
 from gscreenshot.util import find_executable
 
 
-class Imlib2(Screenshooter):
+class Imlib2(Screenshooter):  # pylint: disable=abstract-method
     """
     Python class wrapper for the scrot screenshooter utility
     """
 
     __utilityname__ = "imlib_2"
+    # imlib2 picks the format from the file extension
+    _output_formats = ('ppm', 'png')
 
-    def __init__(self):
+    def __init__(self, selector=None):
         """
         constructor
         """
-        Screenshooter.__init__(self)
+        Screenshooter.__init__(self, selector)
 
     def grab_fullscreen(self, delay=0, capture_cursor=False):
         """
@@ -27,7 +28,7 @@ class Imlib2(Screenshooter):
         Parameters:
             int delay, in seconds
         """
-        sleep(delay)
+        self._wait(delay)
         self._call_screenshooter('imlib2_grab', [self.tempfile])
 
     @staticmethod
@@ -0,0 +1,219 @@
+'''
+Discovery of the monitors (outputs) that make up the screen
+'''
+import json
+import subprocess
+import threading
+import time
+import typing
+
+from gscreenshot.util import session_is_wayland
+from gscreenshot.xconnection import X_ERRORS, XConnection, get_x_connection
+
+try:
+    from Xlib.ext import randr
+except ImportError:
+    randr = None
+
+# Wayland compositors don't announce layout changes to us, so the
+# layout they report is only trusted for this many seconds
+WAYLAND_LAYOUT_TTL = 5.0
+
+
+class Output(object):
+    '''
+    A monitor and its position within the screen
+    '''
+
+    __slots__ = ('name', 'x', 'y', 'width', 'height')
+
+    def __init__(self, name: str, x: int, y: int, width: int, height: int):
+        # pylint: disable=too-many-arguments, invalid-name
+        self.name = name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def get_box(self) -> typing.Tuple[int, int, int, int]:
+        '''
+        Returns:
+           (x top left, y top left, x bottom right, y bottom right)
+        '''
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Output):
+            return False
+
+        return (self.name, self.get_box()) == (other.name, other.get_box())
+
+    def __repr__(self) -> str:
+        return (f'Output(name={self.name!r}, x={self.x}, y={self.y}, '
+                f'width={self.width}, height={self.height})')
+
+
+class OutputLayout(object):
+    '''
+    Looks up the current outputs. On X11 the layout is cached and only
+    queried again after RandR reports a change; on Wayland it is cached
+    for WAYLAND_LAYOUT_TTL seconds.
+    '''
+
+    __slots__ = ('_outputs', '_queried_at', '_connection', '_subscribed', '_lock')
+
+    _outputs: typing.Optional[typing.List[Output]]
+
+    def __init__(self, connection: typing.Optional[XConnection]=None):
+        '''
+        Parameters:
+            XConnection connection: the shared one if None
+        '''
+        self._outputs = None
+        self._queried_at = 0.0
+        self._connection = connection if connection is not None else get_x_connection()
+        self._subscribed = False
+        self._lock = threading.Lock()
+
+    def get_outputs(self) -> typing.List[Output]:
+        '''
+        Returns the outputs making up the screen, or an empty
+        list if they can't be determined
+        '''
+        if session_is_wayland():
+            with self._lock:
+                now = time.monotonic()
+                if self._outputs is None or now - self._queried_at > WAYLAND_LAYOUT_TTL:
+                    self._outputs = self._query_wayland()
+                    self._queried_at = now
+                return list(self._outputs)
+
+        if not self._connection.available:
+            return []
+
+        with self._lock:
+            try:
+                if not self._subscribed:
+                    self._subscribed = True
+                    self._connection.subscribe(self._on_connect, self._on_event)
+
+                with self._connection.use() as xdisplay:
+                    # Any RandR events were handled on the way in
+                    if self._outputs is None:
+                        self._outputs = self._query_xorg(xdisplay)
+            except X_ERRORS:
+                self._outputs = None
+                return []
+
+            return list(self._outputs)
+
+    def invalidate(self):
+        '''Forget the cached layout'''
+        with self._lock:
+            self._outputs = None
+
+    def _on_connect(self, xdisplay):
+        # The layout may have changed while there was no connection
+        self._outputs = None
+        if randr is not None and xdisplay.has_extension('RANDR'):
+            xdisplay.screen().root.xrandr_select_input(
+                randr.RRScreenChangeNotifyMask
+                | randr.RRCrtcChangeNotifyMask
+                | randr.RROutputChangeNotifyMask
+            )
+
+    def _on_event(self, event):
+        if isinstance(event, (randr.ScreenChangeNotify, randr.CrtcChangeNotify,
+                              randr.OutputChangeNotify)):
+            self._outputs = None
+
+    @staticmethod
+    def _query_xorg(xdisplay) -> typing.List[Output]:
+        root = xdisplay.screen().root
+        outputs = []
+
+        if xdisplay.has_extension('RANDR'):
+            resources = root.xrandr_get_screen_resources_current()
+            for output_id in resources.outputs:
+                output_info = xdisplay.xrandr_get_output_info(
+                    output_id, resources.config_timestamp
+                )
+                if output_info.crtc == 0:
+                    # Not connected or not enabled
+                    continue
+
+                crtc_info = xdisplay.xrandr_get_crtc_info(
+                    output_info.crtc, resources.config_timestamp
+                )
+                outputs.append(Output(
+                    output_info.name,
+                    crtc_info.x,
+                    crtc_info.y,
+                    crtc_info.width,
+                    crtc_info.height
+                ))
+        elif xdisplay.has_extension('XINERAMA'):
+            screens = xdisplay.xinerama_query_screens().screens
+            for idx, screen in enumerate(screens):
+                outputs.append(Output(
+                    f"screen{idx}", screen.x, screen.y, screen.width, screen.height
+                ))
+
+        if not outputs:
+            geometry = root.get_geometry()
+            outputs.append(Output("screen0", 0, 0, geometry.width, geometry.height))
+
+        return outputs
+
+    @staticmethod
+    def _query_wayland() -> typing.List[Output]:
+        '''
+        There is no compositor-neutral way to list outputs, so this
+        asks sway (or another i3-ipc compositor) and then wlr-randr.
+        '''
+        try:
+            sway_outputs = json.loads(subprocess.check_output(
+                ['swaymsg', '-t', 'get_outputs', '-r'], timeout=2
+            ))
+            return [
+                Output(o['name'], o['rect']['x'], o['rect']['y'],
+                       o['rect']['width'], o['rect']['height'])
+                for o in sway_outputs if o.get('active', True)
+            ]
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                OSError, ValueError, KeyError):
+            pass
+
+        try:
+            wlr_outputs = json.loads(subprocess.check_output(
+                ['wlr-randr', '--json'], timeout=2
+            ))
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                OSError, ValueError):
+            return []
+
+        outputs = []
+        for wlr_output in wlr_outputs:
+            if not wlr_output.get('enabled', False):
+                continue
+
+            scale = wlr_output.get('scale', 1) or 1
+            for mode in wlr_output.get('modes', []):
+                if mode.get('current'):
+                    outputs.append(Output(
+                        wlr_output['name'],
+                        wlr_output['position']['x'],
+                        wlr_output['position']['y'],
+                        int(mode['width'] / scale),
+                        int(mode['height'] / scale)
+                    ))
+
+        return outputs
+
+
+_layout = OutputLayout()
+
+
+def get_output_layout() -> OutputLayout:
+    '''Returns the process-wide output layout'''
+    return _layout
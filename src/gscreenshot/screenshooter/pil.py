@@ -1,8 +1,8 @@
 '''
 Integration for the PIL screenshot functionality
 '''
-from time import sleep
 from gscreenshot.screenshooter import Screenshooter
+from gscreenshot.util import GSCapabilities
 
 SUPPORTED_PLATFORM = False
 
@@ -13,18 +13,19 @@ except ImportError:
     SUPPORTED_PLATFORM = False
 
 
-class PILWrapper(Screenshooter):
+class PILWrapper(Screenshooter):  # pylint: disable=abstract-method
     """
     Python class wrapper for PIL
     """
 
     __utilityname__ = "python-pillow"
+    _output_formats = ()
 
-    def __init__(self):
+    def __init__(self, selector=None):
         """
         constructor
         """
-        Screenshooter.__init__(self)
+        Screenshooter.__init__(self, selector)
 
     def grab_fullscreen(self, delay=0, capture_cursor=False):
         """
@@ -33,9 +34,26 @@ class PILWrapper(Screenshooter):
         Parameters:
             int delay, in seconds
         """
-        sleep(delay)
+        self._wait(delay)
         self._image = ImageGrab.grab(None)
 
+    def grab_region(self, box, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of a region of the screen with a given delay
+
+        Parameters:
+            (x top left, y top left, x bottom right, y bottom right) box
+            int delay, in seconds
+        """
+        self._wait(delay)
+        self._image = ImageGrab.grab(bbox=box)
+
+    def get_capabilities(self) -> list:
+        '''List of capabilities'''
+        return [
+            GSCapabilities.REGION_CAPTURE
+        ]
+
     @staticmethod
     def can_run():
         '''Whether this utility is available'''
@@ -0,0 +1,228 @@
+'''
+Plans how a capture request is carried out with a given screenshooter.
+
+A capture can usually be done more than one way: a region can be
+captured natively or cropped out of a full screen capture, the cursor
+can be drawn by the utility or composited afterwards, and the image
+the utility writes can either be saved as is or decoded and encoded
+again. The planner picks the cheapest way the screenshooter supports
+and records why, so the choice can be explained (gscreenshot-cli
+--explain).
+'''
+import typing
+
+from gscreenshot.util import GSCapabilities
+
+if typing.TYPE_CHECKING:
+    from PIL import Image
+    from gscreenshot.screenshooter.outputs import Output
+
+
+# What is captured
+FULLSCREEN = 'fullscreen'
+REGION = 'region'
+OUTPUT = 'output'
+WINDOW = 'window'
+
+# How the cursor gets into the image
+CURSOR_NONE = 'none'
+CURSOR_NATIVE = 'native'
+CURSOR_COMPOSITED = 'composited'
+
+# What happens to the utility's output when it's saved
+ENCODE_PASSTHROUGH = 'passthrough'
+ENCODE_REENCODE = 're-encode'
+
+# Cheapest first. Raw formats need no compression on the utility's
+# side and can be wrapped directly by PIL on ours.
+OUTPUT_FORMAT_PREFERENCE: typing.Tuple[str, ...] = ('ppm', 'pam', 'bmp', 'png')
+
+
+class BackendCapabilities(object):
+    '''
+    What a screenshooter can do, as far as planning is concerned
+    '''
+
+    __slots__ = ('features', 'output_formats')
+
+    def __init__(self, features: typing.Iterable[str],
+                 output_formats: typing.Iterable[str]):
+        '''
+        Parameters:
+            features: GSCapabilities of the screenshooter itself
+            output_formats: formats the utility can write its capture in.
+                            Empty if it captures in-process.
+        '''
+        self.features = frozenset(features)
+        self.output_formats = tuple(output_formats)
+
+    def __contains__(self, feature: str) -> bool:
+        return feature in self.features
+
+    def __repr__(self) -> str:
+        return (f'BackendCapabilities(features={sorted(self.features)!r}, '
+                f'output_formats={self.output_formats!r})')
+
+
+class CaptureRequest(object):
+    '''
+    What the caller wants captured
+    '''
+
+    __slots__ = ('target', 'box', 'output', 'capture_cursor', 'use_cursor',
+                 'destination_format')
+
+    def __init__(self, target: str=FULLSCREEN,
+                 box: typing.Optional[typing.Tuple[int, int, int, int]]=None,
+                 output: typing.Optional['Output']=None, capture_cursor: bool=False,
+                 use_cursor: typing.Optional['Image.Image']=None, *,
+                 destination_format: typing.Optional[str]=None):
+        # pylint: disable=too-many-arguments
+        '''
+        Parameters:
+            str target: FULLSCREEN, REGION, OUTPUT or WINDOW
+            box: (x top left, y top left, x bottom right, y bottom right)
+                 for REGION. May be None if it's not known yet.
+            Output output: the output for OUTPUT
+            bool capture_cursor
+            PIL.Image use_cursor: an alternate cursor to composite
+            str destination_format: the format the image will be saved
+                                    in, e.g. 'png', if known
+        '''
+        self.target = target
+        self.box = box
+        self.output = output
+        self.capture_cursor = capture_cursor
+        self.use_cursor = use_cursor
+        self.destination_format = destination_format
+
+
+class CapturePlan(object):
+    '''
+    How a capture request will be carried out
+    '''
+
+    __slots__ = ('capture', 'crop', 'cursor', 'intermediate_format', 'encode', 'reasons')
+
+    def __init__(self, capture: str, crop: bool, cursor: str,
+                 intermediate_format: typing.Optional[str], encode: str, *,
+                 reasons: typing.List[str]):
+        # pylint: disable=too-many-arguments
+        '''
+        Parameters:
+            str capture: what the utility captures (FULLSCREEN, REGION,
+                         OUTPUT or WINDOW)
+            bool crop: whether the result is cropped to the requested area
+            str cursor: CURSOR_NONE, CURSOR_NATIVE or CURSOR_COMPOSITED
+            str intermediate_format: the format to ask the utility for,
+                                     None if it captures in-process
+            str encode: ENCODE_PASSTHROUGH or ENCODE_REENCODE
+            reasons: why each choice was made
+        '''
+        self.capture = capture
+        self.crop = crop
+        self.cursor = cursor
+        self.intermediate_format = intermediate_format
+        self.encode = encode
+        self.reasons = reasons
+
+    @property
+    def native_cursor(self) -> bool:
+        '''Whether the utility is asked to capture the cursor'''
+        return self.cursor == CURSOR_NATIVE
+
+    def explain(self) -> str:
+        '''Describes the plan in a few lines'''
+        lines = [
+            f"capture: {self.capture}" + (", then crop" if self.crop else ""),
+            f"cursor: {self.cursor}",
+            f"intermediate format: {self.intermediate_format or 'none (in-process)'}",
+            f"encode: {self.encode}",
+        ]
+        return "\n".join(lines + [f"  - {reason}" for reason in self.reasons])
+
+    def __repr__(self) -> str:
+        return (f'CapturePlan(capture={self.capture!r}, crop={self.crop}, '
+                f'cursor={self.cursor!r}, intermediate_format={self.intermediate_format!r}, '
+                f'encode={self.encode!r})')
+
+
+def make_plan(request: CaptureRequest, capabilities: BackendCapabilities) -> CapturePlan:
+    '''
+    Returns the cheapest plan for the request that the
+    screenshooter's capabilities allow
+    '''
+    reasons = []
+
+    # The cursor decides the rest: a composited cursor is placed on the
+    # full screen, so the utility can't be asked for just a part of it
+    cursor = CURSOR_NONE
+    if request.capture_cursor:
+        if request.use_cursor is not None:
+            cursor = CURSOR_COMPOSITED
+            reasons.append("an alternate cursor was asked for, so it's composited")
+        elif GSCapabilities.CURSOR_CAPTURE in capabilities:
+            cursor = CURSOR_NATIVE
+            reasons.append("the utility captures the cursor itself")
+        else:
+            cursor = CURSOR_COMPOSITED
+            reasons.append(
+                "the utility can't capture the cursor, so the one showing is composited"
+            )
+
+    capture = request.target
+    crop = False
+    if request.target == OUTPUT:
+        if GSCapabilities.OUTPUT_CAPTURE in capabilities and cursor != CURSOR_COMPOSITED:
+            reasons.append("the utility captures the output by itself")
+        else:
+            capture = REGION
+            reasons.append("the output is captured as a region of the screen")
+
+    if capture == REGION:
+        if GSCapabilities.REGION_CAPTURE in capabilities and cursor != CURSOR_COMPOSITED:
+            reasons.append("the utility captures just the region")
+        else:
+            capture = FULLSCREEN
+            crop = True
+            reasons.append("the full screen is captured and cropped to the region")
+
+    intermediate_format, encode = _plan_encode(
+        request, capabilities, capture, crop or cursor == CURSOR_COMPOSITED, reasons
+    )
+
+    return CapturePlan(capture, crop, cursor, intermediate_format, encode, reasons=reasons)
+
+
+def _plan_encode(request: CaptureRequest, capabilities: BackendCapabilities,
+                 capture: str, modified: bool, reasons: typing.List[str]
+                 ) -> typing.Tuple[typing.Optional[str], str]:
+    '''Picks the intermediate format and whether it can be saved as is'''
+    if not capabilities.output_formats:
+        reasons.append("the utility captures in-process, so the image is encoded once")
+        return None, ENCODE_REENCODE
+
+    cheapest = capabilities.output_formats[0]
+    for output_format in OUTPUT_FORMAT_PREFERENCE:
+        if output_format in capabilities.output_formats:
+            cheapest = output_format
+            break
+
+    destination = request.destination_format
+    if destination is None:
+        return cheapest, ENCODE_REENCODE
+
+    if destination not in capabilities.output_formats:
+        reasons.append(f"the utility can't write {destination}, so {cheapest} is re-encoded")
+        return cheapest, ENCODE_REENCODE
+
+    if modified:
+        reasons.append("the image is changed after capture, so it's re-encoded")
+        return cheapest, ENCODE_REENCODE
+
+    if capture == OUTPUT:
+        reasons.append("output captures aren't kept encoded, so the image is re-encoded")
+        return cheapest, ENCODE_REENCODE
+
+    reasons.append(f"the utility writes {destination}, so its output is saved as is")
+    return destination, ENCODE_PASSTHROUGH
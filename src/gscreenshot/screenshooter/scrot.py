@@ -2,24 +2,28 @@
 Integration for the Scrot screenshot utility
 '''
 import subprocess
+import typing
 
-from gscreenshot.screenshooter import Screenshooter
+from gscreenshot.screenshooter import Screenshooter, PROBE_TIMEOUT
 from gscreenshot.util import GSCapabilities
 
 
-class Scrot(Screenshooter):
+class Scrot(Screenshooter):  # pylint: disable=abstract-method
     """
     Python class wrapper for the scrot screenshooter utility
     """
 
     _supports_native_cursor_capture = False
+    _supports_region_capture = False
     __utilityname__ = "scrot"
+    # scrot saves through imlib2, which picks the format from the extension
+    _output_formats = ('ppm', 'png')
 
-    def __init__(self):
+    def __init__(self, selector=None):
         """
         constructor
         """
-        Screenshooter.__init__(self)
+        Screenshooter.__init__(self, selector)
 
     def grab_fullscreen(self, delay=0, capture_cursor=False):
         """
@@ -36,6 +40,21 @@ class Scrot(Screenshooter):
         if capture_cursor and not Scrot._supports_native_cursor_capture:
             self.add_fake_cursor()
 
+    def grab_region(self, box, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of a region of the screen with a given delay
+
+        Parameters:
+            (x top left, y top left, x bottom right, y bottom right) box
+            int delay, in seconds
+        """
+        geometry = f"{box[0]},{box[1]},{box[2] - box[0]},{box[3] - box[1]}"
+        params = ['-z', self.tempfile, '-d', str(delay), '-a', geometry]
+        if capture_cursor and Scrot._supports_native_cursor_capture:
+            params.append('-p')
+
+        self._call_screenshooter('scrot', params)
+
     def get_capabilities(self) -> list:
         '''List of capabilities'''
         capabilities = [
@@ -46,24 +65,45 @@ class Scrot(Screenshooter):
         if self._supports_native_cursor_capture:
             capabilities.append(GSCapabilities.CURSOR_CAPTURE)
 
+        if self._supports_region_capture:
+            capabilities.append(GSCapabilities.REGION_CAPTURE)
+
         return capabilities
 
     @staticmethod
     def can_run() -> bool:
         """Whether scrot is available"""
         try:
-            scrot_version_output = subprocess.check_output(['scrot', '--version'])
+            scrot_version_output = subprocess.check_output(
+                ['scrot', '--version'], timeout=PROBE_TIMEOUT
+            )
             scrot_version_num = scrot_version_output.decode().strip().rsplit(' ', maxsplit=1)[-1]
 
-            if float(scrot_version_num) >= 1:
-                Scrot._supports_native_cursor_capture = True
-            else:
-                Scrot._supports_native_cursor_capture = False
+            # Compared as a tuple: 1.10 is newer than 1.2
+            scrot_version = tuple(int(x) for x in scrot_version_num.split(".")[:2])
+
+            Scrot._supports_native_cursor_capture = scrot_version >= (1,)
+            # --autoselect arrived in 1.2
+            Scrot._supports_region_capture = scrot_version >= (1, 2)
 
             return True
-        except (subprocess.CalledProcessError, IOError, OSError):
+        except (subprocess.CalledProcessError, IOError, OSError, ValueError):
             return False
 
+    @classmethod
+    def get_probe_features(cls) -> typing.Dict[str, typing.Any]:
+        """Returns the options can_run() found scrot's version supports"""
+        return {
+            'native_cursor_capture': Scrot._supports_native_cursor_capture,
+            'region_capture': Scrot._supports_region_capture,
+        }
+
+    @classmethod
+    def set_probe_features(cls, features: typing.Dict[str, typing.Any]):
+        """Restores the options found by an earlier can_run()"""
+        Scrot._supports_native_cursor_capture = bool(features.get('native_cursor_capture'))
+        Scrot._supports_region_capture = bool(features.get('region_capture'))
+
     def _grab_selection_fallback(self, delay=0, capture_cursor=False):
         """
         Fallback for selection which uses scrot's builtin
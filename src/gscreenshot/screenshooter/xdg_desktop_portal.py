@@ -23,15 +23,13 @@ import shutil
 import subprocess
 
 from random import SystemRandom
-from time import sleep
-from gi.repository import GLib
 
 try:
     from dbus.mainloop.glib import DBusGMainLoop
 except ImportError:
     DBusGMainLoop = None
 
-from gscreenshot.screenshooter import Screenshooter
+from gscreenshot.screenshooter import Screenshooter, PROBE_TIMEOUT
 
 
 class XdgPortalScreenshot:
@@ -106,21 +104,21 @@ class XdgPortalScreenshot:
             sys.exit(1)
 
 
-class XdgDesktopPortal(Screenshooter):
+class XdgDesktopPortal(Screenshooter):  # pylint: disable=abstract-method
     """
     Python wrapper for xdg-desktop-portal screenshots
     """
 
     __utilityname__ = "xdg-desktop-portal"
 
-    def __init__(self):
+    def __init__(self, selector=None):
         """constructor"""
-        Screenshooter.__init__(self)
+        Screenshooter.__init__(self, selector)
 
     def grab_fullscreen(self, delay=0, capture_cursor=False):
         """grabs a full screen screenshot"""
 
-        sleep(delay)
+        self._wait(delay)
         script_path = os.path.realpath(__file__)
         py_call = "python3"
         if sys.version_info.major < 3:
@@ -135,7 +133,7 @@ class XdgDesktopPortal(Screenshooter):
             return False
 
         try:
-            subprocess.check_output(["pidof", "xdg-desktop-portal"])
+            subprocess.check_output(["pidof", "xdg-desktop-portal"], timeout=PROBE_TIMEOUT)
         except (subprocess.CalledProcessError, OSError):
             return False
 
@@ -143,6 +141,9 @@ class XdgDesktopPortal(Screenshooter):
 
 
 if __name__ == "__main__":
+    # Only needed when run as a script, which is a separate process
+    from gi.repository import GLib
+
     loop = GLib.MainLoop()
     XdgPortalScreenshot().request()
 
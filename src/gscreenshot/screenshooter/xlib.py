@@ -0,0 +1,119 @@
+'''
+Integration for in-process screenshots using python-xlib
+'''
+import os
+import typing
+import PIL.Image
+
+from gscreenshot.screenshooter import Screenshooter
+from gscreenshot.util import GSCapabilities
+from gscreenshot.xconnection import X_ERRORS, get_x_connection
+
+try:
+    from Xlib import X
+except ImportError:
+    X = None
+
+
+class XlibWrapper(Screenshooter):  # pylint: disable=abstract-method
+    """
+    Grabs the root window with XGetImage without spawning
+    an external utility
+    """
+
+    __utilityname__ = "python-xlib"
+    _output_formats = ()
+
+    def __init__(self, selector=None):
+        """
+        constructor
+        """
+        Screenshooter.__init__(self, selector)
+
+    def grab_fullscreen(self, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of the full screen with a given delay
+
+        Parameters:
+            int delay, in seconds
+        """
+        self._wait(delay)
+        self._grab_root(None)
+
+    def grab_region(self, box, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of a region of the screen with a given delay
+
+        Parameters:
+            (x top left, y top left, x bottom right, y bottom right) box
+            int delay, in seconds
+        """
+        self._wait(delay)
+        self._grab_root((box[0], box[1], box[2] - box[0], box[3] - box[1]))
+
+    def get_capabilities(self) -> typing.List[str]:
+        '''List of capabilities'''
+        return [
+            GSCapabilities.REGION_CAPTURE
+        ]
+
+    def _grab_root(self, box: typing.Optional[typing.Tuple[int, int, int, int]]):
+        """
+        Grabs (x, y, width, height) of the root window, or all of it
+        if box is None
+        """
+        try:
+            with get_x_connection().use() as xdisplay:
+                root = xdisplay.screen().root
+                if box is None:
+                    geometry = root.get_geometry()
+                    box = (0, 0, geometry.width, geometry.height)
+
+                self._image = self._get_root_image(xdisplay, root, box)
+        except X_ERRORS + (ValueError,):
+            self._image = None
+
+    @staticmethod
+    def _get_root_image(xdisplay, root, box: typing.Tuple[int, int, int, int]
+                        ) -> typing.Optional[PIL.Image.Image]:
+        """
+        Fetches (x, y, width, height) of the root window as a single
+        ZPixmap and unpacks the reply data into an RGB image.
+
+        PIL can only use a buffer as is for modes whose memory layout
+        matches it, and X's BGRX (or XRGB) pixels aren't one of them, so
+        this is one copy of the frame. No encoding or decoding happens.
+        """
+        reply = root.get_image(box[0], box[1], box[2], box[3], X.ZPixmap, 0xffffffff)
+
+        bits_per_pixel = None
+        for pixmap_format in xdisplay.info.pixmap_formats:
+            if pixmap_format.depth == reply.depth:
+                bits_per_pixel = pixmap_format.bits_per_pixel
+
+        # 24 and 32 bit visuals are padded to 32 bits per pixel, which is
+        # the only layout PIL's raw unpacker takes here.
+        if bits_per_pixel != 32:
+            return None
+
+        raw_mode = "BGRX"
+        if xdisplay.info.image_byte_order == X.MSBFirst:
+            raw_mode = "XRGB"
+
+        return PIL.Image.frombuffer(
+            "RGB", (box[2], box[3]), reply.data, "raw", raw_mode, 0, 1
+        )
+
+    @staticmethod
+    def can_run() -> bool:
+        '''Whether python-xlib is available with an X11 display'''
+        connection = get_x_connection()
+        if not connection.available or not os.environ.get('DISPLAY'):
+            return False
+
+        try:
+            # Opened now, it stays open for the captures
+            with connection.use():
+                return True
+        except X_ERRORS:
+            return False
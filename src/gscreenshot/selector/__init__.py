@@ -2,6 +2,7 @@
 Classes and exceptions related to screen region selection
 '''
 import subprocess
+import threading
 import typing
 from gscreenshot.util import GSCapabilities
 
@@ -21,13 +22,21 @@ class SelectionCancelled(BaseException):
 class NoSupportedSelectorError(BaseException):
     '''No region selection tool available'''
 
+# Given to a screenshooter in place of a selector when there isn't
+# one, so it doesn't go looking for one itself
+NO_SELECTOR: typing.Any = object()
+
 class RegionSelector():
     '''Region selection interface'''
 
+    _process: typing.Optional[subprocess.Popen]
+
     def __init__(self):
         """
         constructor
         """
+        self._process = None
+        self._process_lock = threading.Lock()
 
     def get_capabilities(self) -> typing.List[str]:
         """
@@ -56,6 +65,63 @@ class RegionSelector():
         """
         raise SelectionError("Not implemented")
 
+    async def region_select_async(self) -> typing.Tuple[int, int, int, int]:
+        """
+        Selects an arbitrary region of the screen without blocking the
+        event loop. Selectors that run a command (see _get_region_params)
+        run it as an asyncio subprocess, others run region_select in the
+        loop's executor.
+
+        Returns:
+           (x top left, y top left, x bottom right, y bottom right)
+        """
+        import asyncio #pylint: disable=import-outside-toplevel
+
+        params = self._get_region_params() #pylint: disable=assignment-from-none
+        if params is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.region_select)
+
+        return await self._get_boundary_interactive_async(params)
+
+    async def window_select_async(self) -> typing.Tuple[int, int, int, int]:
+        """
+        Selects a window without blocking the event loop.
+        See region_select_async.
+
+        Returns:
+           (x top left, y top left, x bottom right, y bottom right)
+        """
+        import asyncio #pylint: disable=import-outside-toplevel
+
+        params = self._get_window_params() #pylint: disable=assignment-from-none
+        if params is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.window_select)
+
+        return await self._get_boundary_interactive_async(params)
+
+    def cancel(self):
+        """
+        Stops a selection running in another thread by killing the
+        selector's process. The selection fails with SelectionExecError.
+        """
+        with self._process_lock:
+            if self._process is not None:
+                self._process.kill()
+
+    def _get_region_params(self) -> typing.Optional[typing.List[str]]:
+        """
+        The command region_select runs, if it runs one that
+        _get_boundary_interactive can handle
+        """
+        return None
+
+    def _get_window_params(self) -> typing.Optional[typing.List[str]]:
+        """
+        The command window_select runs, if it runs one that
+        _get_boundary_interactive can handle
+        """
+        return None
+
     @staticmethod
     def can_run() -> bool:
         """
@@ -77,30 +143,76 @@ class RegionSelector():
                 stderr=subprocess.PIPE
                 ) as selector_process:
 
+                with self._process_lock:
+                    self._process = selector_process
+
                 try:
                     stdout, stderr = selector_process.communicate(timeout=60)
                 except subprocess.TimeoutExpired:
                     selector_process.kill()
                     #pylint: disable=raise-missing-from
                     raise SelectionExecError(f"{params[0]} selection timed out")
+                finally:
+                    with self._process_lock:
+                        self._process = None
 
-                return_code = selector_process.returncode
-
-                if return_code != 0:
-                    selector_error = stderr.decode("UTF-8")
-
-                    if "cancelled" in selector_error:
-                        raise SelectionCancelled("Selection was cancelled")
-
-                    raise SelectionExecError(selector_error)
+                return self._parse_selection_result(
+                    selector_process.returncode, stdout, stderr
+                )
+        except OSError:
+            #pylint: disable=raise-missing-from
+            raise SelectionExecError(f"{params[0]} was not found") #from exception
 
-                selector_output = stdout.decode("UTF-8").strip().split("\n")
+    async def _get_boundary_interactive_async(self, params: typing.List[str]
+                                              ) -> typing.Tuple[int, int, int, int]:
+        """
+        Runs the selector as an asyncio subprocess and returns the
+        parsed output. See _get_boundary_interactive.
+        """
+        import asyncio #pylint: disable=import-outside-toplevel
 
-                return self._parse_selection_output(selector_output)
+        try:
+            selector_process = await asyncio.create_subprocess_exec(
+                *params,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
         except OSError:
             #pylint: disable=raise-missing-from
             raise SelectionExecError(f"{params[0]} was not found") #from exception
 
+        try:
+            stdout, stderr = await asyncio.wait_for(selector_process.communicate(), 60)
+        except asyncio.TimeoutError:
+            selector_process.kill()
+            await selector_process.wait()
+            #pylint: disable=raise-missing-from
+            raise SelectionExecError(f"{params[0]} selection timed out")
+        except asyncio.CancelledError:
+            selector_process.kill()
+            await selector_process.wait()
+            raise
+
+        return self._parse_selection_result(selector_process.returncode, stdout, stderr)
+
+    def _parse_selection_result(self, return_code: typing.Optional[int],
+                                stdout: bytes, stderr: bytes
+                                ) -> typing.Tuple[int, int, int, int]:
+        '''
+        Checks how the selector exited and parses what it printed
+        '''
+        if return_code != 0:
+            selector_error = stderr.decode("UTF-8")
+
+            if "cancelled" in selector_error:
+                raise SelectionCancelled("Selection was cancelled")
+
+            raise SelectionExecError(selector_error)
+
+        selector_output = stdout.decode("UTF-8").strip().split("\n")
+
+        return self._parse_selection_output(selector_output)
+
     def _parse_selection_output(self, region_output: typing.List[str]
                                 ) -> typing.Tuple[int, int, int, int]:
         '''
@@ -3,39 +3,32 @@ Selector factory module
 '''
 
 import typing
-from gscreenshot.selector.slop import Slop
-from gscreenshot.selector.slurp import Slurp
 from gscreenshot.selector import NoSupportedSelectorError
 from gscreenshot.selector import RegionSelector
-from gscreenshot.util import session_is_wayland
+from gscreenshot.registry import BackendInfo, Registry, get_registry
 
 
 class SelectorFactory(object):
     '''Selects and instantiates a usable selector class'''
 
-    def __init__(self, screenselector:typing.Optional[RegionSelector]=None):
+    def __init__(self, screenselector:typing.Optional[RegionSelector]=None,
+                 registry:typing.Optional[Registry]=None):
         self.screenselector:typing.Optional[RegionSelector] = screenselector
-        self.xorg_selectors = [
-                Slop
-                ]
 
-        self.wayland_selectors = [
-                Slurp
-                ]
-
-        self.selectors:list = []
-
-        if session_is_wayland():
-            self.selectors = self.wayland_selectors
-        else:
-            self.selectors = self.xorg_selectors
+        # Most preferred first. Each is only imported if it gets checked.
+        self.selectors:typing.List[BackendInfo] = []
+        if screenselector is None:
+            if registry is None:
+                registry = get_registry()
+            self.selectors = registry.get_selectors()
 
     def create(self) -> RegionSelector:
         '''Returns a screenselector instance'''
         if self.screenselector is not None:
             return self.screenselector
 
-        for selector in self.selectors:
+        for backend in self.selectors:
+            selector = backend.load()
             if selector.can_run():
                 return selector()
 
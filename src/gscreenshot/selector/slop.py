@@ -28,8 +28,7 @@ class Slop(RegionSelector):
         Returns:
            (x top left, y top left, x bottom right, y bottom right)
         """
-        return self._get_boundary_interactive(
-            ['slop', '--nodecorations=0', '-f', 'X=%x,Y=%y,W=%w,H=%h'])
+        return self._get_boundary_interactive(self._get_region_params())
 
     def window_select(self) -> typing.Tuple[int, int, int, int]:
         """
@@ -38,8 +37,13 @@ class Slop(RegionSelector):
         Returns:
            (x top left, y top left, x bottom right, y bottom right)
         """
-        return self._get_boundary_interactive(
-            ['slop', '--nodecorations=0', '-f', 'X=%x,Y=%y,W=%w,H=%h'])
+        return self._get_boundary_interactive(self._get_window_params())
+
+    def _get_region_params(self) -> typing.List[str]:
+        return ['slop', '--nodecorations=0', '-f', 'X=%x,Y=%y,W=%w,H=%h']
+
+    def _get_window_params(self) -> typing.List[str]:
+        return ['slop', '--nodecorations=0', '-f', 'X=%x,Y=%y,W=%w,H=%h']
 
     @staticmethod
     def can_run() -> bool:
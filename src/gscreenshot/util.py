@@ -3,10 +3,21 @@ Misc utility functions for gscreenshot
 
 Functions:
     find_executable(string, string|None) -> string
+    get_runtime_dir() -> string
+    get_resource_path(string, string) -> string
+    get_resource_string(string, string) -> bytes
+    get_program_version() -> string
+    load_pil_plugin(string) -> bool
+    get_resampling(string) -> int
 '''
 #pylint: disable=no-else-return, invalid-name
+import functools
+import importlib
 import os
+import struct
 import sys
+import tempfile
+import zlib
 
 
 class GSCapabilities(object):
@@ -24,6 +35,13 @@ class GSCapabilities(object):
     ALTERNATE_CURSOR = "alternate_cursor"
     CAPTURE_FULLSCREEN = "capture_full_screen"
 
+    # The utility can capture a region itself (grab_region) rather than
+    # gscreenshot cropping a full screen capture
+    REGION_CAPTURE = "region_capture"
+
+    # The utility can capture a single output by name (capture_output)
+    OUTPUT_CAPTURE = "output_capture"
+
 # This is a direct copy and paste of distutil.spawn.is_executable.
 # We do this so that we don't need to add a dependency on distutils
 # for the use of a single simple function.
@@ -55,3 +73,112 @@ def session_is_wayland():
     '''Determines if the session running is wayland'''
     return ('XDG_SESSION_TYPE' in os.environ and
             os.environ['XDG_SESSION_TYPE'].lower() == 'wayland')
+
+def get_runtime_dir():
+    '''
+    Returns a directory for short-lived capture files. This prefers
+    $XDG_RUNTIME_DIR, which is a per-user tmpfs on most systems, so
+    intermediate images stay in memory rather than going to disk.
+    Falls back to the system temp directory.
+    '''
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir) and os.access(runtime_dir, os.W_OK):
+        return runtime_dir
+
+    return tempfile.gettempdir()
+
+@functools.lru_cache(maxsize=None)
+def get_resource_path(package, name):
+    '''
+    Returns the path to a file shipped in one of gscreenshot's
+    resource packages, e.g. ('gscreenshot.resources.pixmaps', 'gscreenshot.png')
+    '''
+    # Imported here as importlib.resources isn't free to import and
+    # many runs (such as --help) never need a resource
+    #pylint: disable=import-outside-toplevel
+    from importlib.resources import files
+    return str(files(package).joinpath(name))
+
+@functools.lru_cache(maxsize=None)
+def get_resource_string(package, name):
+    '''Returns the contents of a resource file as bytes'''
+    with open(get_resource_path(package, name), "rb") as resource:
+        return resource.read()
+
+@functools.lru_cache(maxsize=None)
+def get_program_version():
+    '''Returns the installed gscreenshot version'''
+    #pylint: disable=import-outside-toplevel
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        return version('gscreenshot')
+    except PackageNotFoundError:
+        return "0.0.0"
+
+def get_resampling(name):
+    '''
+    Returns a PIL resampling filter by name, such as 'LANCZOS',
+    on PIL versions before and after they moved to Image.Resampling
+    '''
+    #pylint: disable=import-outside-toplevel
+    from PIL import Image
+    try:
+        return getattr(Image.Resampling, name)
+    except AttributeError: # PIL < 9.0
+        return getattr(Image, name if name != 'LANCZOS' else 'ANTIALIAS')
+
+# PIL plugin that reads and writes each format gscreenshot saves to
+_PIL_PLUGINS = {
+    'bmp': 'BmpImagePlugin',
+    'eps': 'EpsImagePlugin',
+    'gif': 'GifImagePlugin',
+    'jpeg': 'JpegImagePlugin',
+    'pcx': 'PcxImagePlugin',
+    'pdf': 'PdfImagePlugin',
+    'ppm': 'PpmImagePlugin',
+    'tiff': 'TiffImagePlugin',
+    'png': 'PngImagePlugin',
+    'webp': 'WebPImagePlugin',
+}
+
+def load_pil_plugin(file_format):
+    '''
+    Registers the PIL plugin for a format before saving to it. Without
+    this, saving to a format outside PIL's few preloaded ones makes PIL
+    import every plugin it has to find the one it needs.
+
+    Returns whether the plugin could be loaded.
+    '''
+    plugin = _PIL_PLUGINS.get(file_format.lower())
+    if plugin is None:
+        return False
+
+    try:
+        importlib.import_module('PIL.' + plugin)
+    except ImportError:
+        return False
+
+    return True
+
+def add_png_exif(data, exif):
+    '''
+    Adds an eXIf chunk to a PNG right after its header chunk, as PIL
+    would when saving it with exif data. Returns the PNG unchanged if
+    it doesn't start with a header chunk.
+    '''
+    # The 8 byte signature, then IHDR: length, type, 13 bytes of data, CRC
+    header_end = 8 + 4 + 4 + 13 + 4
+    if not data.startswith(b'\x89PNG\r\n\x1a\n') or data[12:16] != b'IHDR':
+        return data
+
+    if exif.startswith(b'Exif\x00\x00'):
+        exif = exif[6:]
+
+    chunk = b'eXIf' + exif
+    return b''.join((
+        data[:header_end],
+        struct.pack('>I', len(exif)),
+        chunk,
+        struct.pack('>I', zlib.crc32(chunk)),
+        data[header_end:],
+    ))
@@ -0,0 +1,141 @@
+'''
+The X display connection shared by everything in gscreenshot that
+talks to X in-process (pointer queries, python-xlib captures, the
+output layout and the live cursor)
+'''
+import contextlib
+import threading
+import typing
+
+from gscreenshot.util import session_is_wayland
+
+try:
+    from Xlib import display
+    from Xlib.error import ConnectionClosedError, DisplayError, XError
+    # Errors after which the connection is opened again the next time
+    X_ERRORS: typing.Tuple[typing.Type[BaseException], ...] = (
+        OSError, ConnectionClosedError, DisplayError, XError
+    )
+except ImportError:
+    display = None
+    X_ERRORS = (OSError,)
+
+
+class XConnection(object):
+    '''
+    One X display connection, opened the first time it's used and kept
+    open, so querying the pointer many times a second (as bursts do)
+    doesn't connect to the X server each time.
+
+    Requests are made while holding the connection, one thread at a
+    time. Events are handed to every subscriber, so several features
+    can select the events they need on the same connection.
+    '''
+
+    __slots__ = ('_connect', '_display', '_lock', '_subscribers')
+
+    _display: typing.Any
+    _subscribers: typing.List[typing.Tuple[typing.Callable[[typing.Any], typing.Any],
+                                           typing.Callable[[typing.Any], typing.Any]]]
+
+    def __init__(self, connect: typing.Optional[typing.Callable[[], typing.Any]]=None):
+        '''
+        Parameters:
+            connect: opens a connection, Xlib.display.Display by default
+        '''
+        if connect is None and display is not None:
+            connect = display.Display
+
+        self._connect = connect
+        self._display = None
+        self._lock = threading.RLock()
+        self._subscribers = []
+
+    @property
+    def available(self) -> bool:
+        '''Whether python-xlib is installed and the session isn't Wayland'''
+        return self._connect is not None and not session_is_wayland()
+
+    @contextlib.contextmanager
+    def use(self) -> typing.Iterator[typing.Any]:
+        '''
+        Holds the connection for some requests:
+
+            with get_x_connection().use() as xdisplay:
+                xdisplay.screen().root.query_pointer()
+
+        Events that have arrived are handed to the subscribers first.
+        If the requests fail with one of X_ERRORS, the connection is
+        closed so the next use opens a new one, and the error is raised.
+        Opening it raises one of X_ERRORS if it can't connect.
+        '''
+        with self._lock:
+            xdisplay = self._open()
+            try:
+                while xdisplay.pending_events():
+                    event = xdisplay.next_event()
+                    for _setup, handler in self._subscribers:
+                        handler(event)
+
+                yield xdisplay
+            except X_ERRORS:
+                self.close()
+                raise
+
+    def subscribe(self, setup: typing.Callable[[typing.Any], typing.Any],
+                  handler: typing.Callable[[typing.Any], typing.Any]):
+        '''
+        Has handler called with each event the connection receives.
+
+        setup is called with the display whenever a connection is
+        opened (now, if one is open), to select the events the handler
+        wants. What the subscriber learned from an earlier connection
+        may be out of date by then.
+        '''
+        with self._lock:
+            self._subscribers.append((setup, handler))
+            if self._display is not None:
+                try:
+                    setup(self._display)
+                except X_ERRORS:
+                    self.close()
+                    raise
+
+    def close(self):
+        '''Closes the connection, if it's open'''
+        with self._lock:
+            if self._display is None:
+                return
+
+            xdisplay = self._display
+            self._display = None
+            try:
+                xdisplay.close()
+            except X_ERRORS:
+                pass
+
+    def _open(self):
+        if self._display is not None:
+            return self._display
+
+        if self._connect is None:
+            raise OSError("python-xlib isn't available")
+
+        xdisplay = self._connect()
+        try:
+            for setup, _handler in self._subscribers:
+                setup(xdisplay)
+        except X_ERRORS:
+            xdisplay.close()
+            raise
+
+        self._display = xdisplay
+        return xdisplay
+
+
+_x_connection = XConnection()
+
+
+def get_x_connection() -> XConnection:
+    '''Returns the process-wide X connection'''
+    return _x_connection
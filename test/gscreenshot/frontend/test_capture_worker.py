@@ -0,0 +1,84 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+import mock
+
+from src.gscreenshot.frontend.capture_worker import CaptureWorker
+
+
+def dispatch(callback, *args):
+    callback(*args)
+
+
+class CaptureWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Mock()
+        self.worker = CaptureWorker(self.app, dispatch)
+
+    def test_capture_runs_off_thread(self):
+        threads = []
+        on_done = Mock()
+
+        self.worker.submit(lambda: threads.append(threading.current_thread()), on_done)
+
+        self.assertTrue(self.worker.join(5))
+        self.assertNotEqual([threading.current_thread()], threads)
+        on_done.assert_called_once_with(False)
+        self.assertFalse(self.worker.busy)
+
+    def test_waiting_capture_is_replaced(self):
+        release = threading.Event()
+        started = threading.Event()
+        captured = []
+
+        def blocking_capture():
+            started.set()
+            release.wait(5)
+
+        self.worker.submit(blocking_capture, Mock())
+        started.wait(5)
+        replaced = Mock()
+        self.worker.submit(lambda: captured.append('replaced'), replaced)
+        self.worker.submit(lambda: captured.append('latest'), Mock())
+        release.set()
+
+        self.assertTrue(self.worker.join(5))
+        self.assertEqual(['latest'], captured)
+        replaced.assert_called_once_with(True)
+
+    def test_cancel_running_capture(self):
+        started = threading.Event()
+        cancelled = threading.Event()
+        on_done = Mock()
+        self.app.cancel_screenshot.side_effect = cancelled.set
+
+        def capture():
+            started.set()
+            cancelled.wait(5)
+
+        self.worker.submit(capture, on_done)
+        started.wait(5)
+
+        self.assertTrue(self.worker.cancel())
+        self.assertTrue(self.worker.join(5))
+        self.app.cancel_screenshot.assert_called_once()
+        on_done.assert_called_once_with(True)
+
+    def test_cancel_when_idle(self):
+        self.assertFalse(self.worker.cancel())
+        self.app.cancel_screenshot.assert_not_called()
+
+    @mock.patch('src.gscreenshot.frontend.capture_worker.traceback')
+    def test_failed_capture_keeps_worker(self, mock_traceback):
+        def broken_capture():
+            raise ValueError("broken")
+
+        on_done = Mock()
+        self.worker.submit(broken_capture, Mock())
+        self.assertTrue(self.worker.join(5))
+        self.worker.submit(lambda: None, on_done)
+
+        self.assertTrue(self.worker.join(5))
+        on_done.assert_called_once_with(False)
@@ -0,0 +1,91 @@
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock
+import mock
+
+from src.gscreenshot.frontend import daemon
+
+
+class DaemonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime_dir = tempfile.mkdtemp()
+        self.environ = mock.patch.dict(os.environ, {'XDG_RUNTIME_DIR': self.runtime_dir})
+        self.environ.start()
+
+        self.gscreenshot = Mock()
+        self.requests = []
+
+        def run_args(gscreenshot, args):
+            self.requests.append(args)
+            gscreenshot.saved_last_image = True
+            gscreenshot.last_save_file = args.filename
+            print("took a screenshot")
+            return 3
+
+        self.server = daemon.GscreenshotDaemon(
+            daemon.get_socket_path(), self.gscreenshot, run_args
+        )
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.environ.stop()
+        shutil.rmtree(self.runtime_dir)
+
+    def test_socket_path(self):
+        self.assertEqual(
+            os.path.join(self.runtime_dir, "gscreenshot.sock"), daemon.get_socket_path()
+        )
+
+    def test_socket_is_private(self):
+        mode = os.stat(daemon.get_socket_path()).st_mode & 0o777
+        self.assertEqual(0o600, mode)
+
+    def test_send_request(self):
+        args = argparse.Namespace(filename="shot.png", clip=False, selection=True)
+
+        response = daemon.send_request(args)
+
+        self.assertEqual(3, response['exit_code'])
+        self.assertEqual("took a screenshot\n", response['output'])
+        self.assertEqual(os.path.abspath("shot.png"), response['path'])
+        self.assertTrue(self.requests[0].selection)
+
+    def test_send_request_failed(self):
+        self.server.run_args = Mock(side_effect=OSError("no display"))
+        args = argparse.Namespace(filename="shot.png", clip=False)
+
+        response = daemon.send_request(args)
+
+        self.assertEqual(1, response['exit_code'])
+        self.assertIn("no display", response['output'])
+        self.assertIsNone(response['path'])
+
+    def test_send_request_default_filename_uses_client_directory(self):
+        args = argparse.Namespace(filename=False, clip=False)
+
+        daemon.send_request(args)
+
+        self.assertEqual(os.getcwd(), self.requests[0].filename)
+
+    def test_send_request_clip_only(self):
+        args = argparse.Namespace(filename=False, clip=True)
+
+        daemon.send_request(args)
+
+        self.assertIs(False, self.requests[0].filename)
+
+    def test_send_request_no_daemon(self):
+        with mock.patch.dict(os.environ, {'XDG_RUNTIME_DIR': tempfile.gettempdir() + "/nonexistent"}):
+            self.assertIsNone(daemon.send_request(argparse.Namespace(filename=False, clip=False)))
+
+    def test_serve_refuses_second_daemon(self):
+        self.assertEqual(1, daemon.serve(self.gscreenshot, Mock()))
@@ -40,10 +40,28 @@ class GtkPresenterTest(unittest.TestCase):
         self.app.open_last_screenshot.assert_called_once()
         self.app.quit.assert_called_once()
 
+    @mock.patch('src.gscreenshot.frontend.gtk.FileSaveDialog')
+    def test_on_button_saveas_clicked_saves_in_background(self, mock_dialog):
+        self.view.run_dialog.return_value = 'potato.png'
+        self.presenter.on_button_saveas_clicked()
+
+        self.app.save_last_image.assert_not_called()
+        self.app.save_last_image_in_background.assert_called_once()
+        self.view.set_busy.assert_called_once()
+
+        on_done = self.app.save_last_image_in_background.call_args[0][1]
+        self.assertFalse(on_done(True))
+        self.view.set_ready.assert_called_once()
+        self.view.flash_status_icon.assert_called_once_with("document-save")
+
     def test_on_fullscreen_toggle(self):
         self.presenter.on_fullscreen_toggle()
         self.view.toggle_fullscreen.assert_called_once()
 
+    def test_on_escape_pressed_quits_when_idle(self):
+        self.presenter.on_escape_pressed()
+        self.app.quit.assert_called_once()
+
     def test_on_button_quit_clicked(self):
         self.presenter.on_button_quit_clicked()
         self.app.quit.assert_called_once()
@@ -54,6 +72,20 @@ class GtkPresenterTest(unittest.TestCase):
         # Called once in the constructor already
         self.assertEqual(self.app.get_thumbnail.call_count, 2)
 
+    def test_image_to_pixbuf_keeps_alpha(self):
+        pixbuf = self.presenter._image_to_pixbuf(Image.new('RGBA', (5, 3), (255, 0, 0, 128)))
+
+        self.assertEqual((5, 3), (pixbuf.get_width(), pixbuf.get_height()))
+        self.assertTrue(pixbuf.get_has_alpha())
+        self.assertEqual(b'\xff\x00\x00\x80', pixbuf.get_pixels()[:4])
+
+    def test_image_to_pixbuf_odd_width_rgb(self):
+        pixbuf = self.presenter._image_to_pixbuf(Image.new('L', (3, 2), 7))
+
+        self.assertFalse(pixbuf.get_has_alpha())
+        self.assertEqual(9, pixbuf.get_rowstride())
+        self.assertEqual(b'\x07' * 3, pixbuf.get_pixels()[:3])
+
     def test_on_button_copy_and_close_clicked(self):
         self.presenter.on_button_copy_and_close_clicked()
         self.view.copy_to_clipboard.assert_called_once()
@@ -70,18 +102,40 @@ class GtkPresenterTest(unittest.TestCase):
         # Note - this is more of an integration test as we're not
         # mocking any of the threading
         self.presenter.on_button_all_clicked()
+        self.assertTrue(self.presenter._worker.join(5))
         self.app.screenshot_full_display.assert_called_once()
         self.app.get_thumbnail.assert_called_once()
         self.view.update_preview.assert_called_once()
 
+    def test_escape_cancels_delay_while_hidden(self):
+        self.presenter.set_keymappings({65307: self.presenter.on_escape_pressed})
+        self.presenter._worker = Mock()
+        self.presenter.on_button_all_clicked()
+
+        self.view.hide.assert_called_once()
+        on_key_press = self.view.grab_keyboard.call_args[0][0]
+        on_key_press(Mock(), Mock(keyval=65307))
+
+        self.presenter._worker.cancel.assert_called_once()
+        self.app.quit.assert_not_called()
+
+    def test_selection_leaves_keyboard_to_selector(self):
+        self.presenter._worker = Mock()
+        self.presenter.on_button_selectarea_clicked()
+
+        self.view.hide.assert_called_once()
+        self.view.grab_keyboard.assert_not_called()
+
     def test_on_button_window_clicked(self):
         self.presenter.on_button_window_clicked()
+        self.assertTrue(self.presenter._worker.join(5))
         self.app.screenshot_selected.assert_called_once()
         self.app.get_thumbnail.assert_called_once()
         self.view.update_preview.assert_called_once()
 
     def test_on_button_selectarea_clicked(self):
         self.presenter.on_button_selectarea_clicked()
+        self.assertTrue(self.presenter._worker.join(5))
         self.app.screenshot_selected.assert_called_once()
         self.app.get_thumbnail.assert_called_once()
         self.view.update_preview.assert_called_once()
@@ -0,0 +1,50 @@
+import unittest
+from unittest.mock import Mock
+
+from src.gscreenshot.screenshooter.capture import Capture
+
+
+class CaptureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.image = Mock()
+        self.capture = Capture(
+            self.image, (0, 0, 20, 30), 'scrot', 1.0, 1.25, encoded=('png', b'png')
+        )
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.capture.image = Mock()
+
+        with self.assertRaises(AttributeError):
+            del self.capture.box
+
+        self.assertIs(self.image, self.capture.image)
+
+    def test_latency(self):
+        self.assertEqual(0.25, self.capture.latency)
+
+    def test_with_image_drops_encoded(self):
+        cropped = Mock()
+        actual = self.capture.with_image(cropped, (5, 5, 10, 10))
+
+        self.assertIs(cropped, actual.image)
+        self.assertEqual((5, 5, 10, 10), actual.box)
+        self.assertEqual('scrot', actual.backend)
+        self.assertIsNone(actual.encoded)
+        self.assertEqual(('png', b'png'), self.capture.encoded)
+
+    def test_release_gives_back_share(self):
+        share = Mock()
+        capture = Capture(self.image, share=share)
+
+        capture.release()
+
+        share.release.assert_called_once_with()
+        self.assertIs(self.image, capture.image)
+
+    def test_release_without_share(self):
+        self.capture.release()
+
+    def test_no_encoded_without_image(self):
+        self.assertIsNone(Capture(None, encoded=('png', b'png')).encoded)
@@ -0,0 +1,151 @@
+import threading
+import time
+import unittest
+import mock
+
+from src.gscreenshot.backend_stats import BackendStats
+from src.gscreenshot.probe_cache import ProbeCache
+from src.gscreenshot.registry import BackendInfo
+from src.gscreenshot.screenshooter import Screenshooter
+from src.gscreenshot.screenshooter import factory as factory_module
+from src.gscreenshot.screenshooter.factory import ScreenshooterFactory
+
+
+class SlowScreenshooter(Screenshooter):
+    __utilityname__ = "slow"
+
+    @staticmethod
+    def can_run():
+        time.sleep(0.1)
+        return True
+
+
+class FastScreenshooter(Screenshooter):
+    __utilityname__ = "fast"
+
+    @staticmethod
+    def can_run():
+        return True
+
+
+class HungScreenshooter(Screenshooter):
+    __utilityname__ = "hung"
+    release = threading.Event()
+
+    @staticmethod
+    def can_run():
+        HungScreenshooter.release.wait(5)
+        return True
+
+
+class BrokenScreenshooter(Screenshooter):
+    __utilityname__ = "broken"
+
+    @staticmethod
+    def can_run():
+        return False
+
+
+SLOW = BackendInfo('slow', SlowScreenshooter)
+FAST = BackendInfo('fast', FastScreenshooter)
+HUNG = BackendInfo('hung', HungScreenshooter)
+BROKEN = BackendInfo('broken', BrokenScreenshooter)
+
+
+@mock.patch('src.gscreenshot.screenshooter.factory.SelectorFactory')
+class ScreenshooterFactoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.factory = ScreenshooterFactory()
+        HungScreenshooter.release.clear()
+
+    def tearDown(self):
+        HungScreenshooter.release.set()
+
+    def test_preference_order_wins(self, mock_selector_factory):
+        self.factory.screenshooters = [SLOW, FAST]
+
+        screenshooter = self.factory.create()
+
+        self.assertIsInstance(screenshooter, SlowScreenshooter)
+        self.assertEqual(mock_selector_factory.return_value.create.return_value,
+                         screenshooter.selector)
+
+    @mock.patch('src.gscreenshot.screenshooter.factory.PROBE_TIMEOUT', 0.2)
+    def test_hung_probe_is_skipped(self, mock_selector_factory):
+        self.factory.screenshooters = [HUNG, FAST]
+
+        start = time.monotonic()
+        screenshooter = self.factory.create()
+
+        self.assertIsInstance(screenshooter, FastScreenshooter)
+        self.assertLess(time.monotonic() - start, 2)
+
+    @mock.patch('src.gscreenshot.screenshooter.factory.PROBE_TIMEOUT', 0.2)
+    @mock.patch('src.gscreenshot.screenshooter.SelectorFactory')
+    def test_hung_selector_probe_not_repeated(self, mock_own_selector_factory,
+                                              mock_selector_factory):
+        release = threading.Event()
+        mock_selector_factory.return_value.create.side_effect = lambda: release.wait(5)
+        self.factory.screenshooters = [FAST]
+
+        start = time.monotonic()
+        try:
+            screenshooter = self.factory.create()
+        finally:
+            release.set()
+
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertIsNone(screenshooter.selector)
+        mock_own_selector_factory.assert_not_called()
+
+    @mock.patch('src.gscreenshot.screenshooter.SelectorFactory')
+    def test_no_selector_not_probed_again(self, mock_own_selector_factory,
+                                          mock_selector_factory):
+        mock_selector_factory.return_value.create.side_effect = \
+            factory_module.NoSupportedSelectorError()
+        self.factory.screenshooters = [FAST]
+
+        screenshooter = self.factory.create()
+
+        self.assertIsNone(screenshooter.selector)
+        mock_selector_factory.return_value.create.assert_called_once()
+        mock_own_selector_factory.assert_not_called()
+
+    def test_none_supported(self, mock_selector_factory):
+        self.factory.screenshooters = [BROKEN]
+
+        with self.assertRaises(factory_module.NoSupportedScreenshooterError):
+            self.factory.create()
+
+    def test_cached(self, mock_selector_factory):
+        probe_cache = ProbeCache()
+        probe_cache.probe(BROKEN)
+        probe_cache.probe(FAST)
+        probe_cache = ProbeCache(probe_cache.to_dict())
+
+        factory = ScreenshooterFactory(probe_cache=probe_cache)
+        factory.screenshooters = [BROKEN, FAST]
+
+        self.assertIsInstance(factory.create(), FastScreenshooter)
+        self.assertTrue(probe_cache.hit)
+        self.assertEqual(0, probe_cache.misses)
+
+    def test_alternatives_skip_unhealthy(self, mock_selector_factory):
+        stats = BackendStats()
+        stats.record('slow', False)
+        stats.record('slow', False)
+        self.factory.stats = stats
+        self.factory.screenshooters = [FAST, BROKEN, SLOW]
+
+        alternatives = list(self.factory.create_alternatives([FAST]))
+
+        self.assertEqual([], alternatives)
+
+    def test_alternatives_in_order(self, mock_selector_factory):
+        self.factory.screenshooters = [FAST, BROKEN, SLOW]
+
+        alternatives = list(self.factory.create_alternatives([FAST]))
+
+        self.assertEqual([SLOW], [backend for backend, _ in alternatives])
+        self.assertIsInstance(alternatives[0][1], SlowScreenshooter)
@@ -0,0 +1,107 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from PIL import Image
+
+from src.gscreenshot.screenshooter import Screenshooter
+from src.gscreenshot.screenshooter.hedged import HedgedScreenshooter
+
+
+class FakeScreenshooter(Screenshooter):
+
+    def __init__(self, latency=0.0, fails=False):
+        Screenshooter.__init__(self, Mock())
+        self.latency = latency
+        self.fails = fails
+        self.grabs = 0
+        self.cancelled = threading.Event()
+
+    def grab_fullscreen(self, delay=0, capture_cursor=False):
+        self.grabs += 1
+        self._image = None
+        if self.cancelled.wait(self.latency):
+            return
+
+        self._image = None if self.fails else Image.new('RGB', (4, 3))
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class HedgedScreenshooterTest(unittest.TestCase):
+
+    def test_fast_primary_not_hedged(self):
+        primary = FakeScreenshooter()
+        secondary = FakeScreenshooter()
+        hedged = HedgedScreenshooter(primary, secondary, budget=1)
+
+        hedged.grab_fullscreen_()
+
+        self.assertEqual(primary.image, hedged.image)
+        self.assertEqual(1, len(hedged.outcomes))
+        self.assertIs(primary, hedged.outcomes[0].screenshooter)
+        self.assertTrue(hedged.outcomes[0].success)
+        self.assertIsNotNone(hedged.outcomes[0].latency)
+        self.assertEqual(0, secondary.grabs)
+
+    def test_returns_winning_capture(self):
+        primary = FakeScreenshooter(fails=True)
+        hedged = HedgedScreenshooter(primary, FakeScreenshooter(), budget=5)
+
+        capture = hedged.grab_fullscreen_()
+
+        self.assertIs(hedged.image, capture.image)
+        self.assertEqual((0, 0, 4, 3), capture.box)
+        self.assertEqual('FakeScreenshooter', capture.backend)
+        self.assertIs(capture, hedged.last_capture)
+
+    def test_slow_primary_hedged(self):
+        primary = FakeScreenshooter(latency=5)
+        secondary = FakeScreenshooter()
+        hedged = HedgedScreenshooter(primary, secondary, budget=0.05)
+
+        start = time.monotonic()
+        hedged.grab_fullscreen_()
+
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(secondary.image, hedged.image)
+        self.assertIsNotNone(hedged.image)
+        self.assertTrue(primary.cancelled.is_set())
+
+        outcomes = {outcome.screenshooter: outcome for outcome in hedged.outcomes}
+        self.assertTrue(outcomes[secondary].success)
+        # The primary timed out rather than failed, and ran for at least the budget
+        self.assertTrue(outcomes[primary].success)
+        self.assertGreaterEqual(outcomes[primary].latency, 0.05)
+
+    def test_failed_primary_hedged_at_once(self):
+        primary = FakeScreenshooter(fails=True)
+        secondary = FakeScreenshooter()
+        hedged = HedgedScreenshooter(primary, secondary, budget=5)
+
+        start = time.monotonic()
+        hedged.grab_fullscreen_()
+
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(secondary.image, hedged.image)
+        self.assertEqual(
+            [(primary, False), (secondary, True)],
+            [(outcome.screenshooter, outcome.success) for outcome in hedged.outcomes]
+        )
+
+    def test_both_fail(self):
+        hedged = HedgedScreenshooter(
+            FakeScreenshooter(fails=True), FakeScreenshooter(fails=True), budget=0.05
+        )
+
+        hedged.grab_fullscreen_()
+
+        self.assertIsNone(hedged.image)
+
+    def test_separate_tempfiles(self):
+        primary = FakeScreenshooter()
+        secondary = FakeScreenshooter()
+
+        self.assertNotEqual(primary.tempfile, secondary.tempfile)
@@ -0,0 +1,97 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from PIL import Image
+
+from src.gscreenshot.screenshooter.image_handle import ImageHandle
+
+# Stamps a cursor onto a 4000x2000 RGBA frame (32 MB) through a handle,
+# then prints how much the peak RSS grew (in KB) and the copies made
+_STAMP = '''
+import resource
+import sys
+from PIL import Image
+from src.gscreenshot.screenshooter.image_handle import ImageHandle
+
+handle = ImageHandle(Image.new('RGBA', (4000, 2000), (1, 2, 3, 255)))
+if sys.argv[1] == 'shared':
+    capture = handle.share()
+cursor = Image.new('RGBA', (32, 32), (255, 0, 0, 255))
+
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+handle.writable().paste(cursor, (10, 10), cursor)
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(after - before, handle.copies)
+'''
+
+
+class ImageHandleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.image = Image.new('RGB', (40, 30), 'blue')
+        self.handle = ImageHandle(self.image)
+
+    def test_sole_owner_writes_in_place(self):
+        self.assertIs(self.image, self.handle.writable())
+        self.assertFalse(self.handle.shared)
+        self.assertEqual(0, self.handle.copies)
+
+    def test_shared_write_copies_once(self):
+        other = self.handle.share()
+
+        writable = self.handle.writable()
+        writable.putpixel((0, 0), (255, 0, 0))
+
+        self.assertIsNot(self.image, writable)
+        self.assertEqual((0, 0, 255), other.image.getpixel((0, 0)))
+        self.assertEqual(1, self.handle.copies)
+        self.assertEqual(40 * 30 * 3, self.handle.copied_bytes)
+
+        self.assertIs(writable, self.handle.writable())
+        self.assertEqual(1, self.handle.copies)
+        self.assertFalse(self.handle.shared)
+        self.assertFalse(other.shared)
+
+    def test_released_share_writes_in_place(self):
+        other = self.handle.share()
+        self.assertTrue(self.handle.shared)
+
+        other.release()
+
+        self.assertIs(self.image, self.handle.writable())
+        self.assertEqual(0, self.handle.copies)
+        with self.assertRaises(ValueError):
+            other.image
+
+    def test_read_only_write_copies(self):
+        # RGBA is mapped rather than unpacked, so the image is read-only
+        image = Image.frombuffer('RGBA', (40, 30), b'\x00' * 40 * 30 * 4, 'raw', 'RGBA', 0, 1)
+        handle = ImageHandle(image)
+
+        writable = handle.writable()
+        writable.putpixel((0, 0), (255, 0, 0, 255))
+
+        self.assertIsNot(image, writable)
+        self.assertEqual(1, handle.copies)
+        self.assertEqual(40 * 30 * 4, handle.copied_bytes)
+        self.assertIs(writable, handle.writable())
+        self.assertEqual(1, handle.copies)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'ru_maxrss is in KB on Linux')
+    def test_peak_rss(self):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+
+        def stamp(mode):
+            output = subprocess.check_output([sys.executable, '-c', _STAMP, mode], env=env)
+            growth, copies = output.split()
+            return int(growth), int(copies)
+
+        growth, copies = stamp('owned')
+        self.assertEqual(0, copies)
+        self.assertLess(growth, 8 * 1024, f"stamping in place grew the peak RSS by {growth} KB")
+
+        growth, copies = stamp('shared')
+        self.assertEqual(1, copies)
+        self.assertGreater(growth, 24 * 1024, f"copying grew the peak RSS by {growth} KB")
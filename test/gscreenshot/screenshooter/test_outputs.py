@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import Mock
+import mock
+
+from Xlib.ext import randr
+
+from src.gscreenshot.screenshooter.outputs import Output, OutputLayout
+from src.gscreenshot.xconnection import XConnection
+
+
+def _output_info(crtc, name):
+    # name is special to Mock's constructor
+    output_info = Mock(crtc=crtc)
+    output_info.name = name
+    return output_info
+
+
+class OutputLayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.layout = OutputLayout()
+
+    def _mock_randr(self):
+        xdisplay = Mock()
+        self.layout = OutputLayout(XConnection(lambda: xdisplay))
+        xdisplay.has_extension.side_effect = lambda name: name == 'RANDR'
+        xdisplay.pending_events.return_value = 0
+
+        resources = Mock(outputs=[1, 2, 3], config_timestamp=0)
+        xdisplay.screen.return_value.root.xrandr_get_screen_resources_current.return_value = resources
+
+        xdisplay.xrandr_get_output_info.side_effect = lambda output, _: {
+            1: _output_info(10, 'DP-1'),
+            2: _output_info(0, 'DP-2'),
+            3: _output_info(11, 'HDMI-1'),
+        }[output]
+        xdisplay.xrandr_get_crtc_info.side_effect = lambda crtc, _: {
+            10: Mock(x=0, y=0, width=1920, height=1080),
+            11: Mock(x=1920, y=0, width=2560, height=1440),
+        }[crtc]
+
+        return xdisplay
+
+    @mock.patch('src.gscreenshot.screenshooter.outputs.session_is_wayland')
+    def test_get_outputs_randr(self, mock_wayland):
+        mock_wayland.return_value = False
+        xdisplay = self._mock_randr()
+
+        outputs = self.layout.get_outputs()
+
+        self.assertEqual([
+            Output('DP-1', 0, 0, 1920, 1080),
+            Output('HDMI-1', 1920, 0, 2560, 1440),
+        ], outputs)
+        self.assertEqual((1920, 0, 4480, 1440), outputs[1].get_box())
+        xdisplay.screen.return_value.root.xrandr_select_input.assert_called_once()
+
+    @mock.patch('src.gscreenshot.screenshooter.outputs.session_is_wayland')
+    def test_get_outputs_cached_until_randr_event(self, mock_wayland):
+        mock_wayland.return_value = False
+        xdisplay = self._mock_randr()
+        root = xdisplay.screen.return_value.root
+
+        self.layout.get_outputs()
+        self.layout.get_outputs()
+        self.assertEqual(1, root.xrandr_get_screen_resources_current.call_count)
+
+        # Another feature's event on the shared connection
+        xdisplay.pending_events.side_effect = [1, 0]
+        xdisplay.next_event.return_value = Mock()
+        self.layout.get_outputs()
+        self.assertEqual(1, root.xrandr_get_screen_resources_current.call_count)
+
+        xdisplay.pending_events.side_effect = [1, 0]
+        xdisplay.next_event.return_value = Mock(spec=randr.ScreenChangeNotify)
+        self.layout.get_outputs()
+        self.assertEqual(2, root.xrandr_get_screen_resources_current.call_count)
+
+    @mock.patch('src.gscreenshot.screenshooter.outputs.session_is_wayland')
+    @mock.patch('src.gscreenshot.screenshooter.outputs.subprocess')
+    def test_get_outputs_wayland_sway(self, mock_subprocess, mock_wayland):
+        mock_wayland.return_value = True
+        mock_subprocess.check_output.return_value = (
+            b'[{"name": "eDP-1", "active": true,'
+            b' "rect": {"x": 0, "y": 0, "width": 1280, "height": 800}}]'
+        )
+
+        self.assertEqual([Output('eDP-1', 0, 0, 1280, 800)], self.layout.get_outputs())
+
+    @mock.patch('src.gscreenshot.screenshooter.outputs.time')
+    @mock.patch('src.gscreenshot.screenshooter.outputs.session_is_wayland')
+    @mock.patch('src.gscreenshot.screenshooter.outputs.subprocess')
+    def test_get_outputs_wayland_cached(self, mock_subprocess, mock_wayland, mock_time):
+        mock_wayland.return_value = True
+        mock_subprocess.check_output.return_value = (
+            b'[{"name": "eDP-1", "active": true,'
+            b' "rect": {"x": 0, "y": 0, "width": 1280, "height": 800}}]'
+        )
+        mock_time.monotonic.return_value = 100.0
+
+        self.layout.get_outputs()
+        self.layout.get_outputs()
+        self.assertEqual(1, mock_subprocess.check_output.call_count)
+
+        mock_time.monotonic.return_value = 110.0
+        self.layout.get_outputs()
+        self.assertEqual(2, mock_subprocess.check_output.call_count)
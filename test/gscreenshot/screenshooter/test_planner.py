@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import Mock
+
+from src.gscreenshot.screenshooter import planner
+from src.gscreenshot.screenshooter.planner import BackendCapabilities, CaptureRequest, make_plan
+from src.gscreenshot.util import GSCapabilities
+
+
+UTILITY = BackendCapabilities(
+    [GSCapabilities.REGION_CAPTURE, GSCapabilities.CURSOR_CAPTURE],
+    ('png', 'ppm', 'jpeg')
+)
+FULLSCREEN_ONLY = BackendCapabilities([], ('png',))
+IN_PROCESS = BackendCapabilities([GSCapabilities.REGION_CAPTURE], ())
+
+
+class PlannerTest(unittest.TestCase):
+
+    def test_native_region(self):
+        plan = make_plan(CaptureRequest(planner.REGION, (0, 0, 10, 10)), UTILITY)
+
+        self.assertEqual(planner.REGION, plan.capture)
+        self.assertFalse(plan.crop)
+
+    def test_region_cropped(self):
+        plan = make_plan(CaptureRequest(planner.REGION, (0, 0, 10, 10)), FULLSCREEN_ONLY)
+
+        self.assertEqual(planner.FULLSCREEN, plan.capture)
+        self.assertTrue(plan.crop)
+
+    def test_native_cursor(self):
+        plan = make_plan(CaptureRequest(capture_cursor=True), UTILITY)
+
+        self.assertEqual(planner.CURSOR_NATIVE, plan.cursor)
+        self.assertTrue(plan.native_cursor)
+
+    def test_alternate_cursor_composited(self):
+        plan = make_plan(
+            CaptureRequest(planner.REGION, (0, 0, 10, 10), capture_cursor=True, use_cursor=Mock()),
+            UTILITY
+        )
+
+        self.assertEqual(planner.CURSOR_COMPOSITED, plan.cursor)
+        self.assertFalse(plan.native_cursor)
+        # The cursor is placed on the full screen
+        self.assertEqual(planner.FULLSCREEN, plan.capture)
+        self.assertTrue(plan.crop)
+
+    def test_passthrough(self):
+        plan = make_plan(CaptureRequest(destination_format='jpeg'), UTILITY)
+
+        self.assertEqual(planner.ENCODE_PASSTHROUGH, plan.encode)
+        self.assertEqual('jpeg', plan.intermediate_format)
+
+    def test_cheapest_format_without_destination(self):
+        plan = make_plan(CaptureRequest(), UTILITY)
+
+        self.assertEqual(planner.ENCODE_REENCODE, plan.encode)
+        self.assertEqual('ppm', plan.intermediate_format)
+
+    def test_reencode_unsupported_destination(self):
+        plan = make_plan(CaptureRequest(destination_format='webp'), UTILITY)
+
+        self.assertEqual(planner.ENCODE_REENCODE, plan.encode)
+        self.assertEqual('ppm', plan.intermediate_format)
+
+    def test_reencode_when_cropped(self):
+        plan = make_plan(
+            CaptureRequest(planner.REGION, (0, 0, 10, 10), destination_format='png'),
+            FULLSCREEN_ONLY
+        )
+
+        self.assertEqual(planner.ENCODE_REENCODE, plan.encode)
+
+    def test_in_process(self):
+        plan = make_plan(CaptureRequest(planner.REGION, destination_format='png'), IN_PROCESS)
+
+        self.assertIsNone(plan.intermediate_format)
+        self.assertEqual(planner.ENCODE_REENCODE, plan.encode)
+
+    def test_explain(self):
+        explanation = make_plan(CaptureRequest(destination_format='png'), UTILITY).explain()
+
+        self.assertIn("encode: passthrough", explanation)
+        self.assertIn("saved as is", explanation)
@@ -1,3 +1,7 @@
+import io
+import subprocess
+import threading
+import time
 import unittest
 from unittest.mock import Mock
 import mock
@@ -6,7 +10,24 @@ from pkg_resources import resource_filename
 from PIL import Image
 from PIL import ImageChops
 from gscreenshot.selector import SelectionCancelled, SelectionParseError
+from gscreenshot.util import GSCapabilities
 from src.gscreenshot.screenshooter import Screenshooter
+from src.gscreenshot.screenshooter.outputs import Output
+from src.gscreenshot.xconnection import XConnection
+
+
+def _point_at(mock_x_connection, pointer):
+    xdisplay = Mock()
+    xdisplay.pending_events.return_value = 0
+    xdisplay.screen.return_value.root.query_pointer.return_value._data = pointer
+    mock_x_connection.return_value = XConnection(lambda: xdisplay)
+    return xdisplay
+
+
+def _mock_image(size):
+    image = Mock(size=size, readonly=0)
+    image.copy.return_value = image
+    return image
 
 
 class BaseScreenshooter(Screenshooter):
@@ -16,21 +37,15 @@ class BaseScreenshooter(Screenshooter):
         self.called = None
 
     def grab_fullscreen(self, delay=0, capture_cursor=False):
-        self._image = Mock()
-        self._image.size = (20, 30)
-        self._image.copy.return_value = self._image
+        self._image = _mock_image((20, 30))
         self.called = "fullscreen"
 
     def grab_selection(self, delay=0, capture_cursor=False):
-        self._image = Mock()
-        self._image.size = (20, 30)
-        self._image.copy.return_value = self._image
+        self._image = _mock_image((20, 30))
         self.called = "selection"
 
     def grab_window(self, delay=0, capture_cursor=False):
-        self._image = Mock()
-        self._image.size = (20, 30)
-        self._image.copy.return_value = self._image
+        self._image = _mock_image((20, 30))
         self.called = "window"
 
     def set_image(self, image):
@@ -41,6 +56,27 @@ class BaseScreenshooter(Screenshooter):
         return True
 
 
+class OutputScreenshooter(BaseScreenshooter):
+
+    def capture_output(self, output, capture_cursor=False):
+        image = Mock()
+        image.size = (output.width, output.height)
+        return image
+
+    def get_capabilities(self):
+        return [GSCapabilities.OUTPUT_CAPTURE]
+
+
+class RegionScreenshooter(BaseScreenshooter):
+
+    def grab_region(self, box, delay=0, capture_cursor=False):
+        self._image = _mock_image((box[2] - box[0], box[3] - box[1]))
+        self.called = "region"
+
+    def get_capabilities(self):
+        return [GSCapabilities.REGION_CAPTURE]
+
+
 class ScreenshooterTest(unittest.TestCase):
 
     def setUp(self):
@@ -53,12 +89,21 @@ class ScreenshooterTest(unittest.TestCase):
         self.screenshooter.grab_fullscreen_()
         self.assertIsNotNone(self.screenshooter.image)
 
+    def test_grab_fullscreen_returns_capture(self):
+        capture = self.screenshooter.grab_fullscreen_()
+
+        self.assertIs(self.screenshooter.image, capture.image)
+        self.assertEqual((0, 0, 20, 30), capture.box)
+        self.assertEqual('BaseScreenshooter', capture.backend)
+        self.assertIs(capture, self.screenshooter.last_capture)
+
     @mock.patch('src.gscreenshot.screenshooter.PIL')
-    @mock.patch('src.gscreenshot.screenshooter.display')
+    @mock.patch('src.gscreenshot.screenshooter.get_x_connection')
     def test_grab_fullscreen_capture_cursor(self, mock_xlib, mock_pil):
-        mock_xlib.Display().screen().root.query_pointer()._data = {'root_x': 20, 'root_y': 40}
+        _point_at(mock_xlib, {'root_x': 20, 'root_y': 40})
         mock_cursor = Mock()
         mock_cursor.size = (20, 30)
+        mock_cursor.copy.return_value = mock_cursor
         self.screenshooter.grab_fullscreen_(capture_cursor=True, use_cursor=mock_cursor)
         self.assertIsNotNone(self.screenshooter.image)
         self.screenshooter.image.paste.assert_called_once()
@@ -69,11 +114,12 @@ class ScreenshooterTest(unittest.TestCase):
         self.assertIsNotNone(self.screenshooter.image)
 
     @mock.patch('src.gscreenshot.screenshooter.PIL')
-    @mock.patch('src.gscreenshot.screenshooter.display')
+    @mock.patch('src.gscreenshot.screenshooter.get_x_connection')
     def test_grab_selection_capture_cursor(self, mock_xlib, mock_pil):
-        mock_xlib.Display().screen().root.query_pointer()._data = {'root_x': 20, 'root_y': 40}
+        _point_at(mock_xlib, {'root_x': 20, 'root_y': 40})
         mock_cursor = Mock()
         mock_cursor.size = (20, 30)
+        mock_cursor.copy.return_value = mock_cursor
         self.screenshooter.grab_selection_(capture_cursor=True, use_cursor=mock_cursor)
         self.assertIsNotNone(self.screenshooter.image)
         # Stamping the cursor onto a selected area is not trivial, so we currently
@@ -87,18 +133,19 @@ class ScreenshooterTest(unittest.TestCase):
         self.assertIsNotNone(self.screenshooter.image)
 
     @mock.patch('src.gscreenshot.screenshooter.PIL')
-    @mock.patch('src.gscreenshot.screenshooter.display')
+    @mock.patch('src.gscreenshot.screenshooter.get_x_connection')
     def test_grab_window_capture_cursor(self, mock_xlib, mock_pil):
-        mock_xlib.Display().screen().root.query_pointer()._data = {'root_x': 20, 'root_y': 40}
+        _point_at(mock_xlib, {'root_x': 20, 'root_y': 40})
         mock_cursor = Mock()
         mock_cursor.size = (20, 30)
+        mock_cursor.copy.return_value = mock_cursor
         self.screenshooter.grab_window_(capture_cursor=True, use_cursor=mock_cursor)
         self.assertIsNotNone(self.screenshooter.image)
         self.screenshooter.image.paste.assert_called_once()
 
-    @mock.patch('src.gscreenshot.screenshooter.display')
+    @mock.patch('src.gscreenshot.screenshooter.get_x_connection')
     def test_add_fake_cursor(self, mock_xlib):
-        mock_xlib.Display().screen().root.query_pointer()._data = {'root_x': 20, 'root_y': 40}
+        _point_at(mock_xlib, {'root_x': 20, 'root_y': 40})
 
         original_img = Image.open(
                 resource_filename('gscreenshot.resources.pixmaps', 'gscreenshot.png')
@@ -121,9 +168,91 @@ class ScreenshooterTest(unittest.TestCase):
             100,
             "cursor was not stamped onto the test image correctly")
 
-    @mock.patch('src.gscreenshot.screenshooter.display')
+    def test_add_fake_cursor_live(self):
+        original_img = Image.new('RGB', (100, 100))
+        sprite = Image.new('RGBA', (4, 4), (255, 0, 0, 255))
+        xfixes = Mock()
+        xfixes.is_live.return_value = True
+        xfixes.get.return_value = (sprite, (2, 2), (50, 60))
+
+        with mock.patch('src.gscreenshot.screenshooter.get_cursor_store') as store:
+            store.return_value.xfixes = xfixes
+            self.screenshooter.set_image(original_img)
+            self.screenshooter.add_fake_cursor(sprite)
+
+        image = self.screenshooter.image
+        self.assertEqual((255, 0, 0), image.getpixel((48, 58)))
+        self.assertEqual((255, 0, 0), image.getpixel((51, 61)))
+        self.assertEqual((0, 0, 0), image.getpixel((52, 62)))
+
+    def test_default_cursor_is_live(self):
+        # A utility that can't capture the cursor (like python-xlib) gets
+        # the cursor that's showing, not the default cursor image
+        sprite = Image.new('RGBA', (4, 4), (255, 0, 0, 255))
+        xfixes = Mock()
+        xfixes.is_live.return_value = False
+        xfixes.get.return_value = (sprite, (0, 0), (10, 10))
+        grab = Mock(side_effect=lambda delay, capture_cursor:
+                    self.screenshooter.set_image(Image.new('RGB', (100, 100))))
+        self.screenshooter.grab_fullscreen = grab
+
+        with mock.patch('src.gscreenshot.screenshooter.get_cursor_store') as store:
+            store.return_value.xfixes = xfixes
+            self.screenshooter.grab_fullscreen_(capture_cursor=True)
+
+        grab.assert_called_once_with(0, False)
+        store.return_value.get.assert_not_called()
+        self.assertEqual((255, 0, 0), self.screenshooter.image.getpixel((10, 10)))
+
+    def _stamp_live_cursor(self):
+        sprite = Image.new('RGBA', (4, 4), (255, 0, 0, 255))
+        xfixes = Mock()
+        xfixes.is_live.return_value = True
+        xfixes.get.return_value = (sprite, (0, 0), (10, 10))
+
+        with mock.patch('src.gscreenshot.screenshooter.get_cursor_store') as store:
+            store.return_value.xfixes = xfixes
+            self.screenshooter.add_fake_cursor(sprite)
+
+    def test_add_fake_cursor_in_place(self):
+        original_img = Image.new('RGB', (100, 100))
+        self.screenshooter.set_image(original_img)
+
+        self._stamp_live_cursor()
+
+        self.assertIs(original_img, self.screenshooter.image)
+        self.assertEqual(0, self.screenshooter._handle.copies)
+
+    def test_add_fake_cursor_copies_shared_capture(self):
+        self.screenshooter.set_image(Image.new('RGB', (100, 100)))
+        capture = self.screenshooter._finish_capture(0.0)
+
+        self._stamp_live_cursor()
+
+        self.assertIsNot(capture.image, self.screenshooter.image)
+        self.assertEqual((0, 0, 0), capture.image.getpixel((10, 10)))
+        self.assertEqual((255, 0, 0), self.screenshooter.image.getpixel((10, 10)))
+        self.assertEqual(1, self.screenshooter._handle.copies)
+        self.assertEqual(100 * 100 * 3, self.screenshooter._handle.copied_bytes)
+
+    def test_replaced_capture_gives_back_share(self):
+        self.screenshooter.set_image(Image.new('RGB', (100, 100)))
+        first = self.screenshooter._finish_capture(0.0)
+        second = self.screenshooter._finish_capture(0.0)
+
+        self.assertTrue(second._share.shared)
+        with self.assertRaises(ValueError):
+            first._share.image
+
+        self.screenshooter.set_image(Image.new('RGB', (100, 100)))
+        self.screenshooter._finish_capture(0.0)
+
+        with self.assertRaises(ValueError):
+            second._share.image
+
+    @mock.patch('src.gscreenshot.screenshooter.get_x_connection')
     def test_add_fake_cursor_xlib_missing(self, mock_xlib):
-        mock_xlib = None
+        mock_xlib.return_value.available = False
         original_img = Image.open(
                 resource_filename('gscreenshot.resources.pixmaps', 'gscreenshot.png')
             )
@@ -143,9 +272,9 @@ class ScreenshooterTest(unittest.TestCase):
             100,
             "original and actual image should not differ")
 
-    @mock.patch('src.gscreenshot.screenshooter.display')
+    @mock.patch('src.gscreenshot.screenshooter.get_x_connection')
     def test_add_fake_cursor_xlib_bad_data(self, mock_xlib):
-        mock_xlib.Display().screen().root.query_pointer()._data = {'root_x': 20}
+        _point_at(mock_xlib, {'root_x': 20})
 
         original_img = Image.open(
                 resource_filename('gscreenshot.resources.pixmaps', 'gscreenshot.png')
@@ -169,38 +298,261 @@ class ScreenshooterTest(unittest.TestCase):
     def test_get_capabilities(self):
         self.assertIsInstance(self.screenshooter.get_capabilities_(), list)
 
-    @mock.patch('src.gscreenshot.screenshooter.subprocess.check_output')
+    @staticmethod
+    def _set_output(mock_popen, output=b'', returncode=0):
+        mock_popen.return_value.communicate.return_value = (output, None)
+        mock_popen.return_value.returncode = returncode
+
+    @mock.patch('src.gscreenshot.screenshooter.subprocess.Popen')
     @mock.patch('src.gscreenshot.screenshooter.PIL')
     @mock.patch('src.gscreenshot.screenshooter.os')
     def test_call_screenshooter_success(self, mock_os, mock_pil, mock_subprocess):
+        self._set_output(mock_subprocess)
         success = self.screenshooter._call_screenshooter('potato', ['pancake'])
         mock_subprocess.assert_called_once_with(
-            ['potato', 'pancake']
+            ['potato', 'pancake'], stdout=subprocess.PIPE
         )
         self.assertTrue(success)
 
-    @mock.patch('src.gscreenshot.screenshooter.subprocess.check_output')
+    @mock.patch('src.gscreenshot.screenshooter.subprocess.Popen')
     @mock.patch('src.gscreenshot.screenshooter.PIL')
     @mock.patch('src.gscreenshot.screenshooter.os')
     def test_call_screenshooter_subprocess_no_params(self, mock_os, mock_pil, mock_subprocess):
         mock_subprocess.side_effect = OSError()
         success = self.screenshooter._call_screenshooter('potato')
         mock_subprocess.assert_called_once_with(
-            ['potato']
+            ['potato'], stdout=subprocess.PIPE
         )
         self.assertFalse(success)
 
-    @mock.patch('src.gscreenshot.screenshooter.subprocess.check_output')
+    @mock.patch('src.gscreenshot.screenshooter.subprocess.Popen')
     @mock.patch('src.gscreenshot.screenshooter.PIL')
     @mock.patch('src.gscreenshot.screenshooter.os')
     def test_call_screenshooter_subprocess_error(self, mock_os, mock_pil, mock_subprocess):
         mock_subprocess.side_effect = OSError()
         success = self.screenshooter._call_screenshooter('potato', ['pancake'])
         mock_subprocess.assert_called_once_with(
-            ['potato', 'pancake']
+            ['potato', 'pancake'], stdout=subprocess.PIPE
         )
         self.assertFalse(success)
 
+    @mock.patch('src.gscreenshot.screenshooter.subprocess.Popen')
+    @mock.patch('src.gscreenshot.screenshooter.PIL')
+    @mock.patch('src.gscreenshot.screenshooter.os')
+    def test_call_screenshooter_exit_status(self, mock_os, mock_pil, mock_subprocess):
+        self._set_output(mock_subprocess, returncode=1)
+        success = self.screenshooter._call_screenshooter('potato', ['pancake'])
+        self.assertFalse(success)
+        mock_os.unlink.assert_called_once_with(self.screenshooter.tempfile)
+
+    @mock.patch('src.gscreenshot.screenshooter.subprocess.Popen')
+    def test_call_screenshooter_read_stdout(self, mock_subprocess):
+        with io.BytesIO() as png_data:
+            Image.new("RGB", (12, 8)).save(png_data, "PNG")
+            self._set_output(mock_subprocess, png_data.getvalue())
+
+        success = self.screenshooter._call_screenshooter('potato', ['-'], read_stdout=True)
+        mock_subprocess.assert_called_once_with(
+            ['potato', '-'], stdout=subprocess.PIPE
+        )
+        self.assertTrue(success)
+        self.assertEqual((12, 8), self.screenshooter.image.size)
+
+    @mock.patch('src.gscreenshot.screenshooter.subprocess.Popen')
+    def test_call_screenshooter_read_stdout_garbage(self, mock_subprocess):
+        self._set_output(mock_subprocess, b'not an image')
+        success = self.screenshooter._call_screenshooter('potato', ['-'], read_stdout=True)
+        self.assertFalse(success)
+        self.assertIsNone(self.screenshooter.image)
+
+    @mock.patch('src.gscreenshot.screenshooter.subprocess.Popen')
+    def test_call_screenshooter_read_stdout_ppm(self, mock_subprocess):
+        pixels = bytes(range(24))
+        self._set_output(mock_subprocess, b'P6\n# comment\n4 2\n255\n' + pixels)
+
+        success = self.screenshooter._call_screenshooter('potato', ['-'], read_stdout=True)
+        self.assertTrue(success)
+        self.assertEqual((4, 2), self.screenshooter.image.size)
+        self.assertEqual(pixels, self.screenshooter.image.tobytes())
+
+    @mock.patch('src.gscreenshot.screenshooter.subprocess.Popen')
+    def test_call_screenshooter_read_stdout_ppm_truncated(self, mock_subprocess):
+        self._set_output(mock_subprocess, b'P6\n4 2\n255\n' + bytes(10))
+        success = self.screenshooter._call_screenshooter('potato', ['-'], read_stdout=True)
+        self.assertFalse(success)
+
+    def test_cancel_kills_utility(self):
+        thread = threading.Thread(
+            target=self.screenshooter._call_screenshooter, args=('sleep', ['10'])
+        )
+        start = time.monotonic()
+        thread.start()
+        while not self.screenshooter._processes and time.monotonic() - start < 5:
+            time.sleep(0.01)
+
+        self.screenshooter.cancel()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(self.screenshooter.image)
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_cancel_kills_every_utility(self):
+        # Outputs are captured at the same time, each by its own process
+        threads = [
+            threading.Thread(target=self.screenshooter._run_process, args=(['sleep', '10'],))
+            for _ in range(3)
+        ]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        while len(self.screenshooter._processes) < 3 and time.monotonic() - start < 5:
+            time.sleep(0.01)
+
+        self.screenshooter.cancel()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(set(), self.screenshooter._processes)
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_cancel_ends_delay(self):
+        class DelayedScreenshooter(BaseScreenshooter):
+            def grab_fullscreen(self, delay=0, capture_cursor=False):
+                self._wait(delay)
+                self._call_screenshooter('true')
+
+        screenshooter = DelayedScreenshooter()
+        thread = threading.Thread(target=screenshooter.grab_fullscreen_, args=(10,))
+        start = time.monotonic()
+        thread.start()
+
+        screenshooter.cancel()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertIsNone(screenshooter.image)
+
+    def test_cancelled_until_cleared(self):
+        self.screenshooter.cancel()
+        self.screenshooter.grab_fullscreen_()
+        self.assertIsNone(self.screenshooter.image)
+
+        self.screenshooter.clear_cancel()
+        self.screenshooter.grab_fullscreen_()
+        self.assertIsNotNone(self.screenshooter.image)
+
+    def test_tempfile_per_capture(self):
+        first = self.screenshooter.tempfile
+        self.screenshooter.grab_fullscreen_()
+
+        self.assertNotEqual(first, self.screenshooter.tempfile)
+
+    def test_get_output_format_prefers_raw(self):
+        self.assertEqual('png', self.screenshooter.get_output_format())
+        self.screenshooter._output_formats = ('png', 'ppm')
+        self.assertEqual('ppm', self.screenshooter.get_output_format())
+
+    def test_grab_selection_crops_without_region_capture(self):
+        self.screenshooter.selector.region_select.return_value = (1, 2, 3, 4)
+        self.screenshooter.grab_selection_()
+        self.assertEqual("fullscreen", self.screenshooter.called)
+        self.assertIsNotNone(self.screenshooter.image)
+
+    def test_grab_selection_native_region_capture(self):
+        screenshooter = RegionScreenshooter()
+        screenshooter.selector = Mock()
+        screenshooter.selector.region_select.return_value = (10, 20, 310, 220)
+        screenshooter.grab_selection_()
+        self.assertEqual("region", screenshooter.called)
+        self.assertEqual((300, 200), screenshooter.image.size)
+
+    @mock.patch('src.gscreenshot.screenshooter.get_x_connection')
+    def test_grab_region_fake_cursor_falls_back_to_crop(self, mock_xlib):
+        _point_at(mock_xlib, {'root_x': 20, 'root_y': 40})
+        screenshooter = RegionScreenshooter()
+        screenshooter.grab_region_((10, 20, 310, 220), capture_cursor=True)
+        self.assertEqual("fullscreen", screenshooter.called)
+
+    def test_grab_region_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            self.screenshooter.grab_region((0, 0, 10, 10))
+
+    def test_capture_output_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            self.screenshooter.capture_output(Output('DP-1', 0, 0, 10, 30))
+
+    def test_grab_outputs_crops_full_screen(self):
+        outputs = [Output('DP-1', 0, 0, 10, 30), Output('DP-2', 10, 0, 10, 30)]
+        self.screenshooter.get_outputs = Mock(return_value=outputs)
+        full_image = Mock(size=(20, 30))
+        self.screenshooter.grab_fullscreen = Mock(
+            side_effect=lambda *args: self.screenshooter.set_image(full_image)
+        )
+
+        images = self.screenshooter.grab_outputs_()
+
+        self.assertEqual(['DP-1', 'DP-2'], list(images))
+        self.assertIs(full_image.crop.return_value, images['DP-1'])
+        full_image.crop.assert_any_call((0, 0, 10, 30))
+        full_image.crop.assert_any_call((10, 0, 20, 30))
+
+    def test_grab_outputs_keeps_last_capture(self):
+        self.screenshooter.get_outputs = Mock(return_value=[Output('DP-1', 0, 0, 10, 30)])
+        capture = self.screenshooter.grab_window_()
+
+        self.screenshooter.grab_outputs_()
+
+        self.assertEqual("fullscreen", self.screenshooter.called)
+        self.assertIs(capture, self.screenshooter.last_capture)
+        self.assertIs(capture.image, self.screenshooter.image)
+
+    def test_grab_outputs_without_outputs_keeps_last_capture(self):
+        self.screenshooter.get_outputs = Mock(return_value=[])
+        capture = self.screenshooter.grab_window_()
+
+        images = self.screenshooter.grab_outputs_()
+
+        self.assertIsNotNone(images['screen0'])
+        self.assertIsNot(capture.image, images['screen0'])
+        self.assertIs(capture, self.screenshooter.last_capture)
+
+    def test_grab_outputs_native(self):
+        screenshooter = OutputScreenshooter()
+        screenshooter.selector = None
+        screenshooter.get_outputs = Mock(return_value=[
+            Output('DP-1', 0, 0, 10, 30), Output('DP-2', 10, 0, 20, 40)
+        ])
+
+        images = screenshooter.grab_outputs_()
+
+        self.assertIsNone(screenshooter.called)
+        self.assertEqual((10, 30), images['DP-1'].size)
+        self.assertEqual((20, 40), images['DP-2'].size)
+
+    def test_grab_output_by_name(self):
+        screenshooter = OutputScreenshooter()
+        screenshooter.selector = None
+        screenshooter.get_outputs = Mock(return_value=[Output('DP-2', 10, 0, 20, 40)])
+
+        screenshooter.grab_output_('DP-2')
+        self.assertEqual((20, 40), screenshooter.image.size)
+
+        screenshooter.grab_output_('HDMI-1')
+        self.assertIsNone(screenshooter.image)
+
+    def test_grab_selection_capture_box(self):
+        self.screenshooter = RegionScreenshooter()
+        self.screenshooter.selector = Mock()
+        self.screenshooter.selector.region_select.return_value = (2, 4, 12, 14)
+
+        capture = self.screenshooter.grab_selection_()
+
+        self.assertEqual((2, 4, 12, 14), capture.box)
+        self.assertIs(capture, self.screenshooter.last_capture)
+
     def test_grab_selection_fallback(self):
         self.screenshooter.selector = None
         self.screenshooter.grab_selection_()
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import Mock
+import mock
+
+from Xlib import X
+from src.gscreenshot.screenshooter.xlib import XlibWrapper
+from src.gscreenshot.xconnection import XConnection
+
+
+class XlibWrapperTest(unittest.TestCase):
+
+    def setUp(self):
+        self.screenshooter = XlibWrapper()
+        self.screenshooter.selector = None
+
+    def _mock_display(self, mock_x_connection, data, depth=24, bits_per_pixel=32,
+                      byte_order=X.LSBFirst):
+        xdisplay = Mock()
+        xdisplay.pending_events.return_value = 0
+        mock_x_connection.return_value = XConnection(lambda: xdisplay)
+        root = xdisplay.screen.return_value.root
+        root.get_geometry.return_value = Mock(width=2, height=1)
+        root.get_image.return_value = Mock(depth=depth, data=data)
+        xdisplay.info.pixmap_formats = [Mock(depth=depth, bits_per_pixel=bits_per_pixel)]
+        xdisplay.info.image_byte_order = byte_order
+        return xdisplay
+
+    @mock.patch('src.gscreenshot.screenshooter.xlib.get_x_connection')
+    def test_grab_fullscreen_lsb_first(self, mock_display):
+        xdisplay = self._mock_display(mock_display, bytes([3, 2, 1, 0, 6, 5, 4, 0]))
+
+        self.screenshooter.grab_fullscreen()
+
+        self.assertEqual((2, 1), self.screenshooter.image.size)
+        self.assertEqual(bytes([1, 2, 3, 4, 5, 6]), self.screenshooter.image.tobytes())
+        # Kept open for the next capture
+        xdisplay.close.assert_not_called()
+
+    @mock.patch('src.gscreenshot.screenshooter.xlib.get_x_connection')
+    def test_grab_fullscreen_msb_first(self, mock_display):
+        self._mock_display(
+            mock_display, bytes([0, 1, 2, 3, 0, 4, 5, 6]), byte_order=X.MSBFirst
+        )
+
+        self.screenshooter.grab_fullscreen()
+
+        self.assertEqual(bytes([1, 2, 3, 4, 5, 6]), self.screenshooter.image.tobytes())
+
+    @mock.patch('src.gscreenshot.screenshooter.xlib.get_x_connection')
+    def test_grab_fullscreen_unsupported_depth(self, mock_display):
+        self._mock_display(mock_display, bytes(4), depth=16, bits_per_pixel=16)
+
+        self.screenshooter.grab_fullscreen()
+
+        self.assertIsNone(self.screenshooter.image)
+
+    @mock.patch('src.gscreenshot.screenshooter.xlib.get_x_connection')
+    def test_grab_region(self, mock_display):
+        xdisplay = self._mock_display(mock_display, bytes([3, 2, 1, 0, 6, 5, 4, 0]))
+        root = xdisplay.screen.return_value.root
+
+        self.screenshooter.grab_region((5, 7, 7, 8))
+
+        root.get_image.assert_called_once_with(5, 7, 2, 1, X.ZPixmap, 0xffffffff)
+        root.get_geometry.assert_not_called()
+        self.assertEqual((2, 1), self.screenshooter.image.size)
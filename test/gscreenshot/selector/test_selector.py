@@ -6,7 +6,8 @@ from pkg_resources import resource_filename
 from PIL import Image
 from PIL import ImageChops
 from gscreenshot.selector import SelectionCancelled, SelectionParseError
-from src.gscreenshot.selector import RegionSelector\
+import src.gscreenshot.selector
+from src.gscreenshot.selector import RegionSelector
 
 
 class BaseSelector(RegionSelector):
@@ -52,3 +53,44 @@ class SelectorTest(unittest.TestCase):
         self.selector.mock_output = ["X=1", "Y=2", "W=3" ,"H=4"]
         region = self.selector.region_select()
         self.assertEqual((1, 2, 4, 6), region)
+
+
+class CommandSelector(RegionSelector):
+
+    def __init__(self, command):
+        RegionSelector.__init__(self)
+        self.command = command
+
+    def _get_region_params(self):
+        return ['sh', '-c', self.command]
+
+
+class AsyncSelectorTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_region_select_async(self):
+        selector = CommandSelector('echo X=1,Y=2,W=3,H=4')
+
+        region = await selector.region_select_async()
+
+        self.assertEqual((1, 2, 4, 6), region)
+
+    async def test_region_select_async_cancelled(self):
+        selector = CommandSelector('echo "selection was cancelled" >&2; exit 1')
+
+        with self.assertRaises(src.gscreenshot.selector.SelectionCancelled):
+            await selector.region_select_async()
+
+    async def test_region_select_async_not_found(self):
+        selector = CommandSelector('')
+        selector._get_region_params = lambda: ['gscreenshot-nonexistent-selector']
+
+        with self.assertRaises(src.gscreenshot.selector.SelectionExecError):
+            await selector.region_select_async()
+
+    async def test_region_select_async_without_command(self):
+        selector = BaseSelector()
+        selector.mock_output = ["X=1,Y=2,W=3,H=4"]
+
+        region = await selector.region_select_async()
+
+        self.assertEqual((1, 2, 4, 6), region)
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import Mock
+
+import mock
+
+from gscreenshot.selector import SelectionCancelled
+from src.gscreenshot.aio import AsyncGscreenshot
+from src.gscreenshot.selector import RegionSelector
+
+
+class FakeSelector(RegionSelector):
+
+    def __init__(self, region=None, error=None):
+        RegionSelector.__init__(self)
+        self.region = region
+        self.error = error
+        self.called = 0
+
+    async def region_select_async(self):
+        self.called += 1
+        if self.error is not None:
+            raise self.error
+        return self.region
+
+
+class AsyncGscreenshotTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.fake_image = Mock()
+        self.gscreenshot = Mock()
+        self.gscreenshot.screenshooter.selector = None
+        self.async_gscreenshot = AsyncGscreenshot(self.gscreenshot)
+
+    def tearDown(self):
+        self.async_gscreenshot.close()
+
+    @mock.patch('src.gscreenshot.aio.asyncio.sleep')
+    async def test_screenshot_full_display(self, mock_sleep):
+        self.gscreenshot.screenshot_full_display.return_value = self.fake_image
+
+        actual = await self.async_gscreenshot.screenshot_full_display(3, True, output='DP-1')
+
+        mock_sleep.assert_called_once_with(3.0)
+        # The delay already passed
+        self.gscreenshot.screenshot_full_display.assert_called_once_with(0, True, 'theme', 'DP-1')
+        self.assertEqual(self.fake_image, actual)
+
+    async def test_screenshot_selected_selects_on_loop(self):
+        selector = FakeSelector((1, 2, 3, 4))
+        self.gscreenshot.screenshooter.selector = selector
+        selected = []
+
+        def screenshot_selected(delay, capture_cursor, cursor_name):
+            selected.append(self.gscreenshot.screenshooter.selector.region_select())
+            return self.fake_image
+
+        self.gscreenshot.screenshot_selected.side_effect = screenshot_selected
+
+        actual = await self.async_gscreenshot.screenshot_selected()
+
+        self.assertEqual([(1, 2, 3, 4)], selected)
+        self.assertEqual(1, selector.called)
+        self.assertIs(selector, self.gscreenshot.screenshooter.selector)
+        self.assertEqual(self.fake_image, actual)
+
+    async def test_screenshot_selected_passes_error(self):
+        self.gscreenshot.screenshooter.selector = FakeSelector(error=SelectionCancelled())
+
+        def screenshot_selected(delay, capture_cursor, cursor_name):
+            with self.assertRaises(SelectionCancelled):
+                self.gscreenshot.screenshooter.selector.region_select()
+
+        self.gscreenshot.screenshot_selected.side_effect = screenshot_selected
+
+        await self.async_gscreenshot.screenshot_selected()
+
+        self.gscreenshot.screenshot_selected.assert_called_once()
+
+    async def test_screenshot_selected_without_selector(self):
+        await self.async_gscreenshot.screenshot_selected(2)
+
+        self.gscreenshot.screenshot_selected.assert_called_once_with(2, False, 'theme')
+
+    async def test_captures_run_one_at_a_time(self):
+        running = []
+        overlapped = []
+
+        def screenshot_full_display(*args):
+            overlapped.append(bool(running))
+            running.append(True)
+            try:
+                return self.fake_image
+            finally:
+                running.pop()
+
+        self.gscreenshot.screenshot_full_display.side_effect = screenshot_full_display
+
+        await asyncio.gather(*[
+            self.async_gscreenshot.screenshot_full_display() for _ in range(5)
+        ])
+
+        self.assertEqual([False] * 5, overlapped)
+
+    async def test_cancel_stops_utility(self):
+        started = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+
+        def screenshot_full_display(*args):
+            loop.call_soon_threadsafe(started.set)
+            cancelled.wait()
+
+        self.gscreenshot.screenshooter.cancel.side_effect = cancelled.set
+        self.gscreenshot.screenshot_full_display.side_effect = screenshot_full_display
+
+        task = asyncio.ensure_future(self.async_gscreenshot.screenshot_full_display())
+        await started.wait()
+        task.cancel()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        self.gscreenshot.screenshooter.cancel.assert_called_once()
+
+    async def test_copy_to_clipboard(self):
+        self.gscreenshot._get_clipboard_data.return_value = b'png'
+        self.gscreenshot._get_clipboard_params.return_value = ['sh', '-c', 'test "$(cat)" = png']
+
+        self.assertTrue(await self.async_gscreenshot.copy_last_screenshot_to_clipboard())
+
+    async def test_copy_to_clipboard_no_image(self):
+        self.gscreenshot._get_clipboard_data.return_value = None
+
+        self.assertFalse(await self.async_gscreenshot.copy_last_screenshot_to_clipboard())
+
+    async def test_notification_failure(self):
+        self.gscreenshot._get_notification_params.return_value = ['gscreenshot-nonexistent']
+
+        self.assertFalse(await self.async_gscreenshot.show_screenshot_notification())
@@ -0,0 +1,70 @@
+import unittest
+
+from src.gscreenshot.backend_stats import BackendStats
+from src.gscreenshot.registry import BackendInfo
+
+
+FAST = BackendInfo('fast', object, priority=10)
+SLOW = BackendInfo('slow', object, priority=20)
+NEW = BackendInfo('new', object, priority=30)
+
+
+class BackendStatsTest(unittest.TestCase):
+
+    def test_rank_by_latency(self):
+        stats = BackendStats()
+        stats.record('slow', True, 0.2)
+        stats.record('fast', True, 0.05)
+
+        self.assertEqual([FAST, SLOW, NEW], stats.rank([NEW, SLOW, FAST]))
+
+    def test_unhealthy_ranked_last(self):
+        stats = BackendStats()
+        stats.record('fast', True, 0.05)
+        stats.record('fast', False)
+        stats.record('fast', False)
+        stats.record('slow', True, 0.2)
+
+        self.assertFalse(stats.is_healthy('fast'))
+        self.assertEqual([SLOW, NEW, FAST], stats.rank([FAST, SLOW, NEW]))
+
+    def test_single_failure_is_healthy(self):
+        stats = BackendStats()
+        stats.record('fast', False)
+
+        self.assertTrue(stats.is_healthy('fast'))
+
+    def test_recovers(self):
+        stats = BackendStats()
+        for _ in range(3):
+            stats.record('fast', False)
+        for _ in range(3):
+            stats.record('fast', True, 0.05)
+
+        self.assertTrue(stats.is_healthy('fast'))
+
+    def test_round_trip(self):
+        stats = BackendStats()
+        stats.record('fast', True, 0.05)
+
+        restored = BackendStats(stats.to_dict())
+
+        self.assertEqual(0.05, restored.get_latency('fast'))
+        self.assertFalse(restored.changed)
+        self.assertTrue(stats.changed)
+
+    def test_reset(self):
+        stats = BackendStats({'fast': {'captures': 1, 'failure_rate': 0.0, 'latency': 0.05}})
+        stats.reset('fast')
+
+        self.assertIsNone(stats.get_latency('fast'))
+        self.assertTrue(stats.changed)
+
+    def test_latency_percentile(self):
+        stats = BackendStats()
+        for latency in range(1, 11):
+            stats.record('fast', True, latency / 100)
+
+        self.assertEqual(0.1, stats.get_latency_percentile('fast', 95))
+        self.assertEqual(0.01, stats.get_latency_percentile('fast', 0))
+        self.assertIsNone(stats.get_latency_percentile('slow', 95))
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock
+
+from PIL import Image
+from src.gscreenshot.burst import Burst
+
+
+class BurstTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.app = Mock()
+        self.app.get_exif_data.return_value = b''
+        self.app.get_encoder_preset.return_value = 'balanced'
+        self.app.get_time_filename.return_value = "gscreenshot_2023-01-01-120000123.png"
+        self.app.get_save_format.return_value = 'png'
+        self.app.get_supported_formats.return_value = ['png']
+        self.app.screenshooter.image = Image.new("RGB", (8, 8))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_get_filename_sequence(self):
+        burst = Burst(self.app, 3, filename=os.path.join(self.tempdir, "shot.png"))
+        self.assertEqual(os.path.join(self.tempdir, "shot_0001.png"), burst.get_filename(0))
+        self.assertEqual(os.path.join(self.tempdir, "shot_0003.png"), burst.get_filename(2))
+
+    def test_get_filename_directory(self):
+        burst = Burst(self.app, 3, filename=self.tempdir)
+        self.assertEqual(
+            os.path.join(self.tempdir, "gscreenshot_2023-01-01-120000123_0002.png"),
+            burst.get_filename(1)
+        )
+        self.app.get_time_filename.assert_called_with(milliseconds=True)
+
+    def test_run(self):
+        burst = Burst(self.app, 3, filename=os.path.join(self.tempdir, "shot.png"))
+        stats = burst.run()
+
+        self.assertEqual(3, self.app.screenshooter.grab_fullscreen_.call_count)
+        self.assertEqual(3, stats.captured)
+        self.assertEqual(3, stats.written + stats.dropped)
+        self.assertEqual(0, stats.failed)
+        self.assertEqual(0, stats.errors)
+        for index in range(stats.written):
+            with Image.open(burst.get_filename(index)) as written:
+                self.assertEqual((8, 8), written.size)
+
+    def test_run_unsupported_format(self):
+        self.app.get_save_format.return_value = 'txt'
+        burst = Burst(self.app, 2, filename=os.path.join(self.tempdir, "shot.txt"))
+
+        with self.assertRaises(ValueError):
+            burst.run()
+
+        self.app.get_save_format.assert_called_once_with(burst.get_filename(0))
+        self.app.screenshooter.grab_fullscreen_.assert_not_called()
+        self.assertEqual([], os.listdir(self.tempdir))
+
+    def test_run_capture_failed(self):
+        self.app.screenshooter.image = None
+        stats = Burst(self.app, 2, filename=self.tempdir).run()
+
+        self.assertEqual(0, stats.captured)
+        self.assertEqual(2, stats.failed)
+        self.assertEqual([], os.listdir(self.tempdir))
+
+    def test_run_drops_frames_when_encoder_is_behind(self):
+        captures_done = threading.Event()
+        image = Mock()
+        image.save.side_effect = lambda encoded, *args, **kwargs: (
+            captures_done.wait(5), encoded.write(b'x')
+        )
+        self.app.screenshooter.image = image
+
+        def grab(*args, **kwargs):
+            if self.app.screenshooter.grab_fullscreen_.call_count == 5:
+                captures_done.set()
+
+        self.app.screenshooter.grab_fullscreen_.side_effect = grab
+
+        stats = Burst(self.app, 5, filename=self.tempdir, queue_size=1).run()
+
+        self.assertEqual(5, stats.captured)
+        # The encoder is stuck on the first frame, so at most one more fits in its queue
+        self.assertGreaterEqual(stats.dropped, 2)
+        self.assertEqual(5, stats.written + stats.dropped)
@@ -0,0 +1,151 @@
+import unittest
+from unittest.mock import Mock
+
+import mock
+from PIL import Image
+from Xlib.ext import xfixes
+
+from src.gscreenshot.cursors import XFIXES_CACHE_SIZE, CursorStore, XFixesCursor
+from src.gscreenshot.xconnection import XConnection
+
+
+class CursorStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = CursorStore()
+
+    def test_decoded_once(self):
+        sprite = self.store.get('adwaita')
+
+        self.assertIs(sprite, self.store.get('adwaita'))
+        self.assertEqual('RGBA', sprite.mode)
+
+    def test_unknown_cursor(self):
+        with self.assertRaises(KeyError):
+            self.store.get('potato')
+
+    def test_get_all(self):
+        self.store.xfixes = Mock()
+        self.store.xfixes.get.return_value = None
+
+        self.assertEqual(['adwaita', 'prohibit', 'allow'], list(self.store.get_all()))
+
+    def test_get_all_live(self):
+        sprite = Image.new('RGBA', (2, 2))
+        self.store.xfixes = Mock()
+        self.store.xfixes.get.return_value = (sprite, (0, 0), (5, 5))
+
+        self.assertIs(sprite, self.store.get_all()['xfixes'])
+
+    def test_scaled_kept_per_ratio(self):
+        sprite = self.store.get('prohibit')
+
+        scaled = self.store.get_scaled(sprite, .5)
+
+        self.assertEqual((42, 42), scaled.size)
+        self.assertIs(scaled, self.store.get_scaled(sprite, .5))
+        self.assertIsNot(scaled, self.store.get_scaled(sprite, .3))
+        self.assertEqual((84, 84), sprite.size)
+
+    def test_scaled_never_enlarged(self):
+        sprite = self.store.get('adwaita')
+
+        self.assertEqual(sprite.size, self.store.get_scaled(sprite, 2).size)
+
+    def test_other_images_not_kept(self):
+        image = Image.new('RGBA', (40, 40))
+
+        scaled = self.store.get_scaled(image, .5)
+
+        self.assertEqual((20, 20), scaled.size)
+        self.assertIsNot(scaled, self.store.get_scaled(image, .5))
+        self.assertEqual((40, 40), image.size)
+
+
+def _cursor_reply(serial):
+    reply = Mock()
+    reply.cursor_serial = serial
+    reply.width = 2
+    reply.height = 1
+    reply.xhot = 1
+    reply.yhot = 0
+    reply.x = 30
+    reply.y = 40
+    # Opaque red, then half transparent white (premultiplied)
+    reply.cursor_image = [0xffff0000, 0x80808080]
+    return reply
+
+
+@mock.patch('src.gscreenshot.xconnection.session_is_wayland', Mock(return_value=False))
+class XFixesCursorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = Mock()
+        self.connection.pending_events.return_value = 0
+        self.connection.xfixes_get_cursor_image.side_effect = lambda root: _cursor_reply(7)
+        pointer = self.connection.screen().root.query_pointer()
+        pointer.root_x = 31
+        pointer.root_y = 41
+
+        self.connect = Mock(return_value=self.connection)
+        self.cursor = XFixesCursor(XConnection(self.connect))
+
+    def test_get(self):
+        sprite, hotspot, position = self.cursor.get()
+
+        self.assertEqual((255, 0, 0, 255), sprite.getpixel((0, 0)))
+        self.assertEqual((255, 255, 255, 128), sprite.getpixel((1, 0)))
+        self.assertEqual((1, 0), hotspot)
+        self.assertEqual((30, 40), position)
+        self.assertTrue(self.cursor.is_live(sprite))
+
+    def test_unchanged_cursor_not_fetched(self):
+        first = self.cursor.get()[0]
+        sprite, _hotspot, position = self.cursor.get()
+
+        self.assertIs(first, sprite)
+        self.assertEqual((31, 41), position)
+        self.connection.xfixes_get_cursor_image.assert_called_once()
+
+    def test_changed_cursor_fetched(self):
+        first = self.cursor.get()[0]
+
+        event = Mock(spec=xfixes.DisplayCursorNotify)
+        event.cursor_serial = 8
+        self.connection.pending_events.side_effect = [1, 0]
+        self.connection.next_event.return_value = event
+        self.connection.xfixes_get_cursor_image.side_effect = lambda root: _cursor_reply(8)
+
+        self.assertIsNot(first, self.cursor.get()[0])
+        self.assertEqual(2, self.connection.xfixes_get_cursor_image.call_count)
+
+    def _change_cursor(self, serial):
+        event = Mock(spec=xfixes.DisplayCursorNotify)
+        event.cursor_serial = serial
+        self.connection.pending_events.side_effect = [1, 0]
+        self.connection.next_event.return_value = event
+        self.connection.xfixes_get_cursor_image.side_effect = lambda root: _cursor_reply(serial)
+
+    def test_evicted_cursor_fetched_again(self):
+        first = self.cursor.get()[0]
+        for serial in range(8, 8 + XFIXES_CACHE_SIZE):
+            self._change_cursor(serial)
+            self.cursor.get()
+
+        # Dropped from the cache, but still stamped as the cursor
+        # that's showing rather than as a plain image
+        self.assertTrue(self.cursor.is_live(first))
+        self.assertFalse(self.cursor.is_live(Image.new('RGBA', (2, 1))))
+
+        self._change_cursor(7)
+        sprite = self.cursor.get()[0]
+
+        self.assertEqual(7, sprite.info['xfixes_serial'])
+        self.assertEqual(2 + XFIXES_CACHE_SIZE, self.connection.xfixes_get_cursor_image.call_count)
+
+    def test_no_xfixes(self):
+        self.connection.has_extension.return_value = False
+
+        self.assertIsNone(self.cursor.get())
+        self.assertIsNone(self.cursor.get())
+        self.connect.assert_called_once()
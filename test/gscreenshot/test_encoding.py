@@ -0,0 +1,86 @@
+import io
+import unittest
+from unittest.mock import Mock
+
+from PIL import Image
+
+from src.gscreenshot.encoding import EncodedCache
+from src.gscreenshot.screenshooter.capture import Capture
+
+
+class EncodedCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.image = Image.new('RGB', (4, 3), 'red')
+        self.exif = b'Exif\x00\x00MM\x00*\x00\x00\x00\x08\x00\x00'
+
+    def test_encodes_once(self):
+        image = Mock()
+        image.save.side_effect = lambda data, *args, **kwargs: data.write(b'png')
+        cache = EncodedCache(Capture(image), self.exif)
+
+        self.assertEqual(b'png', cache.get('png'))
+        self.assertEqual(b'png', cache.get('PNG'))
+        image.save.assert_called_once()
+
+    def test_keyed_by_options(self):
+        cache = EncodedCache(Capture(self.image), self.exif)
+
+        self.assertNotEqual(cache.get('jpeg', quality=10), cache.get('jpeg', quality=95))
+        self.assertIs(cache.get('jpeg', quality=10), cache.get('jpeg', quality=10))
+
+    def test_passthrough(self):
+        with io.BytesIO() as png_data:
+            self.image.save(png_data, 'PNG')
+            encoded = png_data.getvalue()
+
+        image = Mock()
+        cache = EncodedCache(Capture(image, encoded=('png', encoded)), self.exif)
+
+        with Image.open(io.BytesIO(cache.get('png'))) as saved:
+            self.assertEqual((4, 3), saved.size)
+            self.assertIn(b'MM', saved.info['exif'])
+        image.save.assert_not_called()
+
+    def test_preset(self):
+        image = Mock()
+        image.save.side_effect = lambda data, *args, **kwargs: data.write(b'png')
+        cache = EncodedCache(Capture(image), self.exif)
+
+        cache.get_preset('png', 'smallest')
+
+        image.save.assert_called_once_with(
+            unittest.mock.ANY, 'PNG', exif=self.exif, compress_level=9, optimize=True
+        )
+
+    def test_preset_passthrough(self):
+        image = Mock()
+        cache = EncodedCache(Capture(image, encoded=('png', b'written')), self.exif)
+
+        cache.get_preset('png', 'fast')
+        image.save.assert_not_called()
+
+        cache.get_preset('png', 'smallest')
+        image.save.assert_called_once()
+
+    def test_any_reuses_encoding(self):
+        image = Mock()
+        image.save.side_effect = lambda data, *args, **kwargs: data.write(b'png')
+        cache = EncodedCache(Capture(image), self.exif)
+
+        saved = cache.get_preset('png', 'fast')
+
+        self.assertIs(saved, cache.get_any('png', 'balanced'))
+        image.save.assert_called_once()
+
+    def test_any_encodes_with_preset(self):
+        image = Mock()
+        image.save.side_effect = lambda data, *args, **kwargs: data.write(b'png')
+        cache = EncodedCache(Capture(image), self.exif)
+
+        cache.get_any('png', 'fast')
+        cache.get_preset('png', 'fast')
+
+        image.save.assert_called_once_with(
+            unittest.mock.ANY, 'PNG', exif=self.exif, compress_level=1
+        )
@@ -1,8 +1,14 @@
+import io
 import mock
+import os
 import subprocess
+import tempfile
+import threading
 import unittest
 from unittest.mock import Mock
+from PIL import Image
 from src.gscreenshot import Gscreenshot
+from src.gscreenshot.screenshooter.capture import Capture
 
 
 class GscreenshotTest(unittest.TestCase):
@@ -12,7 +18,11 @@ class GscreenshotTest(unittest.TestCase):
         self.fake_image = Mock()
 
         self.fake_screenshooter.image = self.fake_image
+        self.fake_screenshooter.encoded_image = None
+        self.fake_screenshooter.last_capture = Capture(self.fake_image)
         self.gscreenshot = Gscreenshot(self.fake_screenshooter)
+        # Not whichever preset the cache file has
+        self.gscreenshot.cache.pop('encoder_preset', None)
 
     def test_screenshot_full_display_defaults(self):
 
@@ -26,6 +36,31 @@ class GscreenshotTest(unittest.TestCase):
 
         self.assertEqual(self.fake_image, actual)
 
+    @mock.patch('gscreenshot.cursors.get_cursor_store')
+    def test_screenshot_full_display_named_cursor(self, mock_store):
+        self.gscreenshot.screenshot_full_display(capture_cursor=True, cursor_name='adwaita')
+
+        mock_store.return_value.get.assert_called_once_with('adwaita')
+        mock_store.return_value.get_all.assert_not_called()
+        self.fake_screenshooter.grab_fullscreen_.assert_called_once_with(
+            0,
+            True,
+            use_cursor=mock_store.return_value.get.return_value
+        )
+
+    @mock.patch('gscreenshot.cursors.get_cursor_store')
+    def test_screenshot_live_cursor_unreadable(self, mock_store):
+        mock_store.return_value.get.side_effect = KeyError('xfixes')
+
+        actual = self.gscreenshot.screenshot_window(capture_cursor=True, cursor_name='xfixes')
+
+        self.fake_screenshooter.grab_window_.assert_called_once_with(
+            0,
+            True,
+            use_cursor=None
+        )
+        self.assertEqual(self.fake_image, actual)
+
     def test_screenshot_full_display_delay(self):
         actual = self.gscreenshot.screenshot_full_display(5)
 
@@ -48,6 +83,31 @@ class GscreenshotTest(unittest.TestCase):
 
         self.assertEqual(self.fake_image, actual)
 
+    def test_screenshot_full_display_output(self):
+        actual = self.gscreenshot.screenshot_full_display(output='DP-1')
+
+        self.fake_screenshooter.grab_output_.assert_called_once_with(
+            'DP-1',
+            0,
+            False,
+            use_cursor=None
+        )
+        self.fake_screenshooter.grab_fullscreen_.assert_not_called()
+
+        self.assertEqual(self.fake_image, actual)
+
+    def test_screenshot_each_output(self):
+        self.fake_screenshooter.grab_outputs_.return_value = {'DP-1': self.fake_image}
+
+        actual = self.gscreenshot.screenshot_each_output()
+
+        self.fake_screenshooter.grab_outputs_.assert_called_once_with(
+            0,
+            False,
+            use_cursor=None
+        )
+        self.assertEqual({'DP-1': self.fake_image}, actual)
+
     def test_screenshot_selected_defaults(self):
 
         actual = self.gscreenshot.screenshot_selected()
@@ -116,14 +176,117 @@ class GscreenshotTest(unittest.TestCase):
 
         self.assertEqual(self.fake_image, actual)
 
-    def test_get_thumbnail(self):
+    def _set_up_failover(self, alternative):
+        self.fake_screenshooter.image = None
+        self.fake_screenshooter.last_region = None
+        backend = Mock()
+        backend.name = 'broken'
+        alternative_backend = Mock()
+        alternative_backend.name = 'working'
+        factory = Mock()
+        factory.create_alternatives.return_value = iter([(alternative_backend, alternative)])
+        self.gscreenshot.backend = backend
+        self.gscreenshot._screenshooter_factory = factory
+
+    @mock.patch.object(Gscreenshot, 'save_cache')
+    def test_screenshot_full_display_fails_over(self, mock_save_cache):
+        alternative = Mock()
+        self._set_up_failover(alternative)
+
+        actual = self.gscreenshot.screenshot_full_display(5)
+
+        alternative.grab_fullscreen_.assert_called_once_with(0, False, use_cursor=None)
+        self.assertEqual(alternative.image, actual)
+        self.assertEqual(alternative, self.gscreenshot.screenshooter)
+        self.assertEqual(1.0, self.gscreenshot.backend_stats.get_failure_rate('broken'))
+        self.assertIsNotNone(self.gscreenshot.backend_stats.get_latency('working'))
+
+    @mock.patch.object(Gscreenshot, 'save_cache')
+    def test_hedged_outcomes_recorded_per_backend(self, mock_save_cache):
+        alternative = Mock()
+        self._set_up_failover(alternative)
+        self.fake_screenshooter.grab_fullscreen_.return_value = Capture(None)
+        alternative.grab_fullscreen_.return_value = Capture(Image.new('RGB', (4, 3)))
+        self.fake_screenshooter.__utilityname__ = 'broken'
+        alternative.__utilityname__ = 'working'
+        self.assertTrue(self.gscreenshot.set_hedging(90))
+
+        self.assertIsNotNone(self.gscreenshot.screenshot_full_display())
+        self.assertIsNotNone(self.gscreenshot.screenshot_full_display())
+
+        stats = self.gscreenshot.backend_stats
+        self.assertEqual(1.0, stats.get_failure_rate('broken'))
+        self.assertFalse(stats.is_healthy('broken'))
+        self.assertEqual(0.0, stats.get_failure_rate('working'))
+        self.assertIsNotNone(stats.get_latency('working'))
+
+    @mock.patch.object(Gscreenshot, 'save_cache')
+    def test_screenshot_selected_fails_over_to_region(self, mock_save_cache):
+        alternative = Mock()
+        self._set_up_failover(alternative)
+        self.fake_screenshooter.grab_selection_.side_effect = lambda *args, **kwargs: \
+            setattr(self.fake_screenshooter, 'last_region', (0, 0, 10, 10))
+
+        actual = self.gscreenshot.screenshot_selected()
+
+        alternative.grab_region_.assert_called_once_with((0, 0, 10, 10), 0, False, None)
+        alternative.grab_selection_.assert_not_called()
+        self.assertEqual(alternative.image, actual)
+
+    @mock.patch.object(Gscreenshot, 'save_cache')
+    def test_full_display_after_selection_fails_over_uncropped(self, mock_save_cache):
+        self.fake_screenshooter.grab_selection_.side_effect = lambda *args, **kwargs: \
+            setattr(self.fake_screenshooter, 'last_region', (10, 10, 20, 20))
+        self.gscreenshot.screenshot_selected()
+
+        alternative = Mock()
+        self._set_up_failover(alternative)
+        self.fake_screenshooter.last_region = (10, 10, 20, 20)
+        self.gscreenshot.screenshot_full_display()
+
+        alternative.grab_fullscreen_.assert_called_once_with(0, False, use_cursor=None)
+        alternative.grab_region_.assert_not_called()
+
+    @mock.patch.object(Gscreenshot, 'save_cache')
+    def test_failover_keeps_screenshooter_if_all_fail(self, mock_save_cache):
+        alternative = Mock()
+        alternative.image = None
+        self._set_up_failover(alternative)
+
+        self.assertIsNone(self.gscreenshot.screenshot_full_display())
+        self.assertEqual(self.fake_screenshooter, self.gscreenshot.screenshooter)
+        self.assertEqual('broken', self.gscreenshot.backend.name)
+
+    @mock.patch.object(Gscreenshot, 'save_cache')
+    def test_cancelled_screenshot_not_failed_over(self, mock_save_cache):
+        alternative = Mock()
+        self._set_up_failover(alternative)
+        self.fake_screenshooter.grab_fullscreen_.side_effect = \
+            lambda *args, **kwargs: self.gscreenshot.cancel_screenshot()
 
-        fake_thumbnail = Mock()
-        fake_thumbnail.thumbnail.return_falue = fake_thumbnail
-        self.fake_image.copy.return_value = fake_thumbnail
+        self.gscreenshot.screenshot_full_display()
+
+        self.fake_screenshooter.cancel.assert_called_once()
+        alternative.grab_fullscreen_.assert_not_called()
+        self.assertEqual(0.0, self.gscreenshot.backend_stats.get_failure_rate('broken'))
+
+    def test_get_thumbnail(self):
+        image = Image.new('RGB', (400, 200))
+        self.fake_screenshooter.last_capture = Capture(image)
 
         actual = self.gscreenshot.get_thumbnail(50, 50)
-        self.assertEqual(fake_thumbnail, actual)
+
+        self.assertEqual((50, 25), actual.size)
+        self.assertEqual((400, 200), image.size)
+
+    def test_get_thumbnail_reuses_preview_copies(self):
+        self.fake_screenshooter.last_capture = Capture(Image.new('RGB', (400, 200)))
+
+        with mock.patch('gscreenshot.preview.PreviewPyramid') as pyramid:
+            self.gscreenshot.get_thumbnail(50, 50)
+            self.gscreenshot.get_thumbnail(60, 60, fast=True)
+
+        self.assertEqual(1, pyramid.call_count)
 
     def test_get_program_authors(self):
         self.assertIsInstance(self.gscreenshot.get_program_authors(), list)
@@ -162,10 +325,41 @@ class GscreenshotTest(unittest.TestCase):
         self.assertEqual("fake", self.gscreenshot.get_screenshooter_name())
 
     def test_save_last_image_success(self):
+        self.fake_image.save.side_effect = lambda data, *args, **kwargs: data.write(b'png')
 
-        success = self.gscreenshot.save_last_image("potato.png")
-        self.fake_image.save.assert_called_with("potato.png", "PNG", exif=unittest.mock.ANY)
-        self.assertTrue(success)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'potato.png')
+            success = self.gscreenshot.save_last_image(filename)
+
+            self.fake_image.save.assert_called_with(
+                unittest.mock.ANY, "PNG", exif=unittest.mock.ANY
+            )
+            self.assertTrue(success)
+            with open(filename, 'rb') as saved:
+                self.assertEqual(b'png', saved.read())
+
+    def test_save_last_image_encodes_once(self):
+        self.fake_image.save.side_effect = lambda data, *args, **kwargs: data.write(b'png')
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.gscreenshot.save_last_image(os.path.join(directory, 'potato.png'))
+            self.gscreenshot.save_last_image(os.path.join(directory, 'potato2.png'))
+            png_data = self.gscreenshot._get_clipboard_data()
+
+        self.fake_image.save.assert_called_once()
+        self.assertEqual(b'png', png_data)
+
+    @mock.patch.object(Gscreenshot, 'save_cache')
+    def test_clipboard_reuses_preset_encoding(self, mock_save_cache):
+        self.fake_image.save.side_effect = lambda data, *args, **kwargs: data.write(b'png')
+        self.gscreenshot.set_encoder_preset('fast')
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.gscreenshot.save_last_image(os.path.join(directory, 'potato.png'))
+            png_data = self.gscreenshot._get_clipboard_data()
+
+        self.fake_image.save.assert_called_once()
+        self.assertEqual(b'png', png_data)
 
     def test_save_last_image_bad_extension(self):
 
@@ -173,6 +367,105 @@ class GscreenshotTest(unittest.TestCase):
         self.fake_image.save.assert_not_called()
         self.assertFalse(success)
 
+    def test_save_image(self):
+        other_image = Mock()
+        other_image.save.side_effect = lambda data, *args, **kwargs: data.write(b'png')
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "potato-DP-1.png")
+            success = self.gscreenshot.save_image(other_image, filename)
+
+            other_image.save.assert_called_with(unittest.mock.ANY, "PNG", exif=unittest.mock.ANY)
+            self.fake_image.save.assert_not_called()
+            self.assertTrue(success)
+            self.assertFalse(self.gscreenshot.saved_last_image)
+            self.assertEqual(["potato-DP-1.png"], os.listdir(directory))
+
+    def test_save_last_image_in_background(self):
+        self.fake_image.save.side_effect = lambda data, *args, **kwargs: data.write(b'png')
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'potato.png')
+            future = self.gscreenshot.save_last_image_in_background(filename)
+            # The capture at the time it was asked for is saved
+            self.fake_screenshooter.last_capture = None
+
+            self.assertTrue(future.result(5))
+            with open(filename, 'rb') as saved:
+                self.assertEqual(b'png', saved.read())
+
+    @mock.patch.object(Gscreenshot, 'save_cache')
+    def test_save_last_image_with_preset(self, mock_save_cache):
+        self.fake_image.save.side_effect = lambda data, *args, **kwargs: data.write(b'png')
+        self.gscreenshot.set_encoder_preset('fast')
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.gscreenshot.save_last_image(os.path.join(directory, 'potato.png'))
+
+        self.fake_image.save.assert_called_with(
+            unittest.mock.ANY, "PNG", exif=unittest.mock.ANY, compress_level=1
+        )
+
+    @mock.patch.object(Gscreenshot, 'save_cache')
+    def test_set_encoder_preset(self, mock_save_cache):
+        self.assertEqual('balanced', self.gscreenshot.get_encoder_preset())
+
+        self.gscreenshot.set_encoder_preset('smallest')
+
+        self.assertEqual('smallest', self.gscreenshot.get_encoder_preset())
+        self.assertEqual('smallest', self.gscreenshot.cache['encoder_preset'])
+        mock_save_cache.assert_called_once()
+        with self.assertRaises(KeyError):
+            self.gscreenshot.set_encoder_preset('potato')
+
+    @mock.patch('gscreenshot.saving.write_atomic')
+    def test_cache_not_changed_while_written(self, mock_write_atomic):
+        updater = threading.Thread(
+            target=self.gscreenshot.update_cache, kwargs={'last_save_dir': '/elsewhere'}
+        )
+
+        def write(filename, data):
+            # A save on another thread waits until this write is done
+            updater.start()
+            updater.join(0.2)
+            self.assertTrue(updater.is_alive())
+            self.assertNotIn(b'/elsewhere', data)
+
+        mock_write_atomic.side_effect = write
+        self.gscreenshot.save_cache()
+        mock_write_atomic.side_effect = None
+        updater.join(5)
+
+        self.assertEqual('/elsewhere', self.gscreenshot.cache['last_save_dir'])
+        self.assertIn(b'/elsewhere', mock_write_atomic.call_args[0][1])
+
+    def test_save_last_image_passthrough(self):
+        image = Image.new('RGB', (4, 3), 'red')
+        with io.BytesIO() as png_data:
+            image.save(png_data, 'PNG')
+            self.fake_screenshooter.last_capture = Capture(
+                self.fake_image, encoded=('png', png_data.getvalue())
+            )
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'potato.png')
+            success = self.gscreenshot.save_last_image(filename)
+
+            self.fake_image.save.assert_not_called()
+            self.assertTrue(success)
+            with Image.open(filename) as saved:
+                self.assertEqual((4, 3), saved.size)
+                self.assertIn(b'gscreenshot', saved.info['exif'])
+
+    def test_save_last_image_passthrough_other_format(self):
+        self.fake_screenshooter.last_capture = Capture(self.fake_image, encoded=('png', b'not used'))
+
+        with tempfile.TemporaryDirectory() as directory:
+            success = self.gscreenshot.save_last_image(os.path.join(directory, 'potato.jpg'))
+
+        self.fake_image.save.assert_called_with(unittest.mock.ANY, "JPEG", exif=unittest.mock.ANY)
+        self.assertTrue(success)
+
     def test_save_last_image_ioerror(self):
 
         self.fake_image.save.side_effect = IOError("mocked IOError")
@@ -0,0 +1,42 @@
+import unittest
+
+from PIL import Image
+
+from src.gscreenshot.preview import PreviewPyramid, fit
+
+
+class PreviewPyramidTest(unittest.TestCase):
+
+    def setUp(self):
+        self.image = Image.new('RGB', (1600, 900), 'blue')
+        self.pyramid = PreviewPyramid(self.image)
+
+    def test_fit(self):
+        self.assertEqual((160, 90), fit((1600, 900), 160, 500))
+        self.assertEqual((1600, 900), fit((1600, 900), 4000, 4000))
+
+    def test_level_for_smallest_large_enough(self):
+        level = self.pyramid.level_for((300, 100))
+
+        self.assertEqual((400, 225), level.size)
+
+    def test_levels_made_once(self):
+        first = self.pyramid.level_for((100, 50))
+
+        self.assertIs(first, self.pyramid.level_for((100, 50)))
+
+    def test_full_size_level(self):
+        self.assertIs(self.image, self.pyramid.level_for((1000, 900)))
+
+    def test_get_thumbnail(self):
+        thumbnail = self.pyramid.get_thumbnail(320, 320)
+
+        self.assertEqual((320, 180), thumbnail.size)
+        self.assertEqual((0, 0, 255), thumbnail.getpixel((10, 10)))
+
+    def test_get_thumbnail_fast(self):
+        self.assertEqual((320, 180), self.pyramid.get_thumbnail(320, 320, fast=True).size)
+
+    def test_get_thumbnail_that_fits_not_copied(self):
+        self.assertIs(self.image, self.pyramid.get_thumbnail(4000, 4000))
+        self.assertIs(self.pyramid.level_for((400, 225)), self.pyramid.get_thumbnail(400, 400))
@@ -0,0 +1,128 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+import mock
+
+from src.gscreenshot.probe_cache import ProbeCache
+from src.gscreenshot.registry import BackendInfo
+
+
+class FakeBackend(object):
+    probes = 0
+    features = {}
+
+    @classmethod
+    def can_run(cls):
+        cls.probes += 1
+        cls.features = {'fast': True}
+        return True
+
+    @classmethod
+    def get_probe_features(cls):
+        return cls.features
+
+    @classmethod
+    def set_probe_features(cls, features):
+        cls.features = features
+
+
+class ServiceBackend(FakeBackend):
+
+    @classmethod
+    def can_run(cls):
+        cls.probes += 1
+        return False
+
+
+class HungBackend(FakeBackend):
+
+    @classmethod
+    def can_run(cls):
+        cls.probes += 1
+        raise subprocess.TimeoutExpired('fakeshot', 1)
+
+
+FAKE = BackendInfo('fake', FakeBackend, executables=('fakeshot',))
+SERVICE = BackendInfo('service', ServiceBackend, cache_probe_failure=False)
+HUNG = BackendInfo('hung', HungBackend, executables=('fakeshot',))
+
+
+class ProbeCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.bindir = tempfile.mkdtemp()
+        self.executable = os.path.join(self.bindir, 'fakeshot')
+        with open(self.executable, 'w', encoding='UTF-8') as executable:
+            executable.write('#!/bin/sh\n')
+
+        self.environ = mock.patch.dict(os.environ, {'PATH': self.bindir})
+        self.environ.start()
+
+        FakeBackend.probes = 0
+        FakeBackend.features = {}
+        ServiceBackend.probes = 0
+        HungBackend.probes = 0
+
+    def tearDown(self):
+        self.environ.stop()
+        shutil.rmtree(self.bindir)
+
+    def _probe_twice(self, backend):
+        first = ProbeCache()
+        first.can_run(backend)
+
+        second = ProbeCache(first.to_dict())
+        return second, second.can_run(backend)
+
+    def test_cache_hit(self):
+        cache, result = self._probe_twice(FAKE)
+
+        self.assertTrue(result)
+        self.assertTrue(cache.hit)
+        self.assertFalse(cache.changed)
+        self.assertEqual(1, FakeBackend.probes)
+
+    def test_cache_hit_restores_features(self):
+        first = ProbeCache()
+        first.can_run(FAKE)
+        FakeBackend.features = {}
+
+        ProbeCache(first.to_dict()).can_run(FAKE)
+
+        self.assertEqual({'fast': True}, FakeBackend.features)
+
+    def test_executable_changed(self):
+        first = ProbeCache()
+        first.can_run(FAKE)
+        os.utime(self.executable, ns=(0, 0))
+
+        second = ProbeCache(first.to_dict())
+        second.can_run(FAKE)
+
+        self.assertFalse(second.hit)
+        self.assertTrue(second.changed)
+        self.assertEqual(2, FakeBackend.probes)
+
+    def test_session_changed(self):
+        first = ProbeCache()
+        first.can_run(FAKE)
+
+        with mock.patch.dict(os.environ, {'XDG_SESSION_TYPE': 'wayland'}):
+            ProbeCache(first.to_dict()).can_run(FAKE)
+
+        self.assertEqual(2, FakeBackend.probes)
+
+    def test_failure_not_cached(self):
+        cache, result = self._probe_twice(SERVICE)
+
+        self.assertFalse(result)
+        self.assertFalse(cache.hit)
+        self.assertEqual(2, ServiceBackend.probes)
+
+    def test_timeout_not_cached(self):
+        cache, result = self._probe_twice(HUNG)
+
+        self.assertFalse(result)
+        self.assertEqual(2, HungBackend.probes)
@@ -0,0 +1,87 @@
+import unittest
+import mock
+
+from src.gscreenshot import registry as registry_module
+from src.gscreenshot.registry import BackendInfo, Registry
+
+
+class FakeScreenshooter(object):
+    pass
+
+
+FAKE = BackendInfo('scrot', FakeScreenshooter, ('x11', 'wayland'), 100)
+NO_ENTRY_POINTS = {
+    registry_module.SCREENSHOOTER_GROUP: {},
+    registry_module.SELECTOR_GROUP: {},
+}
+
+
+class RegistryTest(unittest.TestCase):
+
+    def _registry(self, entry_points):
+        return Registry({
+            'fingerprint': registry_module._get_path_fingerprint(),
+            'entry_points': entry_points,
+        })
+
+    def test_priority_order(self):
+        registry = self._registry(NO_ENTRY_POINTS)
+
+        names = [b.name for b in registry.get_screenshooters('x11')]
+
+        self.assertEqual(
+            ['python-xlib', 'scrot', 'imagemagick', 'python-pillow',
+             'imlib_2', 'xdg-desktop-portal'],
+            names
+        )
+
+    def test_session_type(self):
+        registry = self._registry(NO_ENTRY_POINTS)
+
+        self.assertEqual(
+            ['grim', 'xdg-desktop-portal'],
+            [b.name for b in registry.get_screenshooters('wayland')]
+        )
+        self.assertEqual(['slurp'], [b.name for b in registry.get_selectors('wayland')])
+
+    def test_entry_point_replaces_builtin(self):
+        registry = self._registry({
+            registry_module.SCREENSHOOTER_GROUP: {'scrot': f'{__name__}:FAKE'},
+            registry_module.SELECTOR_GROUP: {},
+        })
+
+        screenshooters = registry.get_screenshooters('wayland')
+
+        self.assertIs(FAKE, screenshooters[0])
+        self.assertIs(FakeScreenshooter, screenshooters[0].load())
+        self.assertEqual(1, len([b for b in screenshooters if b.name == 'scrot']))
+
+    def test_broken_entry_point_skipped(self):
+        registry = self._registry({
+            registry_module.SCREENSHOOTER_GROUP: {'broken': 'nonexistent.module:BROKEN'},
+            registry_module.SELECTOR_GROUP: {},
+        })
+
+        self.assertEqual('python-xlib', registry.get_screenshooters('x11')[0].name)
+
+    def test_cached_entry_points(self):
+        registry = self._registry(NO_ENTRY_POINTS)
+
+        with mock.patch('importlib.metadata.entry_points') as entry_points:
+            registry.get_screenshooters('x11')
+
+        entry_points.assert_not_called()
+        self.assertFalse(registry.changed)
+
+    def test_stale_cache_rescans(self):
+        registry = Registry({'fingerprint': 'stale', 'entry_points': NO_ENTRY_POINTS})
+
+        registry.get_screenshooters('x11')
+
+        self.assertTrue(registry.changed)
+        self.assertNotEqual('stale', registry.to_dict()['fingerprint'])
+
+    def test_load_is_lazy(self):
+        info = BackendInfo('fake', f'{__name__}:FakeScreenshooter')
+
+        self.assertIs(FakeScreenshooter, info.load())
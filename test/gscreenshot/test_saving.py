@@ -0,0 +1,127 @@
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock
+
+import mock
+
+from src.gscreenshot.saving import BackgroundSaver, get_encoder_options, get_save_path
+from src.gscreenshot.saving import write_atomic
+
+
+class SavingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_get_encoder_options(self):
+        self.assertEqual({'compress_level': 1}, get_encoder_options('fast', 'PNG'))
+        self.assertEqual({}, get_encoder_options('balanced', 'png'))
+        self.assertEqual({}, get_encoder_options('smallest', 'bmp'))
+        with self.assertRaises(KeyError):
+            get_encoder_options('potato', 'png')
+
+    def test_get_save_path(self):
+        self.assertEqual('potato.png', get_save_path('potato.png', 'shot.png'))
+
+        directory = os.path.join(self.tempdir, 'shots')
+        self.assertEqual(os.path.join(directory, 'shot.png'), get_save_path(directory, 'shot.png'))
+        self.assertTrue(os.path.isdir(directory))
+
+    def test_write_atomic(self):
+        filename = os.path.join(self.tempdir, 'potato.png')
+        write_atomic(filename, b'old')
+        write_atomic(filename, b'new')
+
+        with open(filename, 'rb') as written:
+            self.assertEqual(b'new', written.read())
+        self.assertEqual(['potato.png'], os.listdir(self.tempdir))
+
+    def test_write_atomic_keeps_mode(self):
+        filename = os.path.join(self.tempdir, 'potato.png')
+        write_atomic(filename, b'old')
+        os.chmod(filename, 0o600)
+
+        write_atomic(filename, b'new')
+
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(filename).st_mode))
+
+    def test_write_atomic_through_symlink(self):
+        filename = os.path.join(self.tempdir, 'potato.png')
+        link = os.path.join(self.tempdir, 'latest.png')
+        write_atomic(filename, b'old')
+        os.symlink(filename, link)
+
+        write_atomic(link, b'new')
+
+        self.assertTrue(os.path.islink(link))
+        with open(filename, 'rb') as written:
+            self.assertEqual(b'new', written.read())
+
+    def test_write_atomic_failure_keeps_file(self):
+        filename = os.path.join(self.tempdir, 'potato.png')
+        write_atomic(filename, b'old')
+
+        with mock.patch('src.gscreenshot.saving.os.replace', side_effect=OSError()):
+            with self.assertRaises(OSError):
+                write_atomic(filename, b'new')
+
+        with open(filename, 'rb') as written:
+            self.assertEqual(b'old', written.read())
+        self.assertEqual(['potato.png'], os.listdir(self.tempdir))
+
+
+class BackgroundSaverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.saver = BackgroundSaver()
+
+    def test_runs_on_another_thread(self):
+        threads = []
+
+        def save():
+            threads.append(threading.current_thread())
+            return True
+
+        self.assertTrue(self.saver.submit(save).result(5))
+        self.assertIsNot(threading.current_thread(), threads[0])
+
+    def test_on_done_through_dispatch(self):
+        dispatched = threading.Event()
+        on_done = Mock()
+        dispatch = Mock(side_effect=lambda *args: dispatched.set())
+
+        self.saver.submit(lambda: True, on_done, dispatch)
+
+        self.assertTrue(dispatched.wait(5))
+        dispatch.assert_called_once_with(on_done, True)
+        on_done.assert_not_called()
+
+    def test_failed_save(self):
+        done = threading.Event()
+        on_done = Mock(side_effect=lambda saved: done.set())
+
+        def save():
+            raise IOError()
+
+        self.saver.submit(save, on_done)
+
+        self.assertTrue(done.wait(5))
+        on_done.assert_called_once_with(False)
+
+    def test_in_order(self):
+        saved = []
+        release = threading.Event()
+
+        self.saver.submit(lambda: release.wait(5) and saved.append(1))
+        last = self.saver.submit(lambda: saved.append(2))
+        release.set()
+        last.result(5)
+
+        self.assertEqual([1, 2], saved)
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import Mock
+
+from Xlib.error import ConnectionClosedError
+
+from src.gscreenshot.xconnection import XConnection
+
+
+class XConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.xdisplay = Mock()
+        self.xdisplay.pending_events.return_value = 0
+        self.connect = Mock(return_value=self.xdisplay)
+        self.connection = XConnection(self.connect)
+
+    def test_opened_once(self):
+        with self.connection.use() as xdisplay:
+            self.assertIs(self.xdisplay, xdisplay)
+        with self.connection.use() as xdisplay:
+            self.assertIs(self.xdisplay, xdisplay)
+
+        self.connect.assert_called_once()
+        self.xdisplay.close.assert_not_called()
+
+    def test_reopened_after_error(self):
+        with self.assertRaises(ConnectionClosedError):
+            with self.connection.use():
+                raise ConnectionClosedError('display')
+
+        self.xdisplay.close.assert_called_once()
+
+        with self.connection.use():
+            pass
+
+        self.assertEqual(2, self.connect.call_count)
+
+    def test_other_errors_keep_connection(self):
+        with self.assertRaises(ValueError):
+            with self.connection.use():
+                raise ValueError()
+
+        self.xdisplay.close.assert_not_called()
+
+    def test_subscriber_setup_on_each_connect(self):
+        setup = Mock()
+        self.connection.subscribe(setup, Mock())
+        setup.assert_not_called()
+
+        with self.connection.use():
+            pass
+        setup.assert_called_once_with(self.xdisplay)
+
+        self.connection.close()
+        with self.connection.use():
+            pass
+        self.assertEqual(2, setup.call_count)
+
+    def test_subscriber_setup_when_connected(self):
+        with self.connection.use():
+            pass
+
+        setup = Mock()
+        self.connection.subscribe(setup, Mock())
+        setup.assert_called_once_with(self.xdisplay)
+
+    def test_events_dispatched(self):
+        first = Mock()
+        second = Mock()
+        self.connection.subscribe(Mock(), first)
+        self.connection.subscribe(Mock(), second)
+
+        event = Mock()
+        self.xdisplay.pending_events.side_effect = [1, 0]
+        self.xdisplay.next_event.return_value = event
+        with self.connection.use():
+            pass
+
+        first.assert_called_once_with(event)
+        second.assert_called_once_with(event)
+
+    def test_no_xlib(self):
+        connection = XConnection(None)
+        connection._connect = None
+
+        self.assertFalse(connection.available)
+        with self.assertRaises(OSError):
+            with connection.use():
+                pass